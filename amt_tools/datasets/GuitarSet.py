@@ -17,7 +17,9 @@ class GuitarSet(TranscriptionDataset):
 
     def __init__(self, base_dir=None, splits=None, hop_length=512, sample_rate=44100, data_proc=None,
                  profile=None, num_frames=None, audio_norm=-1, split_notes=False, reset_data=False,
-                 store_data=True, save_data=True, save_loc=None, seed=0):
+                 store_data=True, save_data=True, save_loc=None, seed=0, mmap_data=False,
+                 num_workers=0, segment_audio=False, res_type='kaiser_best', cache_audio=False,
+                 feats_dtype=None, lazy_gt=False):
         """
         Initialize the dataset and establish parameter defaults in function signature.
 
@@ -27,7 +29,8 @@ class GuitarSet(TranscriptionDataset):
         """
 
         super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile, num_frames,
-                         audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed)
+                         audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed, mmap_data,
+                         num_workers, segment_audio, res_type, cache_audio, feats_dtype, lazy_gt)
 
     def get_tracks(self, split):
         """
@@ -79,48 +82,87 @@ class GuitarSet(TranscriptionDataset):
         # Load the track data if it exists in memory, otherwise instantiate track data
         data = super().load(track)
 
-        # If the track data is being instantiated, it will not have the 'audio' key
-        if not tools.query_dict(data, tools.KEY_AUDIO):
-            # Construct the path to the track's audio
-            wav_path = self.get_wav_path(track)
+        # If the track data is being instantiated, it will not have the 'fs' key
+        if not tools.query_dict(data, tools.KEY_FS):
             # Load and normalize the audio along with the sampling rate
-            audio, fs = tools.load_normalize_audio(wav_path,
-                                                   fs=self.sample_rate,
-                                                   norm=self.audio_norm)
-
-            # We need the frame times for the tablature
-            times = self.data_proc.get_times(audio)
+            audio, fs = self.load_audio(track)
 
             # Construct the path to the track's JAMS data
             jams_path = self.get_jams_path(track)
 
-            # Load the notes by string from the JAMS file
-            stacked_notes = tools.load_stacked_notes_jams(jams_path)
+            # Load the notes by string from the JAMS file (reusing previously parsed annotations)
+            stacked_notes = tools.load_stacked_notes_jams(jams_path, self.get_jams_cache_dir())
 
-            # Represent the string-wise notes as a stacked multi pitch array
-            stacked_multi_pitch = tools.stacked_notes_to_stacked_multi_pitch(stacked_notes, times, self.profile)
+            # Add all relevant ground-truth to the dictionary
+            data.update({tools.KEY_FS : fs,
+                         tools.KEY_AUDIO : audio})
 
-            # Convert the stacked multi pitch array into tablature
-            tablature = tools.stacked_multi_pitch_to_tablature(stacked_multi_pitch, self.profile)
+            if self.lazy_gt:
+                # Keep the string-wise notes (and an index for slicing them) to render the tablature later
+                data[tools.KEY_NOTES] = stacked_notes
+                data = self.index_ground_truth(data)
+            else:
+                # We need the frame times for the tablature
+                times = self.data_proc.get_times(audio)
 
-            # Convert the stacked multi pitch array into a single representation
-            multi_pitch = tools.stacked_multi_pitch_to_multi_pitch(stacked_multi_pitch)
+                # Render the tablature for the entire track
+                data.update(self.render_ground_truth(stacked_notes, times))
 
-            # Add all relevant ground-truth to the dictionary
-            data.update({tools.KEY_FS : fs,
-                         tools.KEY_AUDIO : audio,
-                         tools.KEY_TABLATURE : tablature,
-                         tools.KEY_MULTIPITCH : multi_pitch})
+            if self.segment_audio:
+                # Audio is decoded on demand rather than kept with the ground-truth
+                data.pop(tools.KEY_AUDIO)
 
             if self.save_data:
                 # Get the appropriate path for saving the track data
                 gt_path = self.get_gt_dir(track)
 
-                # Save the data as a NumPy zip file
-                tools.save_dict_npz(gt_path, data)
+                # Save the data in the chosen format
+                self.save_cached_data(gt_path, data)
 
         return data
 
+    def render_ground_truth(self, notes, times, index=None):
+        """
+        Render the tablature and multi pitch from the string-wise notes of a track for a set of frames.
+
+        Parameters
+        ----------
+        notes : dict
+          Full stacked notes of a track
+        times : ndarray (T)
+          Time in seconds of the frames for which to render ground-truth
+          T - number of frames
+        index : dict or None (optional)
+          Precomputed index for each slice of the stacked notes (see tools.index_notes)
+
+        Returns
+        ----------
+        ground_truth : dict
+          Dictionary containing the rendered ground-truth
+        """
+
+        if index is not None and len(times):
+            # Determine the boundaries of the frames (including the final hop)
+            start_time, stop_time = times[0], times[-1] + self.hop_length / self.sample_rate
+            # Narrow down the notes of each string to those which can overlap with the frames
+            notes = {slc : tuple(a[slice(*tools.get_index_range(index[slc], start_time, stop_time))]
+                                 for a in notes[slc]) for slc in notes.keys()}
+
+        # Represent the string-wise notes as a stacked multi pitch array
+        stacked_multi_pitch = tools.stacked_notes_to_stacked_multi_pitch(notes, times, self.profile)
+
+        # Convert the stacked multi pitch array into tablature
+        tablature = tools.stacked_multi_pitch_to_tablature(stacked_multi_pitch, self.profile)
+
+        # Convert the stacked multi pitch array into a single representation
+        multi_pitch = tools.stacked_multi_pitch_to_multi_pitch(stacked_multi_pitch)
+
+        # Combine the rendered ground-truth
+        ground_truth = {tools.KEY_TABLATURE : tablature,
+                        tools.KEY_MULTIPITCH : multi_pitch}
+
+        return ground_truth
+
     def get_wav_path(self, track):
         """
         Get the path to the audio of a track.
@@ -161,6 +203,25 @@ class GuitarSet(TranscriptionDataset):
 
         return jams_path
 
+    def get_jams_cache_dir(self):
+        """
+        Get the directory under which to cache parsed annotations.
+
+        Returns
+        ----------
+        cache_dir : string or None
+          Path to the cache directory, or None if data is not being saved
+        """
+
+        # Default the cache directory to nothing
+        cache_dir = None
+
+        if self.save_data:
+            # Place the parsed annotations alongside the ground-truth
+            cache_dir = os.path.join(self.save_loc, self.dataset_name(), tools.JAMS_CACHE_DIR)
+
+        return cache_dir
+
     @staticmethod
     def available_splits():
         """
@@ -18,7 +18,9 @@ class _MAESTRO(MAPS):
 
     def __init__(self, base_dir=None, splits=None, hop_length=512, sample_rate=16000, data_proc=None,
                  profile=None, num_frames=None, audio_norm=-1, split_notes=False, reset_data=False,
-                 store_data=False, save_data=True, save_loc=None, seed=0):
+                 store_data=False, save_data=True, save_loc=None, seed=0, mmap_data=False,
+                 num_workers=0, segment_audio=False, res_type='kaiser_best', cache_audio=False,
+                 feats_dtype=None, lazy_gt=False):
         """
         Initialize the dataset and establish parameter defaults in function signature.
 
@@ -28,7 +30,8 @@ class _MAESTRO(MAPS):
         """
 
         super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile, num_frames,
-                         audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed)
+                         audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed, mmap_data,
+                         num_workers, segment_audio, res_type, cache_audio, feats_dtype, lazy_gt)
 
     def get_tracks(self, split):
         """
@@ -17,7 +17,9 @@ class MAPS(TranscriptionDataset):
 
     def __init__(self, base_dir=None, splits=None, hop_length=512, sample_rate=16000, data_proc=None,
                  profile=None, num_frames=None, audio_norm=-1, split_notes=False, reset_data=False,
-                 store_data=True, save_data=True, save_loc=None, seed=0):
+                 store_data=True, save_data=True, save_loc=None, seed=0, mmap_data=False,
+                 num_workers=0, segment_audio=False, res_type='kaiser_best', cache_audio=False,
+                 feats_dtype=None, lazy_gt=False):
         """
         Initialize the dataset and establish parameter defaults in function signature.
 
@@ -27,7 +29,8 @@ class MAPS(TranscriptionDataset):
         """
 
         super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile, num_frames,
-                         audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed)
+                         audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed, mmap_data,
+                         num_workers, segment_audio, res_type, cache_audio, feats_dtype, lazy_gt)
 
     def get_tracks(self, split):
         """
@@ -76,17 +79,10 @@ class MAPS(TranscriptionDataset):
         # Load the track data if it exists in memory, otherwise instantiate track data
         data = super().load(track)
 
-        # If the track data is being instantiated, it will not have the 'audio' key
-        if not tools.query_dict(data, tools.KEY_AUDIO):
-            # Construct the path to the track's audio
-            wav_path = self.get_wav_path(track)
+        # If the track data is being instantiated, it will not have the 'fs' key
+        if not tools.query_dict(data, tools.KEY_FS):
             # Load and normalize the audio along with the sampling rate
-            audio, fs = tools.load_normalize_audio(wav_path,
-                                                   fs=self.sample_rate,
-                                                   norm=self.audio_norm)
-
-            # We need the frame times for the multi pitch array
-            times = self.data_proc.get_times(audio)
+            audio, fs = self.load_audio(track)
 
             # Construct the path to the track's MIDI data
             midi_path = self.get_midi_path(track)
@@ -94,39 +90,80 @@ class MAPS(TranscriptionDataset):
             # Load the batch-friendly notes from the MIDI data and remove the velocity
             batched_notes = tools.load_notes_midi(midi_path)[..., :-1]
 
-            # Convert the batch-friendly notes to notes
-            pitches, intervals = tools.batched_notes_to_notes(batched_notes)
-
-            # Represent the string-wise notes as a multi pitch array
-            multi_pitch = tools.notes_to_multi_pitch(pitches, intervals, times, self.profile)
-
-            # Consider the length of a hop as the ambiguity for onsets/offsets
-            ambiguity = self.hop_length / self.sample_rate
-
-            # Obtain onsets and offsets from the notes as stacked multi pitch arrays
-            onsets = tools.notes_to_onsets(pitches, intervals, times, self.profile, ambiguity)
-            offsets = tools.notes_to_offsets(pitches, intervals, times, self.profile, ambiguity)
-
             # Add all relevant ground-truth to the dictionary
             data.update({tools.KEY_FS : fs,
                          tools.KEY_AUDIO : audio,
-                         tools.KEY_MULTIPITCH : multi_pitch,
-                         tools.KEY_ONSETS : onsets,
-                         tools.KEY_OFFSETS : offsets,
                          tools.KEY_NOTES : batched_notes})
 
+            if not self.lazy_gt:
+                # We need the frame times for the multi pitch array
+                times = self.data_proc.get_times(audio)
+
+                # Render the dense ground-truth for the entire track
+                data.update(self.render_ground_truth(batched_notes, times))
+
+            # Add an index for slicing the notes
+            data = self.index_ground_truth(data)
+
+            if self.segment_audio:
+                # Audio is decoded on demand rather than kept with the ground-truth
+                data.pop(tools.KEY_AUDIO)
+
             if self.save_data:
                 # Get the appropriate path for saving the track data
                 gt_path = self.get_gt_dir(track)
 
-                # Create the (sub-directory) path if it doesn't exist
-                os.makedirs(os.path.dirname(gt_path), exist_ok=True)
-
-                # Save the data as a NumPy zip file
-                tools.save_dict_npz(gt_path, data)
+                # Save the data in the chosen format
+                self.save_cached_data(gt_path, data)
 
         return data
 
+    def render_ground_truth(self, notes, times, index=None):
+        """
+        Render the multi pitch, onsets, and offsets from the notes of a track for a set of frames.
+
+        Parameters
+        ----------
+        notes : ndarray (N x 3)
+          Full batched notes of a track
+        times : ndarray (T)
+          Time in seconds of the frames for which to render ground-truth
+          T - number of frames
+        index : ndarray (2 x N) or None (optional)
+          Precomputed index for the notes (see tools.index_notes)
+
+        Returns
+        ----------
+        ground_truth : dict
+          Dictionary containing the rendered ground-truth
+        """
+
+        # Consider the length of a hop as the ambiguity for onsets/offsets
+        ambiguity = self.hop_length / self.sample_rate
+
+        if index is not None and len(times):
+            # Narrow down the notes to those which can overlap with the frames (including the final hop),
+            # accounting for offsets which occur just before the frames but are marked within them
+            start_idx, stop_idx = tools.get_index_range(index, times[0] - ambiguity, times[-1] + ambiguity)
+            notes = notes[start_idx : stop_idx]
+
+        # Convert the batch-friendly notes to notes
+        pitches, intervals = tools.batched_notes_to_notes(notes)
+
+        # Represent the notes as a multi pitch array
+        multi_pitch = tools.notes_to_multi_pitch(pitches, intervals, times, self.profile)
+
+        # Obtain onsets and offsets from the notes as multi pitch arrays
+        onsets = tools.notes_to_onsets(pitches, intervals, times, self.profile, ambiguity)
+        offsets = tools.notes_to_offsets(pitches, intervals, times, self.profile, ambiguity)
+
+        # Combine the rendered ground-truth
+        ground_truth = {tools.KEY_MULTIPITCH : multi_pitch,
+                        tools.KEY_ONSETS : onsets,
+                        tools.KEY_OFFSETS : offsets}
+
+        return ground_truth
+
     def remove_overlapping(self, splits):
         """
         Remove any tracks contained in the given splits from
@@ -25,3 +25,5 @@ from .common import TranscriptionDataset
 from .GuitarSet import GuitarSet
 from .MAESTRO import _MAESTRO, MAESTRO_V1, MAESTRO_V2, MAESTRO_V3
 from .MAPS import MAPS
+from .multicrop import MultiCropDataset
+from .shards import ShardedDataset, export_shards
@@ -2,63 +2,353 @@
 
 # My imports
 from .common import TranscriptionDataset
+from .. import tools
 
 # Regular imports
-import numpy as np
-import mirdata
-import shutil
-import os
+from concurrent.futures import ThreadPoolExecutor
+from collections import ChainMap
 
-# TODO - ComboDataset
-# TODO - clean this up and verify
+import numpy as np
 
 
 class DatasetCombo(TranscriptionDataset):
     """
-    Implements the combination of multiple datasets.
+    Implements the combination of multiple datasets, where each track
+    is loaded, sliced, and described by the dataset to which it belongs.
+
+    TranscriptionDataset.__init__ is intentionally not called, since it would load, prepare, and
+    save data for tracks which the constituent datasets already handle. Only the hyper-parameters
+    shared by all datasets are adopted (None if they differ). Attributes tied to loading or storing
+    the data of a single dataset (e.g. base_dir, save_loc, data, audio_index, rng) are left unset,
+    so any methods which rely on them (e.g. prepare, build_manifest, index_audio, calculate_feats)
+    should be called on the constituent datasets instead.
     """
 
-    def __init__(self, datasets, splits):
+    def __init__(self, datasets, splits=None, weights=None, num_threads=None):
         """
+        Build (if necessary) and combine the constituent datasets.
+
+        Parameters
+        ----------
+        datasets : list of (TranscriptionDataset or callable)
+          Instantiated datasets, or functions (e.g. functools.partial) which
+          instantiate them, in which case the datasets are built concurrently
+        splits : list of strings or None (optional)
+          Names of partitions to include from each dataset which has them - None to include
+          the tracks already chosen by each dataset (i.e. those within its own splits)
+        weights : list of float or None (optional)
+          Relative probability of sampling a track from each dataset (see get_sampler) - None
+          to sample tracks across all datasets with probability proportional to their duration
+        num_threads : int or None (optional)
+          Number of threads to use when building datasets - None for one per dataset
         """
 
+        # Determine which datasets still need to be built
+        builders = [dataset for dataset in datasets if not isinstance(dataset, TranscriptionDataset)]
+
+        if len(builders):
+            # Build the datasets concurrently (most of the work involves reading from disk or is done by NumPy)
+            with ThreadPoolExecutor(max_workers=num_threads or len(builders)) as executor:
+                built = iter(list(executor.map(lambda build: build(), builders)))
+
+            # Replace the functions with the datasets they built, preserving the original order
+            datasets = [dataset if isinstance(dataset, TranscriptionDataset) else next(built) for dataset in datasets]
+
         self.datasets = datasets
-        self.splits = splits
+
+        if weights is not None:
+            assert len(weights) == len(self.datasets), 'Must provide exactly one weight per dataset'
+        self.weights = weights
+
+        # Initialize a dictionary to look up the dataset (index) to which each track belongs
+        self.track_map = {}
 
         self.tracks = []
-        for split in self.splits:
-            self.tracks += self.get_tracks(split)
+        if splits is None:
+            # Aggregate the tracks already chosen by each dataset
+            for idx, dataset in enumerate(self.datasets):
+                self.tracks += self.map_tracks(idx, dataset.tracks)
+
+            # Default the splits to those chosen for each dataset
+            splits = list(dict.fromkeys([split for dataset in self.datasets for split in dataset.splits]))
+        else:
+            # Aggregate all the track names from the selected splits
+            for split in splits:
+                self.tracks += self.get_tracks(split)
+        self.splits = splits
+
+        # Adopt the hyper-parameters shared by all datasets
+        self.hop_length = self.get_shared_attribute('hop_length')
+        self.sample_rate = self.get_shared_attribute('sample_rate')
+        self.seq_length = self.get_shared_attribute('seq_length')
+        self.num_frames = self.get_shared_attribute('num_frames')
+        self.segment_audio = self.get_shared_attribute('segment_audio')
+        self.data_proc = self.get_shared_attribute('data_proc')
+        self.profile = self.get_shared_attribute('profile')
+        self.audio_norm = self.get_shared_attribute('audio_norm')
+        self.store_data = self.get_shared_attribute('store_data')
+        self.save_data = self.get_shared_attribute('save_data')
+        self.mmap_data = self.get_shared_attribute('mmap_data')
+        self.feats_dtype = self.get_shared_attribute('feats_dtype')
+        self.lazy_gt = self.get_shared_attribute('lazy_gt')
+
+    def get_shared_attribute(self, name):
+        """
+        Obtain the value of an attribute if it is the same for all datasets.
+
+        Parameters
+        ----------
+        name : string
+          Name of the attribute
+
+        Returns
+        ----------
+        value : object or None
+          Value of the attribute, or None if it differs across datasets
+        """
+
+        # Collect the value of the attribute for each dataset
+        values = [getattr(dataset, name, None) for dataset in self.datasets]
+
+        # Only keep the value if it is unanimous
+        value = values[0] if all(v == values[0] for v in values) else None
+
+        return value
 
     def get_tracks(self, split):
         """
+        Get the tracks associated with a partition across all datasets.
+
+        Parameters
+        ----------
+        split : string
+          Name of the partition from which to fetch tracks
+
+        Returns
+        ----------
+        tracks : list of strings
+          Names of tracks within the given partition
         """
 
         tracks = []
-        for dataset in self.datasets:
+        for idx, dataset in enumerate(self.datasets):
             if split in dataset.available_splits():
-                tracks += dataset.get_tracks(split)
+                # Add the dataset's tracks for the partition
+                tracks += self.map_tracks(idx, dataset.get_tracks(split))
+
+        return tracks
+
+    def map_tracks(self, idx, tracks):
+        """
+        Keep track of the dataset to which each of a group of tracks belongs.
+
+        Parameters
+        ----------
+        idx : int
+          Index of the dataset containing the tracks
+        tracks : list of strings
+          Names of the tracks
+
+        Returns
+        ----------
+        tracks : list of strings
+          Names of the tracks
+        """
+
+        for track in tracks:
+            assert self.track_map.get(track, idx) == idx, f'Track \'{track}\' exists in more than one dataset'
+            # Point the track to the dataset
+            self.track_map[track] = idx
 
         return tracks
 
+    def get_dataset(self, track):
+        """
+        Get the dataset to which a track belongs.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        dataset : TranscriptionDataset
+          Dataset containing the track
+        """
+
+        dataset = self.datasets[self.track_map[track]]
+
+        return dataset
+
+    @property
+    def manifest(self):
+        """
+        Obtain a unified (live) view of the manifests of all datasets.
+
+        Returns
+        ----------
+        manifest : ChainMap
+          Description of each track which has been described by its dataset
+        """
+
+        manifest = ChainMap(*[dataset.manifest for dataset in self.datasets])
+
+        return manifest
+
     def load(self, track):
         """
+        Load the ground-truth for a track using its dataset.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to load
+
+        Returns
+        ----------
+        data : dict
+          Dictionary with ground-truth for the track
         """
 
-        for dataset in self.datasets:
-            if track in dataset.tracks:
-                data = dataset.load(track)
-                break
+        data = self.get_dataset(track).load(track)
 
         return data
 
+    def load_audio(self, track, sample_start=None, num_samples=None):
+        """
+        Load the audio for a track (or a segment of it) using its dataset.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        return self.get_dataset(track).load_audio(track, sample_start, num_samples)
+
+    def load_track_data(self, track_id, segment_only=False):
+        """
+        Get the full ground-truth, audio, and features for a track using its dataset.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        return self.get_dataset(track_id).load_track_data(track_id, segment_only)
+
+    def get_track_data(self, track_id, sample_start=None, seq_length=None, snap_to_frame=True):
+        """
+        Get the (sliced) features and ground truth for a track using its dataset.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        return self.get_dataset(track_id).get_track_data(track_id, sample_start, seq_length, snap_to_frame)
+
+    def slice_track_data(self, data, sample_start=None, seq_length=None, snap_to_frame=True):
+        """
+        Slice the full data for a track using its dataset.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        return self.get_dataset(data[tools.KEY_TRACK]).slice_track_data(data, sample_start, seq_length, snap_to_frame)
+
+    def get_num_samples(self, data):
+        """
+        Determine the number of audio samples in a track using its dataset.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        return self.get_dataset(data[tools.KEY_TRACK]).get_num_samples(data)
+
+    def get_track_num_samples(self, track):
+        """
+        Determine the number of audio samples in a track using its dataset.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        return self.get_dataset(track).get_track_num_samples(track)
+
+    def get_wav_path(self, track):
+        """
+        Get the path to the audio of a track using its dataset.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        return self.get_dataset(track).get_wav_path(track)
+
+    def get_track_weights(self):
+        """
+        Obtain a weight for each track, such that each dataset is sampled with
+        its chosen probability (if any) and tracks within a dataset are sampled
+        with probability proportional to their duration.
+
+        Returns
+        ----------
+        weights : ndarray (N)
+          Weight of each track
+          N - number of tracks
+        """
+
+        # Initialize an array to hold the weights
+        weights = np.zeros(len(self.tracks))
+
+        # Determine the dataset to which each track belongs
+        track_idcs = np.array([self.track_map[track] for track in self.tracks], dtype=int)
+
+        for idx, dataset in enumerate(self.datasets):
+            # Determine which tracks belong to the dataset
+            in_dataset = track_idcs == idx
+
+            if not np.any(in_dataset):
+                # The dataset does not contribute any tracks
+                continue
+
+            # Look up the number of samples in each of the dataset's tracks (without loading them if possible)
+            durations = np.array([dataset.get_track_num_samples(track)
+                                  for track in np.array(self.tracks)[in_dataset]], dtype=float)
+
+            if self.weights is not None:
+                # Distribute the dataset's weight among its tracks according to their duration
+                durations = self.weights[idx] * durations / np.sum(durations)
+
+            # Add the weights for the dataset's tracks
+            weights[in_dataset] = durations
+
+        return weights
+
     def available_splits(self):
         """
+        Obtain a list of all partitions across all datasets.
+
+        Returns
+        ----------
+        splits : list of strings
+          Names of the partitions (without duplicates)
         """
 
         splits = []
         for dataset in self.datasets:
             splits += dataset.available_splits()
 
+        # Remove duplicates while preserving order
+        splits = list(dict.fromkeys(splits))
+
         return splits
 
     @staticmethod
@@ -5,16 +5,47 @@ from ..features import STFT
 from .. import tools
 
 # Regular imports
-from torch.utils.data import Dataset
+from concurrent.futures import ProcessPoolExecutor
+from torch.utils.data import Dataset, WeightedRandomSampler
 from abc import abstractmethod
-from copy import deepcopy
+from copy import copy
 from tqdm import tqdm
 
+import soundfile as sf
 import numpy as np
+import threading
 import warnings
 import shutil
+import json
 import os
 
+# Locks for the files (e.g. manifest) which are read, merged, and rewritten by
+# multiple partitions of a dataset, which can be constructed concurrently
+TRACK_INDEX_LOCKS = {}
+TRACK_INDEX_LOCKS_LOCK = threading.Lock()
+
+
+def get_track_index_lock(path):
+    """
+    Obtain the lock for a file of per-track entries, creating it if necessary.
+
+    Parameters
+    ----------
+    path : string
+      Path to the file
+
+    Returns
+    ----------
+    lock : Lock
+      Lock which is held while the file is read, merged, and rewritten
+    """
+
+    with TRACK_INDEX_LOCKS_LOCK:
+        # Use the same lock for any path referring to the file
+        lock = TRACK_INDEX_LOCKS.setdefault(os.path.abspath(path), threading.Lock())
+
+    return lock
+
 # TODO - more datasets - MusicNet, Slakh, Drums
 # TODO - optionally download datasets in flac to save memory
 # TODO - possible integration with mirdata
@@ -32,7 +63,9 @@ class TranscriptionDataset(Dataset):
     """
 
     def __init__(self, base_dir, splits, hop_length, sample_rate, data_proc, profile, num_frames,
-                 audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed):
+                 audio_norm, split_notes, reset_data, store_data, save_data, save_loc, seed, mmap_data=False,
+                 num_workers=0, segment_audio=False, res_type='kaiser_best', cache_audio=False,
+                 feats_dtype=None, lazy_gt=False):
         """
         Initialize parameters common to all datasets as fields and instantiate
         as a PyTorch Dataset.
@@ -70,6 +103,35 @@ class TranscriptionDataset(Dataset):
           Location for saving and loading pre-organized ground-truth and calculated features
         seed : int
           The seed for random number generation
+        mmap_data : bool
+          Flag to save ground-truth and features as raw arrays which are memory-mapped when
+          loaded, such that only the portion of a track which is sampled is read from disk
+        num_workers : int
+          Number of processes to use when preparing ground-truth and features for all tracks upfront
+          (only applicable with save_data=True) - 0 to prepare each track on demand in this process
+        segment_audio : bool
+          Flag to decode only the audio within each sampled window (using per-track
+          normalization statistics computed once and saved to an index) and calculate
+          features for the window on-the-fly, instead of keeping full tracks of audio
+          (the features match those of the full track only if the decibel reference
+          does not depend on the audio, see FeatureModule.query_fixed_reference)
+        res_type : string
+          Type of resampling to perform when loading audio (see tools.resample_audio)
+          - 'polyphase' is much faster than the default for integer sampling rates
+        cache_audio : bool
+          Flag to cache each track's resampled audio under the save location, such that
+          it is not decoded and resampled again whenever ground-truth is not available
+          (segments are also read from the cache when it exists and segment_audio=True)
+        feats_dtype : string or None
+          Type in which to save and store features (see tools.quantize_features), which are
+          converted back to single-precision when sampled - None to keep the computed type
+          - 'float16' halves the size of the features
+          - 'uint8' quarters the size of the features, but is only accepted for features
+            which lie between 0 and 1 (see FeatureModule.query_unit_range)
+        lazy_gt : bool
+          Flag to save and store only compact symbolic ground-truth (e.g. notes) for each
+          track, and to render dense frame-level ground-truth (e.g. multi pitch arrays)
+          only for the frames of each sampled window (see render_ground_truth)
         """
 
         # Select a default base directory path if none was provided
@@ -102,6 +164,17 @@ class TranscriptionDataset(Dataset):
                              sample_rate=self.sample_rate)
         self.data_proc = data_proc
 
+        if feats_dtype is not None and np.dtype(feats_dtype) == np.uint8:
+            # Features outside of [0, 1] would be clipped when quantized
+            assert self.data_proc.query_unit_range(), 'Features can only be stored as uint8 if they lie between ' + \
+                                                      '0 and 1, e.g. decibels scaled by FeatureModule.post_proc'
+
+        if segment_audio and not self.data_proc.query_fixed_reference():
+            # Features calculated for each window would be converted to decibels w.r.t. the window instead of the track
+            warnings.warn('Features calculated on-the-fly for segments of audio will not match those of the full ' +
+                          'track, since the decibel reference depends on the audio processed. Specify a fixed ' +
+                          'reference (e.g. db_ref=1.0) for the feature extraction module.', category=RuntimeWarning)
+
         # Default the instrument profile to a standard piano if none was provided
         if profile is None:
             profile = tools.PianoProfile()
@@ -122,6 +195,13 @@ class TranscriptionDataset(Dataset):
         # Set the storing and saving parameters
         self.store_data = store_data
         self.save_data = save_data
+        self.mmap_data = mmap_data
+        self.num_workers = num_workers
+        self.segment_audio = segment_audio
+        self.res_type = res_type
+        self.cache_audio = cache_audio
+        self.feats_dtype = feats_dtype
+        self.lazy_gt = lazy_gt
         if save_loc is None:
             save_loc = tools.DEFAULT_FEATURES_GT_DIR
         self.save_loc = save_loc
@@ -142,6 +222,13 @@ class TranscriptionDataset(Dataset):
             # Make sure the directory for saving and loading features exists
             os.makedirs(self.get_feats_dir(), exist_ok=True)
 
+            # Construct the path to a description of the configuration which produced the features
+            config_path = os.path.join(self.get_feats_dir(), f'{tools.CONFIG_NAME}.{tools.JSON_EXT}')
+
+            if not os.path.exists(config_path):
+                # Save the configuration (atomically), such that the features directory can be identified
+                tools.save_json(config_path, self.data_proc.get_config())
+
         # Initialize a random number generator for the dataset
         self.rng = np.random.RandomState(seed)
 
@@ -150,12 +237,34 @@ class TranscriptionDataset(Dataset):
         for split in self.splits:
             self.tracks += self.get_tracks(split)
 
-        # Load the ground-truth for each track into RAM
         if self.store_data:
+            # Initialize a dictionary to hold all track data in RAM
             self.data = {}
+
+        # Initialize a dictionary to hold the length and normalization factor of each track's audio
+        self.audio_index = self.load_audio_index() if self.segment_audio else {}
+
+        # Initialize a dictionary to hold the length, number of notes, and feature shape of each track
+        self.manifest = self.load_manifest()
+
+        # Initialize a dictionary to hold the length of tracks which have not been described yet
+        self.track_lengths = {}
+
+        if self.save_data and self.num_workers > 0:
+            # Compute and save the ground-truth and features for all tracks concurrently
+            self.prepare()
+
+        # Load the ground-truth for each track into RAM
+        if self.store_data:
             for track in tqdm(self.tracks):
                 self.data[track] = self.load(track)
 
+        if self.segment_audio:
+            # Make sure the audio of every track is indexed
+            self.index_audio()
+
+        # The manifest is completed lazily, as tracks are loaded (see prepare and build_manifest)
+
     def __len__(self):
         """
         Defines the notion of length for the dataset - used by PyTorch Dataset class.
@@ -163,10 +272,16 @@ class TranscriptionDataset(Dataset):
         Returns
         ----------
         length : int
-          Number of tracks in the dataset partition
+          Number of tracks in the dataset partition, or the number of (non-overlapping)
+          crops across all tracks, if samples have a fixed length (see get_crop_offsets)
         """
 
-        length = len(self.tracks)
+        if self.seq_length is None:
+            # Each item is a whole track
+            length = len(self.tracks)
+        else:
+            # Each item is a crop, and each track contributes one crop per sequence length of audio
+            length = int(self.get_crop_offsets()[-1])
 
         return length
 
@@ -185,14 +300,39 @@ class TranscriptionDataset(Dataset):
           Dictionary containing the features and ground-truth data for the sampled track
         """
 
+        if self.seq_length is not None:
+            # Determine the track to which the crop belongs
+            index = np.searchsorted(self.get_crop_offsets(), index, side='right') - 1
+
         # Get the name of the track
         track_id = self.tracks[index]
 
-        # Slice the track's features and ground-truth
+        # Slice the track's features and ground-truth (a random crop, if samples have a fixed length)
         data = self.get_track_data(track_id)
 
-        # Convert all numpy arrays in the data dictionary to float32
-        data = tools.dict_to_dtype(data, dtype=tools.FLOAT32)
+        # Prepare the slice for batching
+        data = self.format_sample(data)
+
+        return data
+
+    @staticmethod
+    def format_sample(data):
+        """
+        Prepare the data for a (sliced) track to be batched with other samples.
+
+        Parameters
+        ----------
+        data : dict
+          Dictionary containing the features and ground-truth data for a track
+
+        Returns
+        ----------
+        data : dict
+          Dictionary containing only the batch-friendly data converted to float32
+        """
+
+        # Convert all numpy arrays in the data dictionary to float32 (the conversion creates new arrays)
+        data = tools.dict_to_dtype(data, dtype=tools.FLOAT32, deep=False)
 
         # Remove any notes, as they cannot be batched
         if tools.query_dict(data, tools.KEY_NOTES):
@@ -227,8 +367,9 @@ class TranscriptionDataset(Dataset):
 
         # Determine what type of argument was given
         if isinstance(data, dict):
-            # Copy the track's data into a local dictionary
-            data = deepcopy(data)
+            # Copy the track's data into a local dictionary (without
+            # copying the entries, which may be memory-mapped arrays)
+            data = copy(data)
         else:
             # We assume a track name was given
             data = {tools.KEY_TRACK : data}
@@ -241,7 +382,7 @@ class TranscriptionDataset(Dataset):
         # Check if the features already exist
         if self.save_data and os.path.exists(feats_path):
             # If so, load the features
-            feats_dict = tools.load_dict_npz(feats_path)
+            feats_dict = self.load_cached_data(feats_path)
             feats = feats_dict[tools.KEY_FEATS]
             feats = feats.item() if feats.size == 1 else feats
 
@@ -249,20 +390,18 @@ class TranscriptionDataset(Dataset):
             fs = feats_dict[tools.KEY_FS].item()
             hop_length = feats_dict[tools.KEY_HOP].item()
         else:
-            # If not, calculate the features
-            feats = self.data_proc.process_audio(data[tools.KEY_AUDIO])
+            # If not, calculate the features and convert them to the storage type
+            feats = tools.quantize_features(self.data_proc.process_audio(data[tools.KEY_AUDIO]), self.feats_dtype)
 
             # Fetch the hyper-parameters of the feature module
             fs = self.data_proc.get_sample_rate()
             hop_length = self.data_proc.get_hop_length()
 
             if self.save_data:
-                # Get the appropriate path for saving the features
-                os.makedirs(os.path.dirname(feats_path), exist_ok=True)
-                # Save the features to memory as a NumPy zip file
-                tools.save_dict_npz(feats_path, {tools.KEY_FS : fs,
-                                                 tools.KEY_HOP : hop_length,
-                                                 tools.KEY_FEATS : feats})
+                # Save the features to memory in the chosen format
+                self.save_cached_data(feats_path, {tools.KEY_FS : fs,
+                                                   tools.KEY_HOP : hop_length,
+                                                   tools.KEY_FEATS : feats})
 
         # Make sure there is agreement between dataset and features
         if self.sample_rate != fs or self.hop_length != hop_length:
@@ -283,7 +422,8 @@ class TranscriptionDataset(Dataset):
             # Add the features to the data dictionary
             data[tools.KEY_FEATS] = feats
 
-        if self.store_data:
+        # Check if the track's data is being stored in RAM
+        if self.store_data and tools.query_dict(self.data, track):
             # Check if fixed features were provided
             if feats is not None:
                 # Add the features to the data dictionary in RAM
@@ -294,6 +434,160 @@ class TranscriptionDataset(Dataset):
 
         return data
 
+    def prepare_track(self, track):
+        """
+        Compute and save the ground-truth and features for a track, if they do not already exist.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to prepare
+
+        Returns
+        ----------
+        audio_entry : dict or None
+          Audio index entry for the track (only applicable with segment_audio=True)
+        manifest_entry : dict
+          Manifest entry for the track
+        """
+
+        # Generate (or load) the ground-truth, which is saved upon generation
+        data = self.load(track)
+
+        if self.segment_audio:
+            if track not in self.audio_index:
+                # Index the audio if it was not decoded while generating the ground-truth
+                self.load_audio(track)
+        else:
+            # Compute (or load) the features, which are saved upon computation
+            data = self.calculate_feats(data)
+
+        # Obtain the entry for the track in the audio index
+        audio_entry = self.audio_index.get(track)
+
+        # Describe the track for the manifest
+        manifest_entry = self.get_manifest_entry(data)
+
+        return audio_entry, manifest_entry
+
+    def prepare(self, num_workers=None):
+        """
+        Compute and save the ground-truth and features for all tracks within the dataset
+        partition which have not yet been saved, distributing the tracks across processes.
+
+        Parameters
+        ----------
+        num_workers : int or None (optional)
+          Number of processes to use - defaults to the number chosen at initialization
+        """
+
+        if not self.save_data:
+            warnings.warn('Ground-truth and features can only be prepared ' +
+                          'when save_data=True.', category=RuntimeWarning)
+            return
+
+        # Default the number of processes to the dataset setting
+        if num_workers is None:
+            num_workers = self.num_workers
+
+        # Determine which tracks are missing either ground-truth or features (or an audio index entry)
+        tracks = [track for track in self.tracks if not self.is_prepared(track)]
+
+        if len(tracks) == 0:
+            # Nothing to prepare
+            return
+
+        if num_workers > 1:
+            # Prepare the tracks in separate processes - each track's data is written atomically
+            with ProcessPoolExecutor(max_workers=num_workers) as pool:
+                # Wait for all tracks to complete, displaying a progress bar in the console
+                entries = list(tqdm(pool.map(self.prepare_track, tracks), total=len(tracks)))
+        else:
+            # Prepare the tracks one-by-one within this process
+            entries = [self.prepare_track(track) for track in tqdm(tracks)]
+
+        # Collect any audio index entries (which may have been computed within separate processes)
+        self.audio_index.update({track : audio_entry for track, (audio_entry, _) in zip(tracks, entries)
+                                 if audio_entry is not None})
+        # Collect the manifest entries
+        self.manifest.update({track : manifest_entry for track, (_, manifest_entry) in zip(tracks, entries)})
+
+        if self.segment_audio:
+            # Save the collected audio index entries
+            self.save_audio_index()
+
+        # Save the collected manifest entries
+        self.save_manifest()
+
+    def is_prepared(self, track):
+        """
+        Determine whether the ground-truth and features (or the audio index
+        entry, if features are calculated on-the-fly) for a track have been saved.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to check
+
+        Returns
+        ----------
+        prepared : bool
+          Whether the track has been prepared
+        """
+
+        # Check whether the ground-truth exists
+        prepared = os.path.exists(self.get_gt_dir(track))
+
+        if self.segment_audio:
+            # Features are not saved, but the audio must be indexed
+            prepared = prepared and track in self.audio_index
+        else:
+            # Check whether the features exist
+            prepared = prepared and os.path.exists(self.get_feats_dir(track))
+
+        return prepared
+
+    def load_track_data(self, track_id, segment_only=False):
+        """
+        Get the full ground-truth, audio, and features for a track within the dataset.
+
+        Parameters
+        ----------
+        track_id : string
+          Name of track data to fetch
+        segment_only : bool
+          Whether to skip loading the full track of audio and calculating
+          features (only applicable with segment_audio=True)
+
+        Returns
+        ----------
+        data : dict
+          Dictionary containing the features and ground-truth data for the track
+        """
+
+        if self.store_data:
+            # Copy the track's ground-truth data into a local dictionary - entries are
+            # replaced with slices (views) rather than modified, so the (potentially
+            # full-length) arrays themselves do not need to be copied
+            data = copy(self.data[track_id])
+        else:
+            # Load the track's ground-truth
+            data = self.load(track_id)
+
+        if not tools.query_dict(data, tools.KEY_AUDIO) and not segment_only:
+            # Load the full track of audio (not kept with the ground-truth when audio is segmented)
+            data[tools.KEY_AUDIO], _ = self.load_audio(track_id)
+
+        if tools.KEY_FEATS not in data.keys() and not segment_only:
+            # Calculate the features and add to the dictionary
+            data.update(self.calculate_feats(data))
+
+        if track_id not in self.manifest:
+            # Describe the track for the manifest
+            self.manifest[track_id] = self.get_manifest_entry(data)
+
+        return data
+
     def get_track_data(self, track_id, sample_start=None, seq_length=None, snap_to_frame=True):
         """
         Get the features and ground truth for a track within a time interval.
@@ -315,29 +609,289 @@ class TranscriptionDataset(Dataset):
           Dictionary with each entry sliced for the random or provided interval
         """
 
-        if self.store_data:
-            # Copy the track's ground-truth data into a local dictionary
-            data = deepcopy(self.data[track_id])
+        # If a specific sequence length was not given, use that of the Dataset object (if any)
+        if seq_length is None:
+            seq_length = self.seq_length
+
+        # Determine whether only a segment of audio is required, with features calculated on-the-fly
+        segment_only = self.segment_audio and seq_length is not None
+
+        # Obtain the track's full ground-truth (and audio and features if necessary)
+        data = self.load_track_data(track_id, segment_only)
+
+        # Slice the track's data
+        data = self.slice_track_data(data, sample_start, seq_length, snap_to_frame)
+
+        return data
+
+    def get_num_samples(self, data):
+        """
+        Determine the number of audio samples in a track.
+
+        Parameters
+        ----------
+        data : dict
+          Dictionary containing the ground-truth (and possibly the audio) for a track
+
+        Returns
+        ----------
+        num_samples : int
+          Number of samples in the track's audio
+        """
+
+        # Obtain the name of the track
+        track_id = data[tools.KEY_TRACK]
+
+        if track_id in self.manifest:
+            # Look up the number of samples in the manifest
+            num_samples = self.manifest[track_id][tools.KEY_NUM_SAMPLES]
+        elif tools.query_dict(data, tools.KEY_AUDIO):
+            # Determine the number of samples in the track's audio
+            num_samples = len(data[tools.KEY_AUDIO])
         else:
-            # Load the track's ground-truth
-            data = self.load(track_id)
+            # Look up the number of samples in the audio index
+            num_samples = self.audio_index[track_id][tools.KEY_NUM_SAMPLES]
 
-        if tools.KEY_FEATS not in data.keys():
-            # Calculate the features and add to the dictionary
-            data.update(self.calculate_feats(data))
+        return num_samples
 
-        # Check to see if a specific sequence length was given
-        if seq_length is None:
-            # If not, and this Dataset object has a sequence length, use it
-            if self.seq_length is not None:
-                seq_length = self.seq_length
-            # Otherwise, we assume the whole track is desired and perform no further actions
+    def get_manifest_entry(self, data):
+        """
+        Describe a track using its full data.
+
+        Parameters
+        ----------
+        data : dict
+          Dictionary containing the full ground-truth (and possibly audio and features) for a track
+
+        Returns
+        ----------
+        entry : dict
+          Number of audio samples, frames, and notes in the track and the shape of its features
+        """
+
+        # Determine the number of samples in the track's audio
+        num_samples = self.get_num_samples(data)
+
+        if tools.query_dict(data, tools.KEY_TIMES):
+            # Count the number of frames
+            num_frames = len(data[tools.KEY_TIMES])
+        else:
+            # Determine the number of frames from a placeholder for the audio which takes up no memory
+            num_frames = self.data_proc.get_expected_frames(np.broadcast_to(np.float32(0), (num_samples,)))
+
+        # Default the number of notes to zero
+        num_notes = 0
+
+        if tools.query_dict(data, tools.KEY_NOTES):
+            if isinstance(data[tools.KEY_NOTES], dict):
+                # Count the notes across each slice of the stack
+                num_notes = sum([len(pitches) for pitches, _ in data[tools.KEY_NOTES].values()])
             else:
-                return data
+                # Count the batched notes
+                num_notes = len(data[tools.KEY_NOTES])
+
+        # Default the features shape to unknown (e.g. calculated on-the-fly or not a single array)
+        feats_shape = None
+
+        if isinstance(data.get(tools.KEY_FEATS, None), np.ndarray):
+            # Obtain the shape of the features
+            feats_shape = list(data[tools.KEY_FEATS].shape)
+
+        # Combine the descriptors using built-in types
+        entry = {tools.KEY_NUM_SAMPLES : int(num_samples),
+                 tools.KEY_NUM_FRAMES : int(num_frames),
+                 tools.KEY_NUM_NOTES : int(num_notes),
+                 tools.KEY_FEATS_SHAPE : feats_shape}
+
+        return entry
+
+    def get_track_num_samples(self, track):
+        """
+        Determine the number of audio samples in a track, without loading the
+        track unless its length cannot be read from the metadata of its audio.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        num_samples : int
+          Number of samples in the track's (resampled) audio
+        """
+
+        if track in self.manifest:
+            # Look up the number of samples in the manifest
+            num_samples = self.manifest[track][tools.KEY_NUM_SAMPLES]
+        elif track in self.audio_index:
+            # Look up the number of samples in the audio index
+            num_samples = self.audio_index[track][tools.KEY_NUM_SAMPLES]
+        else:
+            if track not in self.track_lengths:
+                try:
+                    # Read the number of samples and the sampling rate from the metadata of the audio
+                    info = sf.info(self.get_wav_path(track))
+                    # Determine the number of samples after resampling (see tools.resample_audio)
+                    num_samples = info.frames if self.sample_rate is None else \
+                                  int(np.ceil(info.frames * self.sample_rate / info.samplerate))
+                except (RuntimeError, OSError, TypeError):
+                    # The metadata cannot be read, so the track must be loaded (which also describes it)
+                    num_samples = self.get_num_samples(self.load_track_data(track, self.segment_audio))
+
+                # Keep track of the length
+                self.track_lengths[track] = num_samples
+
+            num_samples = self.track_lengths[track]
+
+        return num_samples
+
+    def get_crop_offsets(self):
+        """
+        Determine the index of the first crop of each track, where each track contributes
+        one crop (at least) per sequence length of audio, such that an iteration through
+        the dataset visits each track a number of times proportional to its duration.
+
+        Returns
+        ----------
+        offsets : ndarray (N + 1)
+          Index of the first crop of each track, followed by the total number of crops
+          N - number of tracks
+        """
+
+        # Identify the tracks and sequence length for which offsets were computed
+        key = (tuple(self.tracks), self.seq_length)
+
+        if getattr(self, '_crop_offsets', (None, None))[0] != key:
+            # Count the crops for each track using the lengths of the tracks
+            num_crops = [max(1, self.get_track_num_samples(track) // self.seq_length) for track in self.tracks]
+            # Accumulate the counts and keep track of the offsets
+            self._crop_offsets = (key, np.cumsum([0] + num_crops))
+
+        offsets = self._crop_offsets[1]
+
+        return offsets
+
+    def build_manifest(self):
+        """
+        Describe any tracks which are missing from the manifest, and save the manifest.
+        Tracks are otherwise described lazily, i.e. whenever they are loaded.
+        """
+
+        # Determine which tracks are missing from the manifest
+        tracks = [track for track in self.tracks if track not in self.manifest]
+
+        # Load each missing track once to describe it (features are not calculated if audio is segmented)
+        for track in tqdm(tracks):
+            self.load_track_data(track, self.segment_audio)
+
+        # Determine the entries which have already been saved
+        saved_manifest = self.load_manifest()
+
+        if any(track not in saved_manifest for track in self.tracks):
+            # Save the new entries (including those obtained while sampling)
+            self.save_manifest()
+
+    def get_track_weights(self):
+        """
+        Obtain a weight for each track proportional to its duration.
+
+        Returns
+        ----------
+        weights : ndarray (N)
+          Number of audio samples in each track
+          N - number of tracks
+        """
+
+        # Look up the number of samples in each track (without loading it if possible)
+        weights = np.array([self.get_track_num_samples(track) for track in self.tracks])
+
+        return weights
+
+    def get_sampler(self, num_samples=None):
+        """
+        Obtain a sampler which chooses tracks with probability proportional
+        to their duration, such that each second of audio is equally likely.
+
+        Parameters
+        ----------
+        num_samples : int or None (optional)
+          Number of tracks to sample per pass - defaults to the number of tracks
+
+        Returns
+        ----------
+        sampler : WeightedRandomSampler
+          Duration-weighted sampler for use with a DataLoader
+        """
+
+        # Default the number of samples to the number of tracks
+        if num_samples is None:
+            num_samples = len(self.tracks)
+
+        # Sample (with replacement) using the durations as weights
+        sampler = WeightedRandomSampler(self.get_track_weights().tolist(), num_samples)
+
+        return sampler
+
+    def slice_track_data(self, data, sample_start=None, seq_length=None, snap_to_frame=True):
+        """
+        Slice the full data for a track (see load_track_data) within a time interval. The
+        provided dictionary is not modified, such that it can be sliced repeatedly.
+
+        Parameters
+        ----------
+        data : dict
+          Dictionary containing the full ground-truth, audio, and features for a track
+        sample_start : int
+          Sample with which to begin the slice
+        seq_length : int
+          Number of samples to take for the slice
+        snap_to_frame : bool
+          Whether to begin exactly on frame boundaries or loose samples
+
+        Returns
+        ----------
+        data : dict
+          Dictionary with each entry sliced for the random or provided interval
+        """
+
+        # Copy the dictionary to avoid hard assignment (entries are replaced rather than modified)
+        data = copy(data)
+
+        # Obtain the name of the track
+        track_id = data[tools.KEY_TRACK]
+
+        # Remove the precomputed indexes (if any) for the notes and pitch list, which are only used for slicing
+        notes_index = data.pop(tools.KEY_NOTES_INDEX, None)
+        pitch_list_index = data.pop(tools.KEY_PITCHLIST_INDEX, None)
+
+        # Keep track of the full notes, from which dense ground-truth is rendered if it is lazy
+        # (notes clipped at the boundaries of the window would introduce spurious onsets/offsets)
+        notes = data.get(tools.KEY_NOTES, None)
+
+        # If a specific sequence length was not given, use that of the Dataset object (if any)
+        if seq_length is None:
+            seq_length = self.seq_length
+
+        # Check to see if there is a sequence length
+        if seq_length is None:
+            if tools.query_dict(data, tools.KEY_FEATS):
+                # Convert any stored features back to single-precision
+                data[tools.KEY_FEATS] = tools.dequantize_features(data[tools.KEY_FEATS])
+
+            if self.lazy_gt:
+                # Render the dense ground-truth for the entire track
+                data.update(self.render_ground_truth(notes, data[tools.KEY_TIMES], notes_index))
+
+            # We assume the whole track is desired and perform no further actions
+            return data
+
+        # Determine the number of samples in the track's audio
+        num_samples = self.get_num_samples(data)
 
         # If a specific starting sample was not provided, sample one randomly
         if sample_start is None:
-            sample_start = self.rng.randint(0, len(data[tools.KEY_AUDIO]) - seq_length)
+            sample_start = self.rng.randint(0, num_samples - seq_length)
 
         # Determine the frames contained in this slice
         frame_start = sample_start // self.hop_length
@@ -350,49 +904,113 @@ class TranscriptionDataset(Dataset):
         # Calculate the last sample included in the slice
         sample_end = sample_start + seq_length
 
-        # Slice the audio
-        data[tools.KEY_AUDIO] = data[tools.KEY_AUDIO][..., sample_start : sample_end]
+        if self.segment_audio:
+            # Determine how many frames on either side of the slice share audio samples with it
+            num_context_frames = self.data_proc.get_num_context_frames()
+            # Include enough audio on either side of the slice (beginning at a hop boundary), such that the
+            # features calculated for the slice match those of the full track (given a fixed decibel reference)
+            context_start = max(0, frame_start - num_context_frames) * self.hop_length
+            context_end = min(num_samples, sample_end + num_context_frames * self.hop_length)
+        else:
+            # No additional audio is needed
+            context_start, context_end = sample_start, sample_end
+
+        if tools.query_dict(data, tools.KEY_AUDIO):
+            # Slice the audio
+            audio = data[tools.KEY_AUDIO][..., context_start : context_end]
+        else:
+            # Decode only the audio within the slice (and its context)
+            audio, _ = self.load_audio(track_id, context_start, context_end - context_start)
+
+        # Remove the context from the audio
+        data[tools.KEY_AUDIO] = audio[..., sample_start - context_start : sample_end - context_start]
 
         # Determine the time in seconds of the boundary samples
         sec_start = sample_start / self.sample_rate
         sec_stop = sample_end / self.sample_rate
 
+        # Define list of entries to skip during slicing process
+        skipped_keys = [tools.KEY_AUDIO, tools.KEY_FS, tools.KEY_NOTES, tools.KEY_PITCHLIST]
+
+        if self.segment_audio:
+            # Determine which frame of the features with context corresponds to the first frame of the slice
+            offset = frame_start - context_start // self.hop_length
+            # Determine the number of frames spanned by the slice of audio
+            num_slice_frames = self.data_proc.get_expected_frames(data[tools.KEY_AUDIO])
+            # Calculate the features for the slice of audio and remove the frames computed only for context
+            data[tools.KEY_FEATS] = self.data_proc.process_audio(audio)[..., offset : offset + num_slice_frames]
+            # Determine the times of the frames w.r.t. the start of the track
+            data[tools.KEY_TIMES] = (self.data_proc.get_times(audio) +
+                                     context_start / self.sample_rate)[offset : offset + num_slice_frames]
+            # The features and times do not need to be sliced
+            skipped_keys += [tools.KEY_FEATS, tools.KEY_TIMES]
+
         if tools.query_dict(data, tools.KEY_NOTES):
             if isinstance(data[tools.KEY_NOTES], dict):
                 # TODO - assumes stack consists of standard note groups
-                # Extract the stacked notes and convert them to batched representations
-                temp_stacked_notes = tools.apply_func_stacked_representation(data[tools.KEY_NOTES],
-                                                                             tools.notes_to_batched_notes)
-                # Perform time slicing w.r.t. the batched notes along each slice of the stack
-                temp_stacked_notes = tools.apply_func_stacked_representation(temp_stacked_notes,
-                                                                             tools.slice_batched_notes,
-                                                                             start_time=sec_start,
-                                                                             stop_time=sec_stop)
-                # Convert back to standard note groups and update the dictionary
-                data[tools.KEY_NOTES] = tools.apply_func_stacked_representation(temp_stacked_notes,
-                                                                                tools.batched_notes_to_notes)
+                # Perform time slicing w.r.t. the notes along each slice of the stack
+                data[tools.KEY_NOTES] = {slc : tools.slice_notes(*data[tools.KEY_NOTES][slc], sec_start, sec_stop,
+                                                                 index=None if notes_index is None
+                                                                 else notes_index[slc])
+                                         for slc in data[tools.KEY_NOTES].keys()}
             else:
                 # Slice the ground-truth notes if they exist in the ground-truth
-                data[tools.KEY_NOTES] = tools.slice_batched_notes(data[tools.KEY_NOTES], sec_start, sec_stop)
+                data[tools.KEY_NOTES] = tools.slice_batched_notes(data[tools.KEY_NOTES], sec_start, sec_stop,
+                                                                  index=notes_index)
 
         if tools.query_dict(data, tools.KEY_PITCHLIST):
             if isinstance(data[tools.KEY_PITCHLIST], dict):
                 # Slice ground-truth pitch list by slice if exists in the ground-truth
-                data[tools.KEY_PITCHLIST] = tools.apply_func_stacked_representation(data[tools.KEY_PITCHLIST],
-                                                                                    tools.slice_pitch_list,
-                                                                                    start_time=sec_start,
-                                                                                    stop_time=sec_stop)
+                data[tools.KEY_PITCHLIST] = {slc : tools.slice_pitch_list(*data[tools.KEY_PITCHLIST][slc],
+                                                                          sec_start, sec_stop,
+                                                                          index=None if pitch_list_index is None
+                                                                          else pitch_list_index[slc])
+                                             for slc in data[tools.KEY_PITCHLIST].keys()}
             else:
                 # Slice ground-truth pitch list if exists in the ground-truth
-                data[tools.KEY_PITCHLIST] = tools.slice_pitch_list(*data[tools.KEY_PITCHLIST], sec_start, sec_stop)
+                data[tools.KEY_PITCHLIST] = tools.slice_pitch_list(*data[tools.KEY_PITCHLIST], sec_start, sec_stop,
+                                                                   index=pitch_list_index)
 
-        # Define list of entries to skip during slicing process
-        skipped_keys = [tools.KEY_AUDIO, tools.KEY_FS, tools.KEY_NOTES, tools.KEY_PITCHLIST]
-        # Slice the remaining dictionary entries
-        data = tools.slice_track(data, frame_start, frame_end, skipped_keys)
+        # Slice the remaining dictionary entries (views are taken, since entries are replaced rather than modified)
+        data = tools.slice_track(data, frame_start, frame_end, skipped_keys, deep=False)
+
+        if tools.query_dict(data, tools.KEY_FEATS):
+            # Convert the slice of any stored features back to single-precision
+            data[tools.KEY_FEATS] = tools.dequantize_features(data[tools.KEY_FEATS])
+
+        if self.lazy_gt:
+            # Render the dense ground-truth for only the frames within the slice
+            data.update(self.render_ground_truth(notes, data[tools.KEY_TIMES], notes_index))
 
         return data
 
+    def render_ground_truth(self, notes, times, index=None):
+        """
+        Render dense frame-level ground-truth from symbolic ground-truth
+        for a set of frames (only applicable with lazy_gt=True).
+
+        This is the default behavior (nothing is rendered). It can be overridden.
+
+        Parameters
+        ----------
+        notes : ndarray (N x 3) or dict or None
+          Full (batched or stacked) notes of a track
+        times : ndarray (T)
+          Time in seconds of the frames for which to render ground-truth
+          T - number of frames
+        index : ndarray (2 x N) or dict or None (optional)
+          Precomputed index for the notes (see tools.index_notes)
+
+        Returns
+        ----------
+        ground_truth : dict
+          Dictionary containing the rendered ground-truth
+        """
+
+        ground_truth = {}
+
+        return ground_truth
+
     @abstractmethod
     def get_tracks(self, split):
         """
@@ -432,29 +1050,327 @@ class TranscriptionDataset(Dataset):
         # Check if an entry for the data exists
         if self.save_data and os.path.exists(gt_path):
             # Load and unpack the data
-            data = tools.load_dict_npz(gt_path)
+            data = self.load_cached_data(gt_path)
 
             # Make sure there is agreement between dataset and saved data
             if self.sample_rate != data[tools.KEY_FS].item():
                 warnings.warn('Loaded track\'s sampling rate differs from expected.', category=RuntimeWarning)
 
+            if self.segment_audio and tools.query_dict(data, tools.KEY_AUDIO):
+                # Do not keep full tracks of audio saved with the ground-truth
+                data.pop(tools.KEY_AUDIO)
+            elif not self.segment_audio and not tools.query_dict(data, tools.KEY_AUDIO):
+                # Load the audio, which was not saved with the ground-truth (segment_audio=True)
+                data[tools.KEY_AUDIO], _ = self.load_audio(track)
+
         if data is None:
             # Initialize a new dictionary if there is no saved data
             data = {}
         else:
-            if tools.query_dict(data, tools.KEY_NOTES) and data[tools.KEY_NOTES].dtype == object:
+            for key in [tools.KEY_NOTES, tools.KEY_PITCHLIST, tools.KEY_NOTES_INDEX, tools.KEY_PITCHLIST_INDEX]:
+                if tools.query_dict(data, key) and data[key].dtype == object and data[key].ndim == 0:
+                    # Unwrap any dictionaries which were saved directly (e.g. stacked notes kept for lazy_gt)
+                    data[key] = data[key].item()
+            if tools.query_dict(data, tools.KEY_NOTES) and getattr(data[tools.KEY_NOTES], 'dtype', None) == object:
                 # Unpack the (stacked) notes (which will be in save-friendly format)
                 data[tools.KEY_NOTES] = tools.unpack_stacked_representation(data[tools.KEY_NOTES])
-            if tools.query_dict(data, tools.KEY_PITCHLIST) and data[tools.KEY_PITCHLIST].dtype == object:
+            if tools.query_dict(data, tools.KEY_PITCHLIST) and getattr(data[tools.KEY_PITCHLIST], 'dtype', None) == object:
                 # TODO - assumes pitch list with type object is always a stacked representation
                 # Unpack the (stacked) pitch list (which will be in save-friendly format)
                 data[tools.KEY_PITCHLIST] = tools.unpack_stacked_representation(data[tools.KEY_PITCHLIST])
+            for key in [tools.KEY_NOTES_INDEX, tools.KEY_PITCHLIST_INDEX]:
+                if tools.query_dict(data, key) and getattr(data[key], 'dtype', None) == object:
+                    # Unpack the index of the stacked notes or pitch list (which will be in save-friendly format)
+                    data[key] = tools.unpack_stacked_representation(data[key])
 
         # Add the track ID to the dictionary
         data[tools.KEY_TRACK] = track
 
         return data
 
+    @staticmethod
+    def index_ground_truth(data):
+        """
+        Add precomputed indexes for the (stacked) notes and pitch list of a track, such
+        that sampled windows of the ground-truth can be obtained through binary search.
+
+        Parameters
+        ----------
+        data : dict
+          Dictionary with ground-truth for the track
+
+        Returns
+        ----------
+        data : dict
+          Dictionary with ground-truth for the track, including any indexes
+        """
+
+        if tools.query_dict(data, tools.KEY_NOTES):
+            if isinstance(data[tools.KEY_NOTES], dict):
+                # Construct an index for each slice of the stacked notes
+                data[tools.KEY_NOTES_INDEX] = tools.apply_func_stacked_representation(data[tools.KEY_NOTES],
+                                                                                      tools.index_notes,
+                                                                                      deep=False)
+            else:
+                # Construct an index for the batched notes
+                data[tools.KEY_NOTES_INDEX] = tools.index_batched_notes(data[tools.KEY_NOTES])
+
+        if tools.query_dict(data, tools.KEY_PITCHLIST):
+            if isinstance(data[tools.KEY_PITCHLIST], dict):
+                # Construct an index for each slice of the stacked pitch list
+                data[tools.KEY_PITCHLIST_INDEX] = tools.apply_func_stacked_representation(data[tools.KEY_PITCHLIST],
+                                                                                          tools.index_pitch_list,
+                                                                                          deep=False)
+            else:
+                # Construct an index for the pitch list
+                data[tools.KEY_PITCHLIST_INDEX] = tools.index_pitch_list(*data[tools.KEY_PITCHLIST])
+
+        return data
+
+    def load_audio(self, track, sample_start=None, num_samples=None):
+        """
+        Load and normalize the audio for a track, or only for a segment of the track.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to load
+        sample_start : int or None (optional)
+          Sample with which to begin the segment - None to load the full track
+        num_samples : int or None (optional)
+          Number of samples to take for the segment
+
+        Returns
+        ----------
+        audio : ndarray (N)
+          Mono-channel audio for the track or segment
+          N - number of samples in audio
+        fs : int
+          Audio sampling rate
+        """
+
+        # Construct the path to the track's audio
+        wav_path = self.get_wav_path(track)
+
+        if sample_start is None:
+            # Load the audio along with the sampling rate (normalization performed below)
+            audio, fs = tools.load_normalize_audio(wav_path, fs=self.sample_rate, norm=None,
+                                                   res_type=self.res_type,
+                                                   cache_dir=self.get_audio_cache_dir())
+
+            # Determine the normalization factor for the track and normalize the audio
+            scale = tools.get_normalization_scale(audio, self.audio_norm)
+            audio = audio / scale
+
+            if self.segment_audio:
+                # Add an entry for the track to the audio index
+                self.audio_index[track] = {tools.KEY_NUM_SAMPLES : len(audio),
+                                           tools.KEY_SCALE : scale}
+        else:
+            # Look up the normalization factor for the full track
+            scale = self.audio_index[track][tools.KEY_SCALE]
+
+            # Decode and normalize only the audio within the segment
+            audio = tools.load_audio_segment(wav_path, sample_start, num_samples,
+                                             fs=self.sample_rate, scale=scale,
+                                             res_type=self.res_type,
+                                             cache_dir=self.get_audio_cache_dir())
+            fs = self.sample_rate
+
+        return audio, fs
+
+    def index_audio(self):
+        """
+        Compute the audio index entry for any tracks which have not yet been indexed, and save the index.
+        """
+
+        # Determine which tracks are missing from the audio index
+        tracks = [track for track in self.tracks if track not in self.audio_index]
+
+        # Decode each missing track once to index its audio
+        for track in tqdm(tracks):
+            self.load_audio(track)
+
+        # Determine the entries which have already been saved
+        saved_index = self.load_audio_index()
+
+        if any(track not in saved_index for track in self.tracks):
+            # Save the new entries (including those computed while generating ground-truth)
+            self.save_audio_index()
+
+    def get_audio_index_path(self):
+        """
+        Get the path to the audio index for the dataset.
+
+        Returns
+        ----------
+        path : string
+          Path to the audio index
+        """
+
+        # Construct the path to the audio index alongside the ground-truth directory
+        path = os.path.join(self.save_loc, self.dataset_name(), f'{tools.AUDIO_INDEX_NAME}.{tools.JSON_EXT}')
+
+        return path
+
+    def load_audio_index(self):
+        """
+        Load the saved audio index entries, if they were computed under the same settings.
+
+        Returns
+        ----------
+        audio_index : dict
+          Dictionary with the number of samples and normalization factor for each indexed track
+        """
+
+        # Only use the entries if they were computed with the same sampling rate and normalization
+        audio_index = self.load_track_index(self.get_audio_index_path(), {tools.KEY_FS : self.sample_rate,
+                                                                           'audio_norm' : self.audio_norm})
+
+        return audio_index
+
+    def save_audio_index(self):
+        """
+        Save the audio index entries, merged with those already saved for other tracks.
+        """
+
+        # Save the entries along with the settings under which they were computed
+        self.save_track_index(self.get_audio_index_path(), {tools.KEY_FS : self.sample_rate,
+                                                            'audio_norm' : self.audio_norm}, self.audio_index)
+
+    def get_manifest_path(self):
+        """
+        Get the path to the manifest for the dataset, which is kept alongside the features.
+
+        Returns
+        ----------
+        path : string
+          Path to the manifest
+        """
+
+        # Construct the path to the manifest within the features directory
+        path = os.path.join(self.get_feats_dir(), f'{tools.MANIFEST_NAME}.{tools.JSON_EXT}')
+
+        return path
+
+    def load_manifest(self):
+        """
+        Load the saved manifest entries, if they were computed under the same settings.
+
+        Returns
+        ----------
+        manifest : dict
+          Dictionary with the number of samples, frames, and notes and the features shape for each track
+        """
+
+        # Only use the entries if they were computed with the same sampling rate and hop length
+        manifest = self.load_track_index(self.get_manifest_path(), {tools.KEY_FS : self.sample_rate,
+                                                                     tools.KEY_HOP : self.hop_length})
+
+        return manifest
+
+    def save_manifest(self):
+        """
+        Save the manifest entries, merged with those already saved for other tracks.
+        """
+
+        # Save the entries along with the settings under which they were computed
+        self.save_track_index(self.get_manifest_path(), {tools.KEY_FS : self.sample_rate,
+                                                         tools.KEY_HOP : self.hop_length}, self.manifest)
+
+    def load_track_index(self, path, settings):
+        """
+        Load saved per-track entries (e.g. audio index or manifest), if they were computed under the same settings.
+
+        Parameters
+        ----------
+        path : string
+          Path to the saved entries
+        settings : dict
+          Settings under which the entries should have been computed
+
+        Returns
+        ----------
+        entries : dict
+          Dictionary with the saved entry for each track
+        """
+
+        # Default the entries to empty
+        entries = {}
+
+        if self.save_data and not self.reset_data and os.path.exists(path):
+            with open(path) as index_file:
+                # Read the saved entries
+                saved_index = json.load(index_file)
+
+            # Only use the entries if they were computed with the same settings
+            if all([saved_index.get(key, None) == value for key, value in settings.items()]):
+                entries = saved_index['tracks']
+
+        return entries
+
+    def save_track_index(self, path, settings, entries):
+        """
+        Save per-track entries (e.g. audio index or manifest), merged with those already saved for other tracks.
+
+        Parameters
+        ----------
+        path : string
+          Path under which to save the entries
+        settings : dict
+          Settings under which the entries were computed
+        entries : dict
+          Dictionary with an entry for each track
+        """
+
+        if not self.save_data:
+            # The entries are only kept in RAM
+            return
+
+        # Create the directory if it doesn't exist
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Make sure no other partition (e.g. within a DatasetCombo) rewrites the entries in between
+        with get_track_index_lock(path):
+            # Merge with the entries saved by other partitions of the dataset
+            merged_entries = self.load_track_index(path, settings)
+            merged_entries.update(entries)
+
+            # Write the entries (atomically) along with the settings under which they were computed
+            tools.save_json(path, {**settings, 'tracks' : merged_entries})
+
+    @abstractmethod
+    def get_wav_path(self, track):
+        """
+        Get the path to the audio of a track.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+        """
+
+        return NotImplementedError
+
+    def get_audio_cache_dir(self):
+        """
+        Get the directory under which to cache resampled audio.
+
+        Returns
+        ----------
+        path : string or None
+          Path to the audio cache directory, or None if audio is not being cached
+        """
+
+        # Default the cache directory to nothing
+        path = None
+
+        if self.cache_audio:
+            # Cache the audio alongside the ground-truth
+            path = os.path.join(self.save_loc, self.dataset_name(), tools.AUDIO_CACHE_DIR)
+
+        return path
+
     def get_gt_dir(self, track=None):
         """
         Get the path for the ground-truth directory or a track's ground-truth.
@@ -470,12 +1386,13 @@ class TranscriptionDataset(Dataset):
           Path to the ground-truth directory or a specific track's ground-truth
         """
 
-        # Get the path to the ground truth directory
-        path = os.path.join(self.save_loc, self.dataset_name(), tools.GROUND_TRUTH_DIR)
+        # Get the path to the ground truth directory (symbolic ground-truth is kept separate)
+        path = os.path.join(self.save_loc, self.dataset_name(),
+                            tools.SYMBOLIC_GROUND_TRUTH_DIR if self.lazy_gt else tools.GROUND_TRUTH_DIR)
 
-        # Add the track name and the .npz extension if a track was provided
+        # Add the track name (and the cache extension) if a track was provided
         if track is not None:
-            path = os.path.join(path, f'{track}.{tools.NPZ_EXT}')
+            path = os.path.join(path, self.get_cache_name(track))
 
         return path
 
@@ -494,15 +1411,89 @@ class TranscriptionDataset(Dataset):
           Path to the features directory or a specific track's features
         """
 
-        # Get the path to the features directory
-        path = os.path.join(self.save_loc, self.dataset_name(), self.data_proc.features_name())
+        # Get the path to the features directory (one for each distinct configuration of the feature module)
+        path = os.path.join(self.save_loc, self.dataset_name(), self.data_proc.features_tag())
 
-        # Add the track name and the .npz extension if a track was provided
+        if self.feats_dtype is not None:
+            # Keep features stored in different types separate
+            path = f'{path}_{np.dtype(self.feats_dtype).name}'
+
+        # Add the track name (and the cache extension) if a track was provided
         if track is not None:
-            path = os.path.join(path, f'{track}.{tools.NPZ_EXT}')
+            path = os.path.join(path, self.get_cache_name(track))
 
         return path
 
+    def get_cache_name(self, track):
+        """
+        Get the name of the file or directory holding the saved data for a track.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+
+        Returns
+        ----------
+        name : string
+          Track name with the .npz extension or, for memory-mapped data, the bare track name (directory)
+        """
+
+        if self.mmap_data:
+            # Arrays are saved within a directory named after the track
+            name = track
+        else:
+            # Add the .npz extension to the track name
+            name = f'{track}.{tools.NPZ_EXT}'
+
+        return name
+
+    def save_cached_data(self, path, data):
+        """
+        Save the ground-truth or features for a track in the chosen format.
+
+        Parameters
+        ----------
+        path : string
+          Path to the track's ground-truth or features
+        data : dict
+          Dictionary of entries to save
+        """
+
+        # Create the (sub-directory) path if it doesn't exist
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if self.mmap_data:
+            # Save the data as a directory of raw NumPy arrays
+            tools.save_dict_npy(path, data)
+        else:
+            # Save the data as a NumPy zip file
+            tools.save_dict_npz(path, data)
+
+    def load_cached_data(self, path):
+        """
+        Load the ground-truth or features for a track saved in the chosen format.
+
+        Parameters
+        ----------
+        path : string
+          Path to the track's ground-truth or features
+
+        Returns
+        ----------
+        data : dict
+          Dictionary of saved entries (memory-mapped arrays if mmap_data=True)
+        """
+
+        if self.mmap_data:
+            # Memory-map the raw NumPy arrays
+            data = tools.load_dict_npy(path)
+        else:
+            # Load and decompress the NumPy zip file
+            data = tools.load_dict_npz(path)
+
+        return data
+
     @staticmethod
     @abstractmethod
     def available_splits():
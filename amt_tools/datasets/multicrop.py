@@ -0,0 +1,138 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from .. import tools
+
+# Regular imports
+from torch.utils.data import IterableDataset, get_worker_info
+
+import numpy as np
+
+
+class MultiCropDataset(IterableDataset):
+    """
+    Implements an iterable wrapper for a transcription dataset, which loads each track
+    once and yields several crops from it, interleaving the crops of different tracks
+    through a shuffle buffer. Tracks are divided among DataLoader workers, such that
+    each track is loaded by exactly one worker during each pass through the dataset.
+    """
+
+    def __init__(self, dataset, num_crops=8, tiled=False, buffer_size=64, seed=0):
+        """
+        Initialize the wrapper around an existing dataset.
+
+        Parameters
+        ----------
+        dataset : TranscriptionDataset
+          Dataset (partition) from which to sample crops (num_frames must not be None)
+        num_crops : int or None
+          Number of crops to take from each track - None for one crop per sequence length
+          of audio (all possible consecutive crops if tiled, otherwise as many random crops)
+        tiled : bool
+          Whether to take consecutive non-overlapping crops (from a random offset) instead of random crops
+        buffer_size : int
+          Number of crops from which to randomly choose the next crop to yield
+        seed : int
+          The seed for random number generation outside of DataLoader workers
+        """
+
+        assert dataset.seq_length is not None, 'Crops can only be taken from datasets with num_frames specified'
+
+        self.dataset = dataset
+        self.num_crops = num_crops
+        self.tiled = tiled
+        self.buffer_size = buffer_size
+        self.seed = seed
+
+    def __iter__(self):
+        """
+        Iterate through the crops for the tracks assigned to this process.
+
+        Returns
+        ----------
+        crops : generator of dict
+          Dictionaries containing the features and ground-truth data for each crop
+        """
+
+        # Obtain information about the DataLoader worker (None within the main process)
+        worker_info = get_worker_info()
+
+        if worker_info is None:
+            # All tracks are assigned to the main process
+            tracks = self.dataset.tracks
+            # Advance the seed after each pass so the crops change across epochs
+            rng = np.random.RandomState(self.seed)
+            self.seed += 1
+        else:
+            # Divide the tracks evenly among the workers
+            tracks = self.dataset.tracks[worker_info.id :: worker_info.num_workers]
+            # PyTorch chooses a unique seed for each worker during each epoch
+            rng = np.random.RandomState(worker_info.seed % 2 ** 32)
+
+        # Initialize a buffer to hold the crops
+        buffer = []
+
+        # Loop through the assigned tracks in a random order
+        for track in rng.permutation(tracks):
+            # Loop through the crops taken from the track
+            for crop in self.get_crops(track, rng):
+                if len(buffer) < self.buffer_size:
+                    # Keep filling the buffer
+                    buffer.append(crop)
+                else:
+                    # Choose a random crop from the buffer
+                    idx = rng.randint(len(buffer))
+                    # Replace the chosen crop with the new crop and yield the chosen crop
+                    buffer[idx], crop = crop, buffer[idx]
+                    yield crop
+
+        # Yield the remaining crops in a random order
+        for idx in rng.permutation(len(buffer)):
+            yield buffer[idx]
+
+    def get_crops(self, track, rng):
+        """
+        Load a track and take several crops from it.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track from which to take crops
+        rng : RandomState
+          Random number generator to use for choosing crops
+
+        Returns
+        ----------
+        crops : list of dict
+          Dictionaries containing the features and ground-truth data for each crop
+        """
+
+        # Obtain the track's full ground-truth (features are calculated per crop if audio is segmented)
+        data = self.dataset.load_track_data(track, self.dataset.segment_audio)
+
+        if not tools.query_dict(data, tools.KEY_AUDIO):
+            # Decode the full track of audio once instead of once per crop
+            data[tools.KEY_AUDIO], _ = self.dataset.load_audio(track)
+
+        # Determine how many samples are in the track and in each crop
+        num_samples = self.dataset.get_num_samples(data)
+        seq_length = self.dataset.seq_length
+
+        if self.tiled:
+            # Begin at a random offset, which still allows for as many consecutive crops as fit within the track
+            offset = rng.randint(num_samples % seq_length + 1) if num_samples >= seq_length else 0
+            # Take consecutive crops from the offset (at least one, which is padded if the track is too short)
+            sample_starts = np.arange(offset, max(1, num_samples - seq_length + 1), seq_length)
+            # Limit the number of crops
+            sample_starts = sample_starts[:self.num_crops]
+        else:
+            # Default to as many random crops as would fit consecutively (at least one)
+            num_crops = max(1, num_samples // seq_length) if self.num_crops is None else self.num_crops
+            # Take crops beginning at random positions
+            sample_starts = rng.randint(0, max(1, num_samples - seq_length), size=num_crops)
+
+        # Slice the track at each position and prepare the crops for batching
+        crops = [self.dataset.format_sample(self.dataset.slice_track_data(data, sample_start))
+                 for sample_start in sample_starts]
+
+        return crops
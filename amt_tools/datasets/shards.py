@@ -0,0 +1,394 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from .common import TranscriptionDataset
+from .. import tools
+
+# Regular imports
+from functools import partial
+from tqdm import tqdm
+
+import numpy as np
+import pickle
+import json
+import os
+
+# Boundary at which each array within a shard begins, such that it can be viewed in place
+SHARD_ALIGNMENT = 64 # bytes
+
+
+def export_shards(dataset, save_dir, shard_size=2**30):
+    """
+    Pack the ground-truth, audio, features, and times for all tracks within a dataset
+    partition into a small number of large binary files (shards), along with a JSON
+    index of the location of each entry, such that they can be read sequentially.
+
+    Parameters
+    ----------
+    dataset : TranscriptionDataset
+      Dataset (partition) to export
+    save_dir : string
+      Directory under which to save the shards and index
+    shard_size : int
+      Number of bytes after which to begin a new shard (each track is contained within a single shard)
+    """
+
+    # Make sure the directory for saving the shards exists
+    os.makedirs(save_dir, exist_ok=True)
+
+    # Construct the path to the index
+    index_path = os.path.join(save_dir, f'{tools.SIDECAR_NAME}.{tools.JSON_EXT}')
+
+    if os.path.exists(index_path):
+        # Remove any index from a previous export, which would refer to shards that are about to be overwritten
+        os.remove(index_path)
+
+    # Initialize a dictionary to hold the location of each track's entries
+    tracks = {}
+
+    # Keep track of the current shard
+    shard_idx, shard_file = -1, None
+
+    for track in tqdm(dataset.tracks):
+        if shard_file is None or shard_file.tell() >= shard_size:
+            if shard_file is not None:
+                # Finish writing the current shard
+                shard_file.close()
+
+            # Begin writing a new shard
+            shard_idx += 1
+            shard_file = open(os.path.join(save_dir, get_shard_name(shard_idx)), 'wb')
+
+        # Obtain the full ground-truth, audio, and features for the track
+        data = dataset.load_track_data(track)
+
+        if dataset.lazy_gt:
+            # Render the dense ground-truth for all frames, since it is not rendered when reading shards
+            data.update(dataset.render_ground_truth(data.get(tools.KEY_NOTES),
+                                                    data[tools.KEY_TIMES],
+                                                    data.get(tools.KEY_NOTES_INDEX)))
+
+        # Keep track of where the track begins within the shard
+        track_offset = shard_file.tell()
+
+        # Initialize a dictionary to hold the location of each entry
+        entries = {}
+
+        for key, value in data.items():
+            if key == tools.KEY_TRACK:
+                # The track name is used to look up the entries
+                continue
+
+            if value is None or (np.ndim(value) == 0 and np.asarray(value).dtype != object):
+                # Store scalars within the index directly
+                entries[key] = {'value' : None if value is None else np.asarray(value).item()}
+            elif isinstance(value, np.ndarray) and value.dtype != object:
+                # Pad the shard such that the array begins at an aligned position
+                shard_file.write(bytes(-shard_file.tell() % SHARD_ALIGNMENT))
+                # Keep track of the array's location and format
+                entries[key] = {'offset' : shard_file.tell(),
+                                'dtype' : value.dtype.str,
+                                'shape' : list(value.shape)}
+                # Write the raw array contents
+                shard_file.write(np.ascontiguousarray(value).tobytes())
+            else:
+                # Serialize any other entries (e.g. stacked representations)
+                value = pickle.dumps(value)
+                # Keep track of the serialized entry's location
+                entries[key] = {'offset' : shard_file.tell(),
+                                'num_bytes' : len(value),
+                                'pickled' : True}
+                # Write the serialized entry
+                shard_file.write(value)
+
+        # Add the location of the track and its entries to the index
+        tracks[track] = {'shard' : shard_idx,
+                         'offset' : track_offset,
+                         'num_bytes' : shard_file.tell() - track_offset,
+                         'entries' : entries}
+
+    if shard_file is not None:
+        # Finish writing the final shard
+        shard_file.close()
+
+    # Determine which of the exported tracks belong to each split
+    splits = {split : [t for t in dataset.get_tracks(split) if t in tracks] for split in dataset.splits}
+
+    # Write the index along with the hyper-parameters of the exported data, only after all
+    # shards are complete and atomically, such that an interrupted export leaves no index
+    tools.save_json(index_path, {tools.KEY_FS : dataset.sample_rate,
+                                 tools.KEY_HOP : dataset.hop_length,
+                                 'splits' : splits,
+                                 'tracks' : tracks})
+
+
+def get_shard_name(shard_idx):
+    """
+    Get the file name of a shard.
+
+    Parameters
+    ----------
+    shard_idx : int
+      Index of the shard
+
+    Returns
+    ----------
+    name : string
+      File name of the shard
+    """
+
+    # Add the shard index and binary extension
+    name = f'{tools.SHARD_NAME}-{shard_idx:05d}.{tools.BIN_EXT}'
+
+    return name
+
+
+class ShardedDataset(TranscriptionDataset):
+    """
+    Implements a transcription dataset which reads tracks from shards written by export_shards.
+    """
+
+    def __init__(self, base_dir, splits=None, hop_length=None, sample_rate=None, data_proc=None,
+                 profile=None, num_frames=None, seed=0, mmap_data=False):
+        """
+        Initialize the dataset from an exported set of shards.
+
+        Parameters
+        ----------
+        base_dir : string
+          Path to the directory containing the shards and index
+        hop_length : int or None (optional)
+          Number of samples between frames - defaults to that of the exported data
+        sample_rate : int or float or None (optional)
+          Number of samples per second of audio - defaults to that of the exported data
+        data_proc : FeatureModel (features/common.py)
+          Feature extraction model which was used for the exported dataset
+        mmap_data : bool
+          Flag to memory-map the shards, such that only the sampled portion of each track is read
+          from disk, instead of reading each track's contiguous block of the shard all at once
+        See TranscriptionDataset class for others...
+        """
+
+        # Read the index of the exported data
+        self.index = self.load_index(base_dir)
+
+        # Default the hyper-parameters to those of the exported data
+        if hop_length is None:
+            hop_length = self.index[tools.KEY_HOP]
+        if sample_rate is None:
+            sample_rate = self.index[tools.KEY_FS]
+
+        # Bind the exported partitions to the instance, such that they can be queried without arguments
+        self.available_splits = partial(ShardedDataset.available_splits, base_dir)
+
+        # Initialize a dictionary to hold the memory-mapped shards
+        self.shards = {}
+
+        # Ground-truth and features already exist within the shards, so nothing is stored or saved
+        super().__init__(base_dir, splits, hop_length, sample_rate, data_proc, profile, num_frames,
+                         None, False, False, False, False, None, seed, mmap_data)
+
+    def __getstate__(self):
+        """
+        Drop any memory-mapped shards when the dataset is pickled (e.g. for DataLoader workers).
+
+        Returns
+        ----------
+        state : dict
+          Attributes of the dataset
+        """
+
+        # Copy the attributes of the dataset without the memory-mapped shards
+        state = self.__dict__.copy()
+        state['shards'] = {}
+
+        return state
+
+    @staticmethod
+    def load_index(base_dir):
+        """
+        Read the index of an exported set of shards.
+
+        Parameters
+        ----------
+        base_dir : string
+          Path to the directory containing the shards and index
+
+        Returns
+        ----------
+        index : dict
+          Hyper-parameters, splits, and location of the entries for each track
+        """
+
+        # Construct the path to the index
+        index_path = os.path.join(base_dir, f'{tools.SIDECAR_NAME}.{tools.JSON_EXT}')
+
+        assert os.path.exists(index_path), f'Could not find shard index at \'{index_path}\'' + \
+                                           '. Shards must be created with export_shards.'
+
+        with open(index_path) as index_file:
+            # Read the index
+            index = json.load(index_file)
+
+        return index
+
+    def get_tracks(self, split):
+        """
+        Get the tracks associated with a dataset partition.
+
+        Parameters
+        ----------
+        split : string
+          Name of the partition from which to fetch tracks
+
+        Returns
+        ----------
+        tracks : list of strings
+          Names of tracks within the given partition
+        """
+
+        tracks = self.index['splits'][split]
+
+        return tracks
+
+    def get_shard(self, shard_idx):
+        """
+        Memory-map a shard, if it has not yet been memory-mapped.
+
+        Parameters
+        ----------
+        shard_idx : int
+          Index of the shard
+
+        Returns
+        ----------
+        shard : memmap
+          Bytes of the shard
+        """
+
+        if shard_idx not in self.shards:
+            # Memory-map the shard as raw bytes
+            self.shards[shard_idx] = np.memmap(os.path.join(self.base_dir, get_shard_name(shard_idx)),
+                                               dtype=np.uint8, mode='r')
+
+        shard = self.shards[shard_idx]
+
+        return shard
+
+    def load(self, track):
+        """
+        Read the ground-truth, audio, features, and times for a track from its shard.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track to load
+
+        Returns
+        ----------
+        data : dict
+          Dictionary with all exported entries for the track
+        """
+
+        # Look up the location of the track
+        location = self.index['tracks'][track]
+
+        if self.mmap_data:
+            # View the track's entries directly from the memory-mapped shard
+            buffer, buffer_offset = self.get_shard(location['shard']), 0
+        else:
+            with open(os.path.join(self.base_dir, get_shard_name(location['shard'])), 'rb') as shard_file:
+                # Read the track's contiguous block of the shard all at once
+                shard_file.seek(location['offset'])
+                buffer = bytearray(shard_file.read(location['num_bytes']))
+            # Entries are located relative to the beginning of the track
+            buffer_offset = location['offset']
+
+        # Initialize a dictionary to hold the entries
+        data = {}
+
+        for key, entry in location['entries'].items():
+            if 'value' in entry:
+                # Scalars are wrapped as arrays, which is how they would be loaded from a NumPy zip file
+                data[key] = np.array(entry['value'])
+            elif entry.get('pickled', False):
+                # Deserialize the entry
+                start = entry['offset'] - buffer_offset
+                data[key] = pickle.loads(buffer[start : start + entry['num_bytes']])
+            else:
+                # View the raw array contents in place
+                dtype = np.dtype(entry['dtype'])
+                data[key] = np.frombuffer(buffer, dtype=dtype,
+                                          count=int(np.prod(entry['shape'])),
+                                          offset=entry['offset'] - buffer_offset).reshape(entry['shape'])
+
+        # Add the track ID to the dictionary
+        data[tools.KEY_TRACK] = track
+
+        return data
+
+    def get_track_num_samples(self, track):
+        """
+        Determine the number of audio samples in a track from the shape of its exported audio.
+
+        Parameters
+        ----------
+        See TranscriptionDataset class...
+        """
+
+        # Look up the location of the track's audio
+        entry = self.index['tracks'][track]['entries'].get(tools.KEY_AUDIO, {})
+
+        if 'shape' in entry:
+            # The number of samples is the length of the exported audio
+            num_samples = entry['shape'][-1]
+        else:
+            # Fall back to the manifest or loading the track
+            num_samples = super().get_track_num_samples(track)
+
+        return num_samples
+
+    def get_wav_path(self, track):
+        """
+        Audio is read from the shards rather than from audio files.
+
+        Parameters
+        ----------
+        track : string
+          Name of the track
+        """
+
+        return NotImplementedError
+
+    @staticmethod
+    def available_splits(base_dir):
+        """
+        Get the exported partitions of a set of shards.
+
+        Parameters
+        ----------
+        base_dir : string
+          Path to the directory containing the shards and index
+
+        Returns
+        ----------
+        splits : list of strings
+          Names of the exported splits
+        """
+
+        splits = list(ShardedDataset.load_index(base_dir)['splits'].keys())
+
+        return splits
+
+    @staticmethod
+    def download(save_dir):
+        """
+        Shards cannot be downloaded - they must be created from an existing dataset.
+
+        Parameters
+        ----------
+        save_dir : string
+          Directory under which the shards should exist
+        """
+
+        assert False, 'Shards must be created with export_shards'
@@ -21,8 +21,9 @@ HVQT()
 """
 
 from .combo import FeatureCombo
-from .common import FeatureModule
+from .common import FeatureModule, IntermediateCache
 from .cqt import CQT
+from .frontend import TorchSTFT, TorchMelSpec
 from .hcqt import HCQT
 from .hvqt import HVQT
 from .mel import MelSpec
@@ -1,21 +1,92 @@
 # Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
 
 # My imports
-from .common import FeatureModule
+from .common import FeatureModule, IntermediateCache
 
 # Regular imports
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import threading
 
 # TODO - redundant saving - maybe it should be a function of feature extraction module and not dataset
 # TODO - concatenate (feature dimension) option
 #      - if not selected, try to concat on channel dimension or put in list if not possible
 
+# Thread pools shared by all feature combinations, keyed by the number of threads
+THREAD_POOLS = {}
+# Lock to use when creating thread pools
+THREAD_POOLS_LOCK = threading.Lock()
+# Per-thread flag indicating whether the thread is evaluating a module on behalf of a pool
+POOL_WORKER = threading.local()
+
+
+def get_thread_pool(num_threads):
+    """
+    Obtain a (reusable) pool of threads, creating it if it does not yet exist.
+
+    Parameters
+    ----------
+    num_threads : int
+      Number of threads in the pool
+
+    Returns
+    ----------
+    pool : ThreadPoolExecutor
+      Pool of threads
+    """
+
+    with THREAD_POOLS_LOCK:
+        if num_threads not in THREAD_POOLS:
+            # Create a new pool of threads
+            THREAD_POOLS[num_threads] = ThreadPoolExecutor(max_workers=num_threads)
+
+        pool = THREAD_POOLS[num_threads]
+
+    return pool
+
+
+def process_module_pooled(module, audio, cache):
+    """
+    Get the features for a piece of audio from within a pool of threads, such that
+    any nested combinations evaluate their modules within the same thread, rather
+    than waiting on work submitted to a (shared) pool which may be fully occupied.
+
+    Parameters
+    ----------
+    module : FeatureModule
+      Feature extraction module to evaluate
+    audio : ndarray
+      Mono-channel audio, or a batch of signals of equal length (B x N)
+    cache : IntermediateCache
+      Intermediate results to share with other modules processing the same audio
+
+    Returns
+    ----------
+    feats : ndarray
+      Post-processed features
+    """
+
+    # Keep track of whether the thread was already marked (e.g. if the pool is bypassed)
+    was_worker = getattr(POOL_WORKER, 'active', False)
+
+    # Mark the thread as a pool worker while the module is evaluated
+    POOL_WORKER.active = True
+
+    try:
+        feats = module.process_audio(audio, cache)
+    finally:
+        # Restore the previous state of the thread
+        POOL_WORKER.active = was_worker
+
+    return feats
+
 
 class FeatureCombo(FeatureModule):
     """
     Implements a wrapper for a combination of multiple feature extraction modules.
     """
-    def __init__(self, modules):
+    def __init__(self, modules, num_threads=0):
         """
         Initialize parameters for the feature combination.
 
@@ -23,10 +94,17 @@ class FeatureCombo(FeatureModule):
         ----------
         modules : list of FeatureModules
           Post-initialization feature extraction modules
+        num_threads : int
+          Number of threads (in a pool shared across combinations) with which to evaluate
+          the modules concurrently - 0 to evaluate them sequentially within the calling thread
+          (combinations nested within a combination evaluated by a pool are always sequential)
         """
 
         self.modules = modules
 
+        # Keep track of the number of threads privately, since it does not affect the features
+        self._num_threads = num_threads
+
     def get_expected_frames(self, audio):
         """
         Determine the number of frames we expect from provided audio.
@@ -54,6 +132,21 @@ class FeatureCombo(FeatureModule):
 
         return num_frames
 
+    def get_num_context_frames(self):
+        """
+        Determine how many frames on either side of a frame can share audio samples with it.
+
+        Returns
+        ----------
+        num_context_frames : int
+          Number of frames of overlap on either side
+        """
+
+        # Take the largest amount of context among the inner modules
+        num_context_frames = max([module.get_num_context_frames() for module in self.modules])
+
+        return num_context_frames
+
     def get_sample_range(self, num_frames):
         """
         Determine the range of audio samples which will produce features
@@ -83,14 +176,16 @@ class FeatureCombo(FeatureModule):
 
         return sample_range
 
-    def process_audio(self, audio):
+    def process_audio(self, audio, cache=None):
         """
         Get the features for a piece of audio.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
 
         Returns
         ----------
@@ -100,10 +195,21 @@ class FeatureCombo(FeatureModule):
 
         # TODO - more sophisticated stacking/padding may be required - not if I return a list and let user figure it out
 
+        if cache is None:
+            # Share common intermediate results (e.g. a single STFT) across the inner modules
+            cache = IntermediateCache()
+
+        if getattr(self, '_num_threads', 0) and not getattr(POOL_WORKER, 'active', False):
+            # Evaluate the inner modules concurrently (the order of the features is preserved)
+            all_feats = list(get_thread_pool(self._num_threads).map(lambda m: process_module_pooled(m, audio, cache),
+                                                                     self.modules))
+        else:
+            # Evaluate the inner modules one after another
+            all_feats = [module.process_audio(audio, cache) for module in self.modules]
+
         feats = []
         # Gather features from inner modules
-        for module in self.modules:
-            mod_feats = module.process_audio(audio)
+        for mod_feats in all_feats:
             # Add to the list if fixed features were calculated
             if mod_feats is not None:
                 feats += [mod_feats]
@@ -117,7 +223,7 @@ class FeatureCombo(FeatureModule):
             # Stack the features along the channel dimension
             # TODO - this will break if dimensionality mismatch
             # TODO - I should just return the list if I can't concatenate
-            feats = np.concatenate(feats, axis=0)
+            feats = np.concatenate(feats, axis=-3)
 
         return feats
 
@@ -189,6 +295,42 @@ class FeatureCombo(FeatureModule):
 
         return hop_length
 
+    def reset_db_reference(self):
+        """
+        Reset the running maximum used as a decibel reference for each inner module.
+        """
+
+        for module in self.modules:
+            module.reset_db_reference()
+
+    def query_unit_range(self):
+        """
+        Determine whether the features of every inner module lie between 0 and 1.
+
+        Returns
+        ----------
+        unit_range : bool
+          Flag indicating the features lie between 0 and 1
+        """
+
+        unit_range = all([module.query_unit_range() for module in self.modules])
+
+        return unit_range
+
+    def query_fixed_reference(self):
+        """
+        Determine whether every inner module uses a decibel reference which does not depend on the signal.
+
+        Returns
+        ----------
+        fixed_reference : bool
+          Flag indicating no decibel reference depends on the signal
+        """
+
+        fixed_reference = all([module.query_fixed_reference() for module in self.modules])
+
+        return fixed_reference
+
     def get_num_channels(self):
         """
         Sum number of feature channels from inner modules.
@@ -5,19 +5,71 @@ from .. import tools
 
 # Regular imports
 from abc import abstractmethod
+from hashlib import md5
 
 import numpy as np
+import threading
 import librosa
+import json
 
 # TODO - take squared modulus of some of these?
 
 
+class IntermediateCache(object):
+    """
+    Implements a thread-safe store of intermediate results (e.g. STFTs) computed for
+    a single piece of audio, such that they can be shared across feature modules.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty store.
+        """
+
+        # Initialize dictionaries to hold the results and a lock for each result
+        self.entries = {}
+        self.locks = {}
+
+        # Lock to use when adding new locks
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """
+        Obtain an intermediate result, computing it only if it does not yet exist.
+
+        Parameters
+        ----------
+        key : tuple
+          Description of the intermediate result, including all parameters it depends on
+        compute : function
+          Function (without arguments) which computes the intermediate result
+
+        Returns
+        ----------
+        value : object
+          Intermediate result
+        """
+
+        with self.lock:
+            # Obtain the lock for the result, adding it if necessary
+            lock = self.locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key not in self.entries:
+                # Compute the result (other threads requesting it will wait)
+                self.entries[key] = compute()
+
+        value = self.entries[key]
+
+        return value
+
+
 class FeatureModule(object):
     """
     Implements a generic music feature extraction module wrapper.
     """
 
-    def __init__(self, sample_rate, hop_length, num_channels, decibels=True):
+    def __init__(self, sample_rate, hop_length, num_channels, decibels=True, db_ref='max', dtype=tools.FLOAT32):
         """
         Initialize parameters common to all feature extraction modules.
 
@@ -31,6 +83,14 @@ class FeatureModule(object):
           Number of independent feature channels
         decibels : bool
           Convert features to decibel (dB) units
+        db_ref : string or float
+          Reference for decibel conversion, i.e. the feature value mapped to 0 dB
+            'max' - maximum of each signal (features depend on the entire signal)
+            'running' - maximum of all audio processed since the last reset (see reset_db_reference)
+            float - fixed reference (features can be computed in chunks or streamed exactly,
+                    and any features above the reference saturate at 0 dB)
+        dtype : string or type
+          Data type of the features (computed in single-precision unless double-precision is chosen)
         """
 
         self.sample_rate = sample_rate
@@ -38,6 +98,40 @@ class FeatureModule(object):
         self.num_channels = num_channels
         self.decibels = decibels
 
+        assert db_ref in ['max', 'running'] or isinstance(db_ref, (int, float)), \
+            f'Unsupported decibel reference \'{db_ref}\''
+        self.db_ref = db_ref
+
+        # Initialize the running maximum for decibel conversion
+        self.reset_db_reference()
+
+        self.dtype = dtype
+
+    def prepare_audio(self, audio):
+        """
+        Convert audio to the precision with which features are computed, which is
+        single-precision unless double-precision features are requested, such
+        that librosa does not silently compute everything in double-precision.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+
+        Returns
+        ----------
+        audio : ndarray
+          Audio in the computation precision (not copied if already so)
+        """
+
+        # Determine the computation precision
+        dtype = tools.FLOAT64 if np.dtype(self.dtype) == np.float64 else tools.FLOAT32
+
+        # Convert the audio only if necessary
+        audio = np.asarray(audio, dtype=dtype)
+
+        return audio
+
     def get_expected_frames(self, audio):
         """
         Determine the number of frames the module will return
@@ -61,7 +155,7 @@ class FeatureModule(object):
 
         if audio.shape[-1] != 0:
             # Simply the number of hops plus one
-            num_frames = 1 + len(audio) // self.hop_length
+            num_frames = 1 + audio.shape[-1] // self.hop_length
 
         return num_frames
 
@@ -111,6 +205,114 @@ class FeatureModule(object):
 
         return num_samples_required
 
+    def get_num_context_frames(self):
+        """
+        Determine how many frames on either side of a frame can share audio samples with
+        it, i.e. the overlap (in frames) required between blocks of audio such that features
+        computed for each block match those computed for the full signal.
+
+        This is the default behavior. It can be overridden.
+
+        Returns
+        ----------
+        num_context_frames : int
+          Number of frames of overlap on either side
+        """
+
+        # Number of hops spanned by the samples required for one frame, plus one to be safe
+        num_context_frames = int(np.ceil(self.get_num_samples_required() / self.get_hop_length())) + 1
+
+        return num_context_frames
+
+    def process_chunks(self, audio, num_frames=1000):
+        """
+        Get features for a (very long) piece of audio in blocks of frames, such that
+        the memory required is proportional to the block size instead of the signal
+        length. Each block is computed from the audio spanning its frames along with
+        enough overlap (see get_num_context_frames), such that the concatenation of
+        the blocks equals the features for the full signal.
+
+        Note that decibel features must use a fixed reference (see db_ref) to match,
+        and that VQT-based features only match within numerical precision, since the
+        resampled audio depends slightly on where the signal begins and ends.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio, which can be memory-mapped (only the samples for each block are read)
+        num_frames : int
+          Number of frames in each block
+
+        Returns
+        ----------
+        feats : generator of ndarray
+          Post-processed features for each consecutive block of frames
+        """
+
+        # Determine the total number of frames and the amount of overlap between blocks
+        total_frames = self.get_expected_frames(audio)
+        num_context_frames = self.get_num_context_frames()
+        hop_length = self.get_hop_length()
+
+        for start in range(0, total_frames, num_frames):
+            # Determine the final frame of the block
+            stop = min(start + num_frames, total_frames)
+
+            # Determine the samples spanned by the block's frames and their context (beginning at a hop boundary)
+            sample_start = max(0, start - num_context_frames) * hop_length
+            sample_stop = min(audio.shape[-1], (stop + num_context_frames) * hop_length)
+
+            # Compute the features for the block (reading only the relevant samples)
+            feats = self.process_audio(np.asarray(audio[..., sample_start : sample_stop]))
+
+            # Determine which frame of the block corresponds to the first frame to keep
+            offset = start - sample_start // hop_length
+
+            # Remove the frames computed only for context
+            yield feats[..., offset : offset + stop - start]
+
+    def save_chunks(self, audio, path, num_frames=1000):
+        """
+        Compute features for a (very long) piece of audio in blocks of frames and write
+        them directly to a NumPy file, such that the full features are never held in RAM.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio, which can be memory-mapped (only the samples for each block are read)
+        path : string
+          Path to the NumPy (.npy) file to write
+        num_frames : int
+          Number of frames in each block
+
+        Returns
+        ----------
+        feats : memmap
+          Post-processed features for the full signal (memory-mapped from the written file)
+        """
+
+        # Determine the total number of frames
+        total_frames = self.get_expected_frames(audio)
+
+        # Initialize the file once the shape and type of the features are known
+        feats, start = None, 0
+
+        for block in self.process_chunks(audio, num_frames):
+            if feats is None:
+                # Create a memory-mapped NumPy file to hold the features for the full signal
+                feats = np.lib.format.open_memmap(path, mode='w+', dtype=block.dtype,
+                                                  shape=block.shape[:-1] + (total_frames,))
+
+            # Write the block of features to the file
+            feats[..., start : start + block.shape[-1]] = block
+            start += block.shape[-1]
+
+        if feats is not None:
+            # Make sure all features are written to disk
+            feats.flush()
+
+        return feats
+
     @staticmethod
     def divisor_pad(audio, divisor):
         """
@@ -119,7 +321,7 @@ class FeatureModule(object):
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio (or a batch of signals along leading dimensions)
         divisor : int
           Number by which the amount of audio samples should be divisible
 
@@ -133,8 +335,8 @@ class FeatureModule(object):
         pad_amt = divisor - (audio.shape[-1] % divisor)
 
         if pad_amt > 0 and pad_amt != divisor:
-            # Pad the audio for divisibility
-            audio = np.append(audio, np.zeros(pad_amt).astype(tools.FLOAT32), axis=-1)
+            # Pad the audio (along the sample axis only) for divisibility
+            audio = np.pad(audio, [(0, 0)] * (audio.ndim - 1) + [(0, pad_amt)], mode='constant')
 
         return audio
 
@@ -166,18 +368,79 @@ class FeatureModule(object):
         return audio
 
     @abstractmethod
-    def process_audio(self, audio):
+    def process_audio(self, audio, cache=None):
         """
         Get features for a piece of audio.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
         """
 
         return NotImplementedError
 
+    def process_batch(self, audio, pad=False):
+        """
+        Get features for several pieces of audio, processing signals of equal
+        length together such that setup (e.g. filter construction) is shared.
+
+        Parameters
+        ----------
+        audio : list of ndarray or ndarray (B x N)
+          Mono-channel audio signals
+          B - number of signals
+          N - number of samples (may differ across a list)
+        pad : bool
+          Whether to zero-pad ragged signals to a common length and process them all
+          together, instead of processing each group of equal-length signals separately
+          (features near the end of padded signals may differ slightly, e.g. due to the
+          decibel reference or filter support extending into the padding)
+
+        Returns
+        ----------
+        feats : list of ndarray
+          Post-processed features for each signal
+        """
+
+        if isinstance(audio, np.ndarray) and audio.ndim == 2:
+            # Signals of equal length can all be processed at once
+            return list(self.process_audio(audio))
+
+        # Initialize a list to hold the features of each signal
+        feats = [None] * len(audio)
+
+        # Determine the length of each signal
+        lengths = [signal.shape[-1] for signal in audio]
+
+        if pad:
+            # Place all signals into a single group of the longest length
+            groups = {max(lengths) : list(range(len(audio)))} if len(audio) else {}
+        else:
+            # Group the signals by length
+            groups = {}
+            for idx, length in enumerate(lengths):
+                groups[length] = groups.get(length, []) + [idx]
+
+        for length, idcs in groups.items():
+            # Stack the signals of the group, padding them to the same length if necessary
+            batch = np.stack([np.pad(audio[i], (0, length - lengths[i]), mode='constant') for i in idcs])
+
+            # Compute the features for the whole group at once
+            batch_feats = self.process_audio(batch)
+
+            for i, signal_feats in zip(idcs, batch_feats):
+                if lengths[i] != length:
+                    # Remove any frames which belong only to the padding
+                    signal_feats = signal_feats[..., :self.get_expected_frames(audio[i])]
+
+                # Add the features for the signal
+                feats[i] = signal_feats
+
+        return feats
+
     def to_decibels(self, feats):
         """
         Convert features to decibels (dB) units.
@@ -196,10 +459,99 @@ class FeatureModule(object):
         """
 
         # Simply use the appropriate librosa function
-        feats = librosa.core.amplitude_to_db(feats, ref=np.max)
+        feats = self.scale_decibels(feats, librosa.core.amplitude_to_db)
 
         return feats
 
+    def scale_decibels(self, feats, convert, num_axes=2):
+        """
+        Convert features to decibels (dB) with respect to the chosen reference.
+
+        Parameters
+        ----------
+        feats : ndarray
+          Calculated features (for one signal or a batch of signals)
+        convert : function
+          Conversion function (librosa.amplitude_to_db or librosa.power_to_db)
+        num_axes : int
+          Number of trailing axes spanned by the features of a single signal
+
+        Returns
+        ----------
+        feats : ndarray
+          Calculated features in decibels
+        """
+
+        if self.db_ref == 'max':
+            # Use the maximum of each signal as the reference, limiting the range relative to the maximum
+            feats = convert(feats, ref=lambda f: self.max_reference(f, num_axes))
+        else:
+            # Convert the features with respect to the fixed or running reference
+            feats = convert(feats, ref=self.get_db_reference(feats), top_db=None)
+            # Limit the range to 80 dB below the reference, such that it does not depend on the
+            # signal, and saturate anything above the reference, such that post_proc scales the
+            # features between 0 and 1 (as with the maximum of each signal as the reference)
+            feats = np.clip(feats, -80.0, 0.0)
+
+        return feats
+
+    def get_db_reference(self, feats):
+        """
+        Obtain the fixed or running reference for decibel conversion.
+
+        Parameters
+        ----------
+        feats : ndarray
+          Calculated features (for one signal or a batch of signals)
+
+        Returns
+        ----------
+        ref : float
+          Reference for decibel conversion
+        """
+
+        if self.db_ref == 'running':
+            if feats.size:
+                # Update the running maximum with the new features
+                self._running_ref = max(self._running_ref, float(np.max(feats)))
+            ref = self._running_ref
+        else:
+            # Use the fixed reference
+            ref = self.db_ref
+
+        return ref
+
+    def reset_db_reference(self):
+        """
+        Reset the running maximum used as a decibel reference (e.g. before streaming a new signal).
+        """
+
+        self._running_ref = 0.
+
+    @staticmethod
+    def max_reference(feats, num_axes=2):
+        """
+        Obtain the maximum value of the features for each signal, which
+        can be used as the reference for decibel conversion within a batch.
+
+        Parameters
+        ----------
+        feats : ndarray
+          Calculated features for one or more signals
+        num_axes : int
+          Number of trailing axes spanned by the features of a single signal
+
+        Returns
+        ----------
+        ref : ndarray
+          Maximum value for each signal, with singleton trailing axes
+        """
+
+        # Take the maximum across the trailing axes
+        ref = np.max(feats, axis=tuple(range(-num_axes, 0)), keepdims=True)
+
+        return ref
+
     def post_proc(self, feats):
         """
         Perform post-processing steps.
@@ -207,7 +559,7 @@ class FeatureModule(object):
         Parameters
         ----------
         feats : ndarray
-          Calculated features
+          Calculated features (for one signal or a batch of signals)
 
         Returns
         ----------
@@ -220,15 +572,51 @@ class FeatureModule(object):
             feats = self.to_decibels(feats)
 
             # TODO - make additional variable for 0/1 scaling
-            # Assuming range of -80 to 0 dB, scale between 0 and 1
-            feats = feats / 80
-            feats = feats + 1
+            # Assuming range of -80 to 0 dB, scale between 0 and 1 (in-place, since the array is new)
+            feats /= 80
+            feats += 1
+
+        # Add a channel dimension (after any batch dimensions)
+        feats = np.expand_dims(feats, axis=-3)
 
-        # Add a channel dimension
-        feats = np.expand_dims(feats, axis=0)
+        # Convert to the chosen data type (without copying if already so)
+        feats = feats.astype(self.dtype, copy=False)
 
         return feats
 
+    def query_unit_range(self):
+        """
+        Determine whether the features are guaranteed to lie between 0 and 1
+        (e.g. such that they can be stored as uint8 by tools.quantize_features).
+
+        Returns
+        ----------
+        unit_range : bool
+          Flag indicating the features lie between 0 and 1
+        """
+
+        # Decibels (limited to 80 dB below the reference and saturated above it) are scaled between 0 and 1 by post_proc
+        unit_range = self.decibels
+
+        return unit_range
+
+    def query_fixed_reference(self):
+        """
+        Determine whether each frame of the features is independent of the rest of the
+        signal with regard to decibel conversion, such that features computed for a
+        segment of audio (with context) match those computed for the full signal.
+
+        Returns
+        ----------
+        fixed_reference : bool
+          Flag indicating the decibel reference (if any) does not depend on the signal
+        """
+
+        # The maximum of each signal and the running maximum both depend on the audio processed
+        fixed_reference = not self.decibels or self.db_ref not in ['max', 'running']
+
+        return fixed_reference
+
     def get_times(self, audio):
         """
         Determine the time, in seconds, associated with each frame.
@@ -319,3 +707,85 @@ class FeatureModule(object):
         """
 
         return cls.__name__
+
+    def get_config(self):
+        """
+        Obtain the full configuration of the module, i.e. the class name and the value
+        of every public attribute, where nested modules are described recursively.
+
+        Returns
+        ----------
+        config : dict
+          JSON-serializable description of the module
+        """
+
+        def serialize(value):
+            """
+            Convert an attribute into a JSON-serializable representation.
+            """
+
+            if isinstance(value, FeatureModule):
+                # Describe nested modules recursively
+                value = value.get_config()
+            elif isinstance(value, dict):
+                # Serialize each entry of the dictionary
+                value = {str(k) : serialize(v) for k, v in value.items()}
+            elif isinstance(value, (list, tuple, np.ndarray)):
+                # Serialize each element of the collection
+                value = [serialize(v) for v in value]
+            elif isinstance(value, np.generic):
+                # Convert NumPy scalars to built-in types
+                value = value.item()
+            elif callable(value):
+                # Describe functions (e.g. windows) by name
+                value = getattr(value, '__name__', repr(value))
+            elif not isinstance(value, (str, int, float, bool, type(None))):
+                # Fall back to the printable representation
+                value = repr(value)
+
+            return value
+
+        # Begin with the name of the module
+        config = {'name' : self.features_name()}
+
+        # Add all public attributes (private attributes, e.g. caches, do not affect the features)
+        config.update({key : serialize(value) for key, value in vars(self).items() if not key.startswith('_')})
+
+        return config
+
+    def get_config_hash(self, length=8):
+        """
+        Compute a stable hash of the full configuration of the module.
+
+        Parameters
+        ----------
+        length : int
+          Number of hexadecimal characters to keep
+
+        Returns
+        ----------
+        config_hash : str
+          Hash of the configuration
+        """
+
+        # Serialize the configuration deterministically
+        config = json.dumps(self.get_config(), sort_keys=True)
+
+        # Hash the serialized configuration
+        config_hash = md5(config.encode()).hexdigest()[:length]
+
+        return config_hash
+
+    def features_tag(self):
+        """
+        Retrieve a tag which uniquely identifies the features computed by the module.
+
+        Returns
+        ----------
+        tag : str
+          Name of the module followed by the hash of its configuration
+        """
+
+        tag = f'{self.features_name()}_{self.get_config_hash()}'
+
+        return tag
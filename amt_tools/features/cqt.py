@@ -2,6 +2,7 @@
 
 # My imports
 from .vqt import VQT
+from .. import tools
 
 
 class CQT(VQT):
@@ -10,7 +11,8 @@ class CQT(VQT):
     which is a special case of the Variable-Q Transform.
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
-                 fmin=None, n_bins=84, bins_per_octave=12):
+                 fmin=None, n_bins=84, bins_per_octave=12, db_ref='max',
+                 dtype=tools.FLOAT32):
         """
         Initialize parameters for the CQT.
 
@@ -19,4 +21,4 @@ class CQT(VQT):
         See VQT class...
         """
 
-        super().__init__(sample_rate, hop_length, decibels, fmin, n_bins, bins_per_octave, gamma=0)
+        super().__init__(sample_rate, hop_length, decibels, fmin, n_bins, bins_per_octave, gamma=0, db_ref=db_ref, dtype=dtype)
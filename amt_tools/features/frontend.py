@@ -0,0 +1,305 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# Regular imports
+from torch import nn
+
+import torch.nn.functional as F
+import numpy as np
+import librosa
+import torch
+
+
+class TorchSTFT(nn.Module):
+    """
+    Implements a PyTorch counterpart to the STFT feature extraction module, which
+    computes the same (post-processed) features from batches of audio within the
+    model, e.g. as part of TranscriptionModel.frontend.
+    """
+    def __init__(self, module):
+        """
+        Initialize the PyTorch Spectrogram.
+
+        Parameters
+        ----------
+        module : STFT
+          Feature extraction module to replicate, which defines all hyper-parameters
+        """
+
+        nn.Module.__init__(self)
+
+        assert module.db_ref != 'running', 'Running decibel references are not supported within the model'
+
+        # Keep the feature extraction module for hyper-parameters and frame-level calculations
+        self.module = module
+
+        # Obtain the same (periodic) Hann window used by librosa
+        window = librosa.filters.get_window('hann', self.module.win_length, fftbins=True)
+        # Register the window such that it follows the model across devices (but is not saved)
+        self.register_buffer('window', torch.from_numpy(window.astype(np.float32)), persistent=False)
+
+    def frame_pad(self, audio):
+        """
+        Pad the audio to fill out the final frame (see FeatureModule.frame_pad).
+
+        Parameters
+        ----------
+        audio : Tensor (... x N)
+          Audio signals
+          N - number of samples
+
+        Returns
+        ----------
+        audio : Tensor (... x N')
+          Padded audio
+          N' - number of samples after padding
+        """
+
+        # We need at least this many samples
+        divisor = self.module.get_num_samples_required()
+
+        if audio.shape[-1] > divisor:
+            # If above is satisfied, just pad for one extra hop
+            divisor = self.module.hop_length
+
+        # Determine how many samples would be needed such that the audio is evenly divisible
+        pad_amt = divisor - (audio.shape[-1] % divisor)
+
+        if pad_amt > 0 and pad_amt != divisor:
+            # Pad the audio for divisibility
+            audio = F.pad(audio, (0, pad_amt))
+
+        return audio
+
+    def magnitude(self, audio):
+        """
+        Compute the magnitude spectrogram for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x N)
+          Audio signals
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        spec : Tensor (B x F x T)
+          Magnitude spectrogram
+          F - number of frequency bins
+          T - number of frames
+        """
+
+        if not self.module.center:
+            # Pad the audio to fill in a final frame
+            audio = self.frame_pad(audio)
+
+        # Calculate the spectrogram (padding with zeros, as in librosa)
+        spec = torch.stft(audio,
+                          n_fft=self.module.n_fft,
+                          hop_length=self.module.hop_length,
+                          win_length=self.module.win_length,
+                          window=self.window,
+                          center=self.module.center,
+                          pad_mode='constant',
+                          return_complex=True)
+        # Take the magnitude of the spectrogram
+        spec = spec.abs()
+
+        return spec
+
+    def transform(self, audio):
+        """
+        Compute the features (prior to post-processing) for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x N)
+          Audio signals
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated amplitude features
+          F - dimensionality of features
+          T - number of frames
+        """
+
+        feats = self.magnitude(audio)
+
+        return feats
+
+    def to_decibels(self, feats):
+        """
+        Convert amplitude features to decibels (dB), as in librosa.amplitude_to_db.
+
+        Parameters
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated amplitude features
+
+        Returns
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated features in decibels
+        """
+
+        # Same defaults as librosa
+        feats = self.scale_decibels(feats, 20.0, 1e-5)
+
+        return feats
+
+    def scale_decibels(self, feats, multiplier, amin):
+        """
+        Convert features to decibels (dB) with respect to the
+        reference chosen for the module (see FeatureModule.scale_decibels).
+
+        Parameters
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated features
+        multiplier : float
+          Decibels per decade (20 for amplitude, 10 for power)
+        amin : float
+          Minimum value of the features and the reference
+
+        Returns
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated features in decibels
+        """
+
+        if self.module.db_ref == 'max':
+            # Determine the reference for each signal
+            ref = feats.amax(dim=(-2, -1), keepdim=True)
+        else:
+            # Use the fixed reference
+            ref = feats.new_tensor(self.module.db_ref)
+
+        # Convert to decibels relative to the reference
+        feats = multiplier * torch.log10(feats.clamp(min=amin)) - multiplier * torch.log10(ref.clamp(min=amin))
+
+        if self.module.db_ref == 'max':
+            # Threshold the decibels 80 dB below the peak of each signal
+            feats = torch.maximum(feats, feats.amax(dim=(-2, -1), keepdim=True) - 80.0)
+        else:
+            # Threshold the decibels 80 dB below the reference and saturate them above it
+            feats = feats.clamp(min=-80.0, max=0.0)
+
+        return feats
+
+    def forward(self, audio):
+        """
+        Get the post-processed features for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (... x N)
+          Audio signals, e.g. (B x 1 x N) within TranscriptionModel.pre_proc
+          N - number of samples
+
+        Returns
+        ----------
+        feats : Tensor (... x F x T)
+          Post-processed features, e.g. (B x 1 x F x T) within TranscriptionModel.pre_proc
+          F - dimensionality of features
+          T - number of frames
+        """
+
+        # Keep track of any leading dimensions
+        leading_dims, num_samples = audio.shape[:-1], audio.shape[-1]
+
+        if num_samples == 0:
+            # Handle case of empty audio array
+            return audio.new_zeros(leading_dims + (self.module.get_feature_size(), 0))
+
+        # Collapse the leading dimensions into a single batch dimension
+        audio = audio.reshape(-1, num_samples)
+
+        # Compute the features for the batch
+        feats = self.transform(audio)
+
+        if self.module.decibels:
+            # Convert to decibels (dB)
+            feats = self.to_decibels(feats)
+
+            # Assuming range of -80 to 0 dB, scale between 0 and 1
+            feats = feats / 80 + 1
+
+        # Restore the leading dimensions
+        feats = feats.reshape(leading_dims + feats.shape[-2:])
+
+        return feats
+
+
+class TorchMelSpec(TorchSTFT):
+    """
+    Implements a PyTorch counterpart to the MelSpec feature extraction module.
+    """
+    def __init__(self, module):
+        """
+        Initialize the PyTorch Mel Spectrogram.
+
+        Parameters
+        ----------
+        module : MelSpec
+          Feature extraction module to replicate, which defines all hyper-parameters
+        """
+
+        super().__init__(module)
+
+        # Obtain the same Mel filterbank used by librosa
+        mel_basis = librosa.filters.mel(sr=self.module.sample_rate,
+                                        n_fft=self.module.n_fft,
+                                        n_mels=self.module.n_mels,
+                                        htk=self.module.htk)
+        # Register the filterbank such that it follows the model across devices (but is not saved)
+        self.register_buffer('mel_basis', torch.from_numpy(mel_basis.astype(np.float32)), persistent=False)
+
+    def transform(self, audio):
+        """
+        Compute the Mel power spectrogram for a batch of audio.
+
+        Parameters
+        ----------
+        audio : Tensor (B x N)
+          Audio signals
+          B - batch size
+          N - number of samples
+
+        Returns
+        ----------
+        feats : Tensor (B x F x T)
+          Mel power spectrogram
+          F - number of Mel bins
+          T - number of frames
+        """
+
+        # Compute the power spectrogram
+        power = self.magnitude(audio) ** 2
+
+        # Apply the Mel filterbank
+        feats = torch.matmul(self.mel_basis, power)
+
+        return feats
+
+    def to_decibels(self, feats):
+        """
+        Convert power features to decibels (dB), as in librosa.power_to_db.
+
+        Parameters
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated power features
+
+        Returns
+        ----------
+        feats : Tensor (B x F x T)
+          Calculated features in decibels
+        """
+
+        # Same defaults as librosa
+        feats = self.scale_decibels(feats, 10.0, 1e-10)
+
+        return feats
@@ -2,6 +2,7 @@
 
 # My imports
 from .hvqt import HVQT
+from .. import tools
 
 
 class HCQT(HVQT):
@@ -9,7 +10,8 @@ class HCQT(HVQT):
     A simple wrapper (for convenience) for a Harmonic Constant-Q Transform,
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
-                 fmin=None, harmonics=None, n_bins=84, bins_per_octave=12):
+                 fmin=None, harmonics=None, n_bins=84, bins_per_octave=12, db_ref='max',
+                 dtype=tools.FLOAT32):
         """
         Initialize parameters for the HCQT.
 
@@ -18,4 +20,5 @@ class HCQT(HVQT):
         See HVQT class...
         """
 
-        super().__init__(sample_rate, hop_length, decibels, fmin, harmonics, n_bins, bins_per_octave, gamma=0)
+        super().__init__(sample_rate, hop_length, decibels, fmin, harmonics, n_bins, bins_per_octave, gamma=0,
+                         db_ref=db_ref, dtype=dtype)
@@ -1,8 +1,9 @@
 # Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
 
 # My imports
-from .common import FeatureModule
+from .common import FeatureModule, IntermediateCache
 from .vqt import VQT
+from .. import tools
 
 # Regular imports
 import numpy as np
@@ -15,7 +16,7 @@ class HVQT(FeatureModule):
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
                  fmin=None, harmonics=None, n_bins=84, bins_per_octave=12,
-                 gamma=None):
+                 gamma=None, db_ref='max', dtype=tools.FLOAT32):
         """
         Initialize parameters for the HVQT.
 
@@ -40,7 +41,7 @@ class HVQT(FeatureModule):
         harmonics.sort()
         self.harmonics = harmonics
 
-        super().__init__(sample_rate, hop_length, len(self.harmonics), decibels)
+        super().__init__(sample_rate, hop_length, len(self.harmonics), decibels, db_ref, dtype)
 
         modules = []
         # Construct a list of VQT modules for the harmonic transform
@@ -54,7 +55,9 @@ class HVQT(FeatureModule):
                             fmin=fmin_h,
                             n_bins=n_bins,
                             bins_per_octave=bins_per_octave,
-                            gamma=gamma)]
+                            gamma=gamma,
+                            db_ref=db_ref,
+                            dtype=dtype)]
         self.modules = modules
 
     def get_expected_frames(self, audio):
@@ -82,6 +85,21 @@ class HVQT(FeatureModule):
 
         return num_frames
 
+    def get_num_context_frames(self):
+        """
+        Determine how many frames on either side of a frame can share audio samples with it.
+
+        Returns
+        ----------
+        num_context_frames : int
+          Number of frames of overlap on either side
+        """
+
+        # Take the largest amount of context among the harmonics
+        num_context_frames = max([module.get_num_context_frames() for module in self.modules])
+
+        return num_context_frames
+
     def get_sample_range(self, num_frames):
         """
         Determine the range of audio samples which will produce
@@ -104,14 +122,16 @@ class HVQT(FeatureModule):
 
         return sample_range
 
-    def process_audio(self, audio):
+    def process_audio(self, audio, cache=None):
         """
         Get the VQT features stacked across harmonics for a piece of audio.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
 
         Returns
         ----------
@@ -122,13 +142,20 @@ class HVQT(FeatureModule):
         # Determine the frame cutoff (highest harmonic's output)
         num_frames = self.get_expected_frames(audio)
 
+        if cache is None:
+            # Share the downsampled audio and STFTs across harmonics wherever they coincide
+            cache = IntermediateCache()
+
+        # Convert the audio to the computation precision once for all harmonics
+        audio = self.prepare_audio(audio)
+
         feats = []
         # Take the VQT at each harmonic
         for module in self.modules:
-            feats += [module.process_audio(audio)[..., :num_frames]]
+            feats += [module.process_audio(audio, cache)[..., :num_frames]]
 
-        # Stack the features along the
-        feats = np.concatenate(feats, axis=0)
+        # Stack the features along the channel dimension
+        feats = np.concatenate(feats, axis=-3)
 
         return feats
 
@@ -145,6 +172,17 @@ class HVQT(FeatureModule):
 
         return NotImplementedError
 
+    def reset_db_reference(self):
+        """
+        Reset the running maximum used as a decibel reference for each harmonic.
+        """
+
+        super().reset_db_reference()
+
+        # The harmonic modules do not exist during initialization
+        for module in getattr(self, 'modules', []):
+            module.reset_db_reference()
+
     def get_times(self, audio, at_start=False):
         """
         Determine the time, in seconds, associated with each frame.
@@ -2,6 +2,7 @@
 
 # My imports
 from .stft import STFT
+from .. import tools
 
 # Regular imports
 import numpy as np
@@ -14,7 +15,7 @@ class MelSpec(STFT):
     """
     def __init__(self, sample_rate=16000, hop_length=512, decibels=True,
                  n_mels=229, n_fft=2048, win_length=None, center=True,
-                 htk=False):
+                 htk=False, db_ref='max', dtype=tools.FLOAT32):
         """
         Initialize parameters for the Mel Spectrogram.
 
@@ -32,19 +33,23 @@ class MelSpec(STFT):
                          decibels=decibels,
                          win_length=win_length,
                          center=center,
-                         n_fft=n_fft)
+                         n_fft=n_fft,
+                         db_ref=db_ref,
+                         dtype=dtype)
 
         self.n_mels = n_mels
         self.htk = htk
 
-    def process_audio(self, audio):
+    def process_audio(self, audio, cache=None):
         """
         Get the Mel Spectrogram features for a piece of audio.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
 
         Returns
         ----------
@@ -54,20 +59,16 @@ class MelSpec(STFT):
 
         if audio.shape[-1] == 0:
             # Handle case of empty audio array
-            return np.zeros((1, self.n_mels, 0))
+            return np.zeros(audio.shape[:-1] + (1, self.n_mels, 0), dtype=self.dtype)
 
-        if not self.center:
-            # Pad the audio to fill in a final frame
-            audio = self.frame_pad(audio)
+        # Compute the power spectrogram (possibly shared with other modules)
+        power = self.get_magnitude(audio, cache) ** 2
 
         # Calculate the Mel Spectrogram using librosa
-        mel = librosa.feature.melspectrogram(y=audio,
+        mel = librosa.feature.melspectrogram(S=power,
                                              sr=self.sample_rate,
                                              n_mels=self.n_mels,
                                              n_fft=self.n_fft,
-                                             hop_length=self.hop_length,
-                                             win_length=self.win_length,
-                                             center=self.center,
                                              htk=self.htk)
 
         # Post-process the Mel Spectrogram
@@ -91,7 +92,7 @@ class MelSpec(STFT):
         """
 
         # Simply use the appropriate librosa function
-        feats = librosa.core.power_to_db(feats, ref=np.max)
+        feats = self.scale_decibels(feats, librosa.core.power_to_db)
 
         return feats
 
@@ -2,6 +2,7 @@
 
 # My imports
 from .waveform import WaveformWrapper
+from .. import tools
 
 # Regular imports
 from librosa.core import amplitude_to_db
@@ -13,7 +14,8 @@ class SignalPower(WaveformWrapper):
     """
     Computes signal power at the frame-level.
     """
-    def __init__(self, sample_rate=44100, hop_length=512, decibels=True, win_length=None, center=True):
+    def __init__(self, sample_rate=44100, hop_length=512, decibels=True, win_length=None, center=True, db_ref='max',
+                 dtype=tools.FLOAT32):
         """
         Initialize parameters for computing signal power.
 
@@ -26,16 +28,23 @@ class SignalPower(WaveformWrapper):
                          hop_length=hop_length,
                          decibels=decibels,
                          win_length=win_length,
-                         center=center)
+                         center=center,
+                         db_ref=db_ref,
+                         dtype=dtype)
 
-    def process_audio(self, audio):
+    def process_audio(self, audio, cache=None, out=None):
         """
         Get the signal power for each frame of a piece of audio.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
+        out : ndarray or None (optional)
+          Preallocated buffer (B x T) in the chosen data type to fill with the
+          powers instead of allocating a new one, e.g. reused across hops while streaming
 
         Returns
         ----------
@@ -43,16 +52,30 @@ class SignalPower(WaveformWrapper):
           Frame-level signal powers
         """
 
-        # Split the audio into frames
-        audio_frames = super().process_audio(audio)
+        # Split the audio into frames (a view of the padded audio)
+        audio_frames = super().process_audio(audio, cache)
 
-        # Compute frame-level signal powers
-        powers = np.sum(audio_frames ** 2, axis=-2) / self.win_length
+        if audio_frames.shape[-1] == 0:
+            # Handle case of empty audio array
+            return np.zeros(audio_frames.shape[:-2] + (0,), dtype=self.dtype)
+
+        # Compute the sum of squares within each frame in a single pass, without materializing the squared frames
+        powers = np.einsum('...ij,...ij->...j', audio_frames, audio_frames, out=out)
+        # Normalize by the frame length to obtain the frame-level signal powers
+        powers /= self.win_length
 
         if self.decibels:
-            # Convert to Decibels using the maximum
-            # power (among this signal) as the reference
-            powers = amplitude_to_db(powers, ref=np.max)
+            # Convert to Decibels using the chosen reference (by default
+            # the maximum power among each signal)
+            powers = self.scale_decibels(powers, amplitude_to_db, num_axes=1)
+
+            if out is not None:
+                # Write the decibels to the buffer
+                out[...] = powers
+                powers = out
+
+        # Convert to the chosen data type (without copying if already so)
+        powers = powers.astype(self.dtype, copy=False)
 
         return powers
 
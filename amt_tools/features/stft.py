@@ -2,6 +2,8 @@
 
 # My imports
 from .waveform import WaveformWrapper
+from .common import FeatureModule
+from .. import tools
 
 # Regular imports
 import numpy as np
@@ -13,7 +15,7 @@ class STFT(WaveformWrapper):
     Implements a Spectrogram wrapper.
     """
     def __init__(self, sample_rate=16000, hop_length=512, decibels=True,
-                 win_length=None, center=True, n_fft=2048):
+                 win_length=None, center=True, n_fft=2048, db_ref='max', dtype=tools.FLOAT32):
         """
         Initialize parameters for the Mel Spectrogram.
 
@@ -37,26 +39,34 @@ class STFT(WaveformWrapper):
                          hop_length=hop_length,
                          decibels=decibels,
                          win_length=win_length,
-                         center=center)
+                         center=center,
+                         db_ref=db_ref,
+                         dtype=dtype)
 
-    def process_audio(self, audio):
+    def get_magnitude(self, audio, cache=None):
         """
-        Get the spectrogram features for a piece of audio.
+        Compute the magnitude spectrogram for a piece of audio.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
 
         Returns
         ----------
-        feats : ndarray
-          Post-processed features
+        spec : ndarray
+          Magnitude spectrogram
         """
 
-        if audio.shape[-1] == 0:
-            # Handle case of empty audio array
-            return np.zeros((1, self.n_fft, 0))
+        # Convert the audio to the computation precision
+        audio = self.prepare_audio(audio)
+
+        if cache is not None:
+            # Obtain the spectrogram, computing it only if no other module with the same STFT parameters has done so
+            return cache.get(('stft', self.n_fft, self.hop_length, self.win_length, self.center, audio.dtype.str),
+                             lambda: self.get_magnitude(audio))
 
         if not self.center:
             # Pad the audio to fill in a final frame
@@ -71,11 +81,67 @@ class STFT(WaveformWrapper):
         # Take the magnitude of the spectrogram
         spec = np.abs(spec)
 
+        return spec
+
+    def process_audio(self, audio, cache=None):
+        """
+        Get the spectrogram features for a piece of audio.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
+
+        Returns
+        ----------
+        feats : ndarray
+          Post-processed features
+        """
+
+        if audio.shape[-1] == 0:
+            # Handle case of empty audio array
+            return np.zeros(audio.shape[:-1] + (1, self.n_fft, 0), dtype=self.dtype)
+
+        # Compute the magnitude spectrogram
+        spec = self.get_magnitude(audio, cache)
+
         # Post-process the Spectrogram
         spec = super().post_proc(spec)
 
         return spec
 
+    def get_num_context_frames(self):
+        """
+        Determine how many frames on either side of a frame can share audio samples with it.
+
+        Returns
+        ----------
+        num_context_frames : int
+          Number of frames of overlap on either side
+        """
+
+        # Number of hops spanned by a full FFT window, plus one to be safe
+        num_context_frames = int(np.ceil(self.n_fft / self.hop_length)) + 1
+
+        return num_context_frames
+
+    def query_unit_range(self):
+        """
+        Determine whether the features are guaranteed to lie between 0 and 1.
+
+        Returns
+        ----------
+        unit_range : bool
+          Flag indicating the features lie between 0 and 1
+        """
+
+        # Spectrograms are post-processed, unlike frames of audio
+        unit_range = FeatureModule.query_unit_range(self)
+
+        return unit_range
+
     def get_feature_size(self):
         """
         Helper function to access dimensionality of features.
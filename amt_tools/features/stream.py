@@ -68,6 +68,9 @@ class FeatureStream(object):
         # Clear the buffer
         self.frame_buffer = list()
 
+        # Forget the running decibel reference (if any) of the previous stream
+        self.module.reset_db_reference()
+
     @abstractmethod
     def start_streaming(self):
         """
@@ -163,10 +166,10 @@ class FeatureStream(object):
             Dictionary containing a frame of features and the corresponding time
         """
 
-        # Construct a frame filled with zeros
+        # Construct a frame filled with zeros (in the data type of the features, if chosen)
         empty_frame = np.zeros((self.module.get_num_channels(),
                                 self.module.get_feature_size(),
-                                1)).astype(tools.FLOAT32)
+                                1)).astype(getattr(self.module, 'dtype', tools.FLOAT32))
 
         # Obtain the updated features
         features = self.buffer_new_frame(empty_frame)
@@ -408,7 +411,7 @@ class MicrophoneStream(FeatureStream, threading.Thread):
         self.current_sample = len(self.audio_buffer)
 
         # Re-initialize the stream
-        self.stream = sd.InputStream(samplerate=self.module.sample_rate,
+        self.stream = sd.InputStream(samplerate=self.module.get_sample_rate(),
                                      blocksize=None,
                                      device=self.device,
                                      channels=1,
@@ -494,7 +497,7 @@ class MicrophoneStream(FeatureStream, threading.Thread):
 
                         if not self.suppress_warnings:
                             # Compute the current time lag
-                            time_lag = (len(self.audio_buffer) - self.current_sample) / self.module.sample_rate
+                            time_lag = (len(self.audio_buffer) - self.current_sample) / self.module.get_sample_rate()
 
                             if self.current_sample == 0:
                                 # Print a warning message describing the situation
@@ -701,7 +704,7 @@ class AudioStream(FeatureStream):
 
         if self.playback and self.audio is not None:
             # Play the audio
-            sd.play(self.audio, self.module.sample_rate)
+            sd.play(self.audio, self.module.get_sample_rate())
 
     def stop_streaming(self):
         """
@@ -731,7 +734,7 @@ class AudioStream(FeatureStream):
         # Check if the stream is active and if there are more features to acquire
         if self.query_active() and not self.query_finished():
             # Determine the nominal time of the last sample needed to extract the frame
-            sample_time = (self.current_sample + self.module.get_num_samples_required()) / self.module.sample_rate
+            sample_time = (self.current_sample + self.module.get_num_samples_required()) / self.module.get_sample_rate()
 
             if self.real_time:
                 if not self.suppress_warnings:
@@ -800,7 +803,7 @@ class AudioFileStream(AudioStream):
         """
 
         # Load the audio at the specified path, with rms normalization by default
-        audio, _ = tools.load_normalize_audio(audio_path, fs=module.sample_rate, norm=audio_norm)
+        audio, _ = tools.load_normalize_audio(audio_path, fs=module.get_sample_rate(), norm=audio_norm)
 
         self.original_audio = audio
 
@@ -817,4 +820,4 @@ class AudioFileStream(AudioStream):
 
         if self.playback:
             # Play the audio
-            sd.play(self.original_audio, self.module.sample_rate)
+            sd.play(self.original_audio, self.module.get_sample_rate())
@@ -1,14 +1,56 @@
 # Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
 
 # My imports
-from .common import FeatureModule
+from .common import FeatureModule, IntermediateCache
+from .. import tools
 
 # Regular imports
 from librosa.core.constantq import __early_downsample_count as early_downsample_count
 from librosa.filters import window_bandwidth, wavelet_lengths
+from librosa.util import dtype_r2c
 
 import numpy as np
+import warnings
 import librosa
+import re
+
+# Range of librosa versions (inclusive) against which the internals of librosa.vqt used below were verified
+LIBROSA_VERSIONS = ((0, 10), (0, 11))
+
+# Determine the (major, minor) version of the installed librosa
+LIBROSA_VERSION = tuple(int(v) for v in re.findall(r'\d+', librosa.__version__)[:2])
+
+try:
+    # Internals of librosa.vqt, which are needed to construct the filter bank only once
+    from librosa.core.constantq import __et_relative_bw as et_relative_bw
+    from librosa.core.constantq import __vqt_filter_fft as vqt_filter_fft
+    from librosa.core.constantq import __trim_stack as trim_stack
+    from librosa.filters import _relative_bandwidth as relative_bandwidth
+    # Cached filter banks are only supported for the verified versions, since the internals may change silently
+    CACHE_FILTER_BANK = LIBROSA_VERSIONS[0] <= LIBROSA_VERSION <= LIBROSA_VERSIONS[-1]
+except ImportError:
+    # Fall back to calling librosa.vqt (which constructs the filters for every call)
+    CACHE_FILTER_BANK = False
+
+# Keep track of whether the fall back to librosa.vqt has been reported
+FALLBACK_WARNED = False
+
+
+def warn_fallback():
+    """
+    Warn (only once) that the VQT is computed with librosa.vqt, without cached filter banks.
+    """
+
+    global FALLBACK_WARNED
+
+    if not FALLBACK_WARNED:
+        # Report the fall back
+        warnings.warn(f'Cached VQT filter banks are not supported for librosa {librosa.__version__} ' +
+                      f'(verified for {LIBROSA_VERSIONS[0][0]}.{LIBROSA_VERSIONS[0][1]} through ' +
+                      f'{LIBROSA_VERSIONS[-1][0]}.{LIBROSA_VERSIONS[-1][1]}), falling back to ' +
+                      'librosa.vqt, which constructs the filters for every call.', category=RuntimeWarning)
+        # Do not report it again
+        FALLBACK_WARNED = True
 
 
 # TODO - the convention for alpha in librosa has changed, potentially invalidating things
@@ -19,7 +61,7 @@ class VQT(FeatureModule):
     Implements a Variable-Q Transform wrapper.
     """
     def __init__(self, sample_rate=22050, hop_length=512, decibels=True,
-                 fmin=None, n_bins=84, bins_per_octave=12, gamma=None):
+                 fmin=None, n_bins=84, bins_per_octave=12, gamma=None, db_ref='max', dtype=tools.FLOAT32):
         """
         Initialize parameters for the VQT.
 
@@ -36,7 +78,7 @@ class VQT(FeatureModule):
           Bandwidth offset for determining filter lengths
         """
 
-        super().__init__(sample_rate, hop_length, 1, decibels)
+        super().__init__(sample_rate, hop_length, 1, decibels, db_ref, dtype)
 
         # Default the lowest center frequency to the note C1
         if fmin is None:
@@ -61,6 +103,13 @@ class VQT(FeatureModule):
         n_octs = int(np.ceil(float(self.n_bins) / self.bins_per_octave))
         self.n_octs = n_octs
 
+        # Compute the number of downsamples before processing once, since it is needed for every frame count
+        self._early_ds_count = self.get_early_ds_count()
+
+        # Initialize a dictionary to hold the filter bank for each (complex) data type,
+        # which is only constructed once audio is processed (see get_filter_bank)
+        self._filter_banks = {}
+
     def get_early_ds_count(self):
         """
         Utility function to calculate the number of downsamples required
@@ -77,6 +126,10 @@ class VQT(FeatureModule):
           Number of time we must downsample a signal before applying filters
         """
 
+        if getattr(self, '_early_ds_count', None) is not None:
+            # The count was already computed during initialization
+            return self._early_ds_count
+
         # Obtain the highest center frequency for the transform (top-octave)
         fmax = np.max(librosa.cqt_frequencies(n_bins=self.n_bins, fmin=self.fmin,
                                               bins_per_octave=self.bins_per_octave))
@@ -123,7 +176,7 @@ class VQT(FeatureModule):
         # Determine the downsampling factors we will use
         k = np.arange(early_ds_count, k + 1)
         # Calculate the signal length associated with these factors
-        sig_lens = np.ceil(len(audio) / (2**k))
+        sig_lens = np.ceil(audio.shape[-1] / (2**k))
         # Determine the downsampled hop lengths
         hop_lens = self.hop_length // (2**k)
         # Calculate the number of hops for each downsampling factor
@@ -164,14 +217,164 @@ class VQT(FeatureModule):
 
         return sample_range
 
-    def process_audio(self, audio):
+    def get_filter_bank(self, dtype=np.complex64):
+        """
+        Obtain the (cached) frequency-domain filters for each octave of the VQT, along with
+        the plan for downsampling the audio, as they would be constructed by librosa.vqt.
+
+        Parameters
+        ----------
+        dtype : type
+          Complex data type of the filters (matching the precision of the audio)
+
+        Returns
+        ----------
+        filter_bank : dict
+          Downsampling factor before processing (early_ds_factor), list of (filter basis, FFT size,
+          hop length, number of times to halve the audio after early downsampling) for each octave
+          (octaves), and length normalization for each bin (norms)
+        """
+
+        assert CACHE_FILTER_BANK, f'Cached filter banks are not supported for librosa {librosa.__version__}'
+
+        if dtype in self._filter_banks:
+            # The filter bank was already constructed
+            return self._filter_banks[dtype]
+
+        # Determine how many filters belong to each octave
+        n_filters = min(self.bins_per_octave, self.n_bins)
+
+        # Obtain the center frequency of each filter
+        freqs = librosa.interval_frequencies(n_bins=self.n_bins,
+                                             fmin=self.fmin,
+                                             intervals='equal',
+                                             bins_per_octave=self.bins_per_octave,
+                                             sort=True)
+
+        # Determine the relative bandwidth of each filter
+        alpha = et_relative_bw(self.bins_per_octave) if self.n_bins == 1 else relative_bandwidth(freqs=freqs)
+
+        # Determine the cutoff frequency of the highest filter
+        _, filter_cutoff = wavelet_lengths(freqs=freqs,
+                                           sr=self.sample_rate,
+                                           window=self.window,
+                                           gamma=self.gamma,
+                                           alpha=alpha)
+
+        # Calculate the Nyquist rate
+        nyquist = self.sample_rate / 2.0
+
+        if filter_cutoff > nyquist:
+            raise librosa.ParameterError(f'Wavelet basis with max frequency={np.max(freqs)} ' +
+                                         f'would exceed the Nyquist frequency={nyquist}. ' +
+                                         'Try reducing the number of frequency bins.')
+
+        # Determine how much the audio is downsampled before processing
+        early_ds_factor = 2 ** early_downsample_count(nyquist=nyquist,
+                                                      filter_cutoff=filter_cutoff,
+                                                      hop_length=self.hop_length,
+                                                      n_octaves=self.n_octs)
+
+        # Determine the sampling rate and hop length after early downsampling
+        sample_rate, hop_length = self.sample_rate / early_ds_factor, self.hop_length // early_ds_factor
+
+        # Keep track of the sampling rate, hop length, and number of further downsamples for each octave
+        oct_sr, oct_hop, oct_level = sample_rate, hop_length, 0
+
+        octaves = []
+        # Construct the filters for each octave, from highest to lowest
+        for i in range(self.n_octs):
+            # Slice out the current octave of filters
+            sl = slice(-n_filters * (i + 1), -n_filters * i if i else None)
+
+            # Construct the frequency-domain filters for the octave
+            fft_basis, n_fft, _ = vqt_filter_fft(oct_sr, freqs[sl], 1, 1, 0.01,
+                                                 window=self.window,
+                                                 gamma=self.gamma,
+                                                 dtype=dtype,
+                                                 alpha=alpha[sl])
+
+            # Re-scale the filters to compensate for downsampling
+            fft_basis[:] *= np.sqrt(sample_rate / oct_sr)
+
+            # Add the filters for the octave
+            octaves += [(fft_basis, n_fft, oct_hop, oct_level)]
+
+            if oct_hop % 2 == 0:
+                # The audio is only downsampled further while the hop length is divisible by two
+                oct_hop //= 2
+                oct_sr /= 2.0
+                oct_level += 1
+
+        # Determine the filter lengths at the sampling rate after early downsampling
+        lengths, _ = wavelet_lengths(freqs=freqs,
+                                     sr=sample_rate,
+                                     window=self.window,
+                                     gamma=self.gamma,
+                                     alpha=alpha)
+
+        # Cache the filter bank
+        self._filter_banks[dtype] = {'early_ds_factor' : early_ds_factor,
+                                     'octaves' : octaves,
+                                     'norms' : np.sqrt(lengths)[:, np.newaxis]}
+
+        return self._filter_banks[dtype]
+
+    @staticmethod
+    def get_downsampled_audio(audio, early_ds_factor, level, cache):
+        """
+        Obtain a level of the pyramid of downsampled audio, reusing any levels which were already computed.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        early_ds_factor : int
+          Downsampling factor applied before processing
+        level : int
+          Number of times the audio is halved after early downsampling
+        cache : IntermediateCache
+          Intermediate results computed for the same audio
+
+        Returns
+        ----------
+        audio : ndarray
+          Downsampled audio
+        """
+
+        def downsample():
+            """
+            Compute the pyramid level.
+            """
+
+            if level > 0:
+                # Halve the previous level of the pyramid
+                return librosa.resample(VQT.get_downsampled_audio(audio, early_ds_factor, level - 1, cache),
+                                        orig_sr=2, target_sr=1, res_type='soxr_hq', scale=True)
+            elif early_ds_factor > 1:
+                # Downsample the audio before processing
+                return librosa.resample(audio, orig_sr=early_ds_factor, target_sr=1,
+                                        res_type='soxr_hq', scale=True)
+            else:
+                # The first level is the original audio
+                return audio
+
+        # Obtain the pyramid level, computing it only if necessary
+        audio = cache.get(('audio', early_ds_factor, level, audio.dtype.str), downsample)
+
+        return audio
+
+    def process_audio(self, audio, cache=None):
         """
         Get the VQT features for a piece of audio.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results (downsampled audio and STFTs) to share
+          with other VQT modules processing the same audio (see HVQT)
 
         Returns
         ----------
@@ -179,14 +382,61 @@ class VQT(FeatureModule):
           Post-processed features
         """
 
-        # Calculate the VQT using librosa
-        vqt = librosa.vqt(y=audio,
-                          sr=self.sample_rate,
-                          hop_length=self.hop_length,
-                          fmin=self.fmin,
-                          n_bins=self.n_bins,
-                          bins_per_octave=self.bins_per_octave,
-                          gamma=self.gamma)
+        if cache is None:
+            # Intermediate results are only shared across the octaves of this transform
+            cache = IntermediateCache()
+
+        # Convert the audio to the computation precision
+        audio = self.prepare_audio(audio)
+
+        if not CACHE_FILTER_BANK:
+            # Report that the filter bank cannot be cached
+            warn_fallback()
+            # Calculate the VQT using librosa (without any caching)
+            vqt = librosa.vqt(y=audio,
+                              sr=self.sample_rate,
+                              hop_length=self.hop_length,
+                              fmin=self.fmin,
+                              n_bins=self.n_bins,
+                              bins_per_octave=self.bins_per_octave,
+                              gamma=self.gamma)
+            # Take the magnitude of the VQT
+            vqt = np.abs(vqt)
+            # Post-process the VQT
+            feats = super().post_proc(vqt)
+
+            return feats
+
+        # Determine the complex data type matching the precision of the audio
+        dtype = dtype_r2c(audio.dtype)
+
+        # Obtain the cached filters and downsampling plan
+        filter_bank = self.get_filter_bank(dtype)
+        early_ds_factor = filter_bank['early_ds_factor']
+
+        if audio.shape[-1] < early_ds_factor:
+            raise librosa.ParameterError(f'Input signal length={audio.shape[-1]} ' +
+                                         f'is too short for {self.n_octs}-octave VQT')
+
+        vqt = []
+        # Compute the response of each octave, from highest to lowest
+        for fft_basis, n_fft, hop_length, level in filter_bank['octaves']:
+            # Obtain the STFT of the downsampled audio (as in librosa.vqt), computing it only if necessary
+            stft = cache.get(('vqt_stft', early_ds_factor, level, n_fft, hop_length, audio.dtype.str),
+                             lambda: librosa.stft(self.get_downsampled_audio(audio, early_ds_factor, level, cache),
+                                                  n_fft=n_fft, hop_length=hop_length, window='ones',
+                                                  pad_mode='constant', dtype=dtype))
+
+            # Apply the filters of the octave to the STFT of each signal (collapsing any leading dimensions)
+            response = np.stack([fft_basis.dot(s) for s in stft.reshape((-1,) + stft.shape[-2:])])
+            # Restore the leading dimensions
+            vqt += [response.reshape(stft.shape[:-2] + response.shape[-2:])]
+
+        # Trim the octaves to the same number of frames and stack them
+        vqt = trim_stack(vqt, self.n_bins, dtype)
+        # Normalize the response by the filter lengths
+        vqt /= filter_bank['norms']
+
         # Take the magnitude of the VQT
         vqt = np.abs(vqt)
         # Post-process the VQT
@@ -226,6 +476,38 @@ class VQT(FeatureModule):
 
         return times
 
+    def get_num_context_frames(self):
+        """
+        Determine how many frames on either side of a frame can share audio samples with it.
+
+        Returns
+        ----------
+        num_context_frames : int
+          Number of frames of overlap on either side
+        """
+
+        if CACHE_FILTER_BANK:
+            # Obtain the filters and downsampling plan for single-precision audio
+            filter_bank = self.get_filter_bank(np.complex64)
+
+            # Determine the number of (original) samples spanned by the FFT window of each octave
+            spans = [n_fft * filter_bank['early_ds_factor'] * 2 ** level
+                     for _, n_fft, _, level in filter_bank['octaves']]
+        else:
+            # Determine the length of the lowest frequency filter
+            longest_length, _ = wavelet_lengths(freqs=np.array([self.fmin]),
+                                                sr=self.sample_rate,
+                                                window=self.window,
+                                                gamma=self.gamma,
+                                                alpha=self.alpha)
+            # The FFT window of an octave is at most twice the length of its longest filter
+            spans = [2 * np.max(longest_length)]
+
+        # Number of hops spanned by the widest window (twice the amount on either side, to cover resampling)
+        num_context_frames = int(np.ceil(max(spans) / self.hop_length)) + 1
+
+        return num_context_frames
+
     def get_feature_size(self):
         """
         Helper function to access dimensionality of features.
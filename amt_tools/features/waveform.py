@@ -2,9 +2,10 @@
 
 # My imports
 from .common import FeatureModule
+from .. import tools
 
 # Regular imports
-from librosa.util import frame
+from numpy.lib.stride_tricks import as_strided
 
 import numpy as np
 
@@ -15,7 +16,8 @@ class WaveformWrapper(FeatureModule):
     """
     Implements a audio waveform feature wrapper.
     """
-    def __init__(self, sample_rate=44100, hop_length=512, decibels=False, win_length=None, center=True):
+    def __init__(self, sample_rate=44100, hop_length=512, decibels=False, win_length=None, center=True, db_ref='max',
+                 dtype=tools.FLOAT32):
         """
         Initialize parameters for the waveform wrapper.
 
@@ -32,7 +34,9 @@ class WaveformWrapper(FeatureModule):
         super().__init__(sample_rate=sample_rate,
                          hop_length=hop_length,
                          num_channels=1,
-                         decibels=decibels)
+                         decibels=decibels,
+                         db_ref=db_ref,
+                         dtype=dtype)
 
         if win_length is None:
             win_length = self.hop_length
@@ -95,6 +99,21 @@ class WaveformWrapper(FeatureModule):
 
         return sample_range
 
+    def get_num_context_frames(self):
+        """
+        Determine how many frames on either side of a frame can share audio samples with it.
+
+        Returns
+        ----------
+        num_context_frames : int
+          Number of frames of overlap on either side
+        """
+
+        # Number of hops spanned by a full frame, plus one to be safe
+        num_context_frames = int(np.ceil(self.win_length / self.hop_length)) + 1
+
+        return num_context_frames
+
     def center_pad(self, audio):
         """
         Pad the audio such that the first sample
@@ -112,46 +131,146 @@ class WaveformWrapper(FeatureModule):
         """
 
         # Compute the padding which would occur in (librosa) STFT
-        padding = [tuple([int(self.win_length // 2)] * 2)]
-        # Pad the signal on both sides
+        padding = [(0, 0)] * (audio.ndim - 1) + [tuple([int(self.win_length // 2)] * 2)]
+        # Pad the signal on both sides (along the sample axis only)
         audio = np.pad(audio, padding, mode='constant')
 
         return audio
 
-    def process_audio(self, audio):
+    def get_padding(self, num_samples):
+        """
+        Determine how many samples of padding will be added on either side of
+        a piece of audio before it is split into frames.
+
+        Parameters
+        ----------
+        num_samples : int
+          Number of samples in the audio
+
+        Returns
+        ----------
+        padding : tuple (int, int)
+          Number of samples added before and after the audio
+        """
+
+        if self.center:
+            # Half of a frame on both sides (see center_pad)
+            padding = (int(self.win_length // 2),) * 2
+        else:
+            # We need at least this many samples (see frame_pad)
+            divisor = self.get_num_samples_required()
+
+            if num_samples > divisor:
+                # If above is satisfied, just pad for one extra hop
+                divisor = self.hop_length
+
+            # Pad the end of the audio such that it is evenly divisible
+            padding = (0, -num_samples % divisor)
+
+        return padding
+
+    def pad_audio(self, audio, out=None):
+        """
+        Pad the audio for framing, optionally within a preallocated buffer.
+
+        Parameters
+        ----------
+        audio : ndarray
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        out : ndarray or None (optional)
+          Buffer (B x N') to fill with the padded audio instead of allocating a new one, where
+          N' is N plus the padding (see get_padding), e.g. reused across hops while streaming
+
+        Returns
+        ----------
+        audio : ndarray
+          Padded audio
+        """
+
+        # Determine the amount of padding on either side (same as center_pad or frame_pad)
+        pad_start, pad_end = self.get_padding(audio.shape[-1])
+        # Determine the shape of the padded audio
+        padded_shape = audio.shape[:-1] + (pad_start + audio.shape[-1] + pad_end,)
+
+        if out is None:
+            # Allocate the padded audio (much cheaper than np.pad for short audio)
+            out = np.empty(padded_shape, dtype=audio.dtype)
+
+        assert out.shape == padded_shape, 'Buffer must have the shape of the padded audio'
+
+        # Zero out the padding and copy the audio in between
+        out[..., :pad_start] = 0
+        out[..., pad_start : padded_shape[-1] - pad_end] = audio
+        out[..., padded_shape[-1] - pad_end:] = 0
+
+        return out
+
+    def process_audio(self, audio, cache=None, out=None):
         """
         Chop the audio in frames according to window and hop length.
 
         Parameters
         ----------
         audio : ndarray
-          Mono-channel audio
+          Mono-channel audio, or a batch of signals of equal length (B x N)
+        cache : IntermediateCache or None (optional)
+          Intermediate results to share with other modules processing the same audio
+        out : ndarray or None (optional)
+          Preallocated buffer for the padded audio (see pad_audio), of which the frames will be a view
 
         Returns
         ----------
         audio_frames : ndarray
-          Padded audio split into frames
+          Padded audio split into frames (a read-only view of the padded audio when
+          it is in the chosen data type, which is overwritten if the buffer is reused)
         """
 
         if audio.shape[-1] == 0:
             # Handle case of empty audio array
-            return np.zeros((self.win_length, 0))
+            return np.zeros(audio.shape[:-1] + (self.win_length, 0), dtype=self.dtype)
 
-        if self.center:
-            # Pad the audio such that the first sample
-            # is located halfway through the first frame
-            audio = self.center_pad(audio)
-        else:
-            # Pad the audio to fill in a final frame
-            audio = self.frame_pad(audio)
+        # Convert the audio to the computation precision
+        audio = self.prepare_audio(audio)
+
+        if cache is not None:
+            # Obtain the frames, computing them only if no other module with the same framing has done so
+            return cache.get(('frames', self.win_length, self.hop_length, self.center, np.dtype(self.dtype).str),
+                             lambda: WaveformWrapper.process_audio(self, audio, out=out))
+
+        # Pad the audio for framing (the only copy of the audio which is made)
+        audio = self.pad_audio(audio, out)
+
+        # Determine how many full frames fit within the padded audio
+        num_frames = (audio.shape[-1] - self.win_length) // self.hop_length + 1
+        # Determine the stride between consecutive samples
+        stride = audio.strides[-1]
 
-        # Obtain the audio samples associated with each frame
-        audio_frames = frame(audio,
-                             frame_length=self.win_length,
-                             hop_length=self.hop_length)
+        # View the samples of each frame (along the last axis) without copying
+        audio_frames = as_strided(audio,
+                                  shape=audio.shape[:-1] + (self.win_length, num_frames),
+                                  strides=audio.strides[:-1] + (stride, stride * self.hop_length),
+                                  writeable=False)
+
+        # Convert to the chosen data type (without copying if already so)
+        audio_frames = audio_frames.astype(self.dtype, copy=False)
 
         return audio_frames
 
+    def query_unit_range(self):
+        """
+        Determine whether the features are guaranteed to lie between 0 and 1.
+
+        Returns
+        ----------
+        unit_range : bool
+          Flag indicating the features lie between 0 and 1
+        """
+
+        # Frames of audio (or signal powers) are not scaled by post_proc
+        unit_range = False
+
+        return unit_range
+
     def get_times(self, audio, at_start=False):
         """
         Determine the time, in seconds, associated with each frame.
@@ -21,6 +21,14 @@ DEFAULT_DATASETS_DIR = os.path.join(HOME, 'Desktop', 'Datasets')
 
 DEFAULT_GENERATED_DIR = os.path.abspath(os.path.join(ROOT_DIR, 'generated'))
 GROUND_TRUTH_DIR = 'ground_truth'
+SYMBOLIC_GROUND_TRUTH_DIR = 'symbolic_ground_truth'
+SIDECAR_NAME = 'entries'
+AUDIO_INDEX_NAME = 'audio_index'
+MANIFEST_NAME = 'manifest'
+CONFIG_NAME = 'config'
+SHARD_NAME = 'shard'
+JAMS_CACHE_DIR = 'annotations'
+AUDIO_CACHE_DIR = 'audio'
 
 DEFAULT_FEATURES_GT_DIR = os.path.join(DEFAULT_GENERATED_DIR, 'data')
 DEFAULT_EXPERIMENTS_DIR = os.path.join(DEFAULT_GENERATED_DIR, 'experiments')
@@ -35,6 +43,10 @@ MID_EXT = 'mid'
 MIDI_EXT = 'midi'
 JAMS_EXT = 'jams'
 NPZ_EXT = 'npz'
+NPY_EXT = 'npy'
+JSON_EXT = 'json'
+BIN_EXT = 'bin'
+PKL_EXT = 'pkl'
 TXT_EXT = 'txt'
 PYT_EXT = 'pt'
 CSV_EXT = 'csv'
@@ -55,6 +67,13 @@ KEY_ONSETS = 'onsets'
 KEY_OFFSETS = 'offsets'
 KEY_TIMES = 'times'
 KEY_NOTES = 'notes'
+KEY_NOTES_INDEX = 'notes_index'
+KEY_PITCHLIST_INDEX = 'pitch_list_index'
+KEY_NUM_SAMPLES = 'num_samples'
+KEY_SCALE = 'scale'
+KEY_NUM_FRAMES = 'num_frames'
+KEY_NUM_NOTES = 'num_notes'
+KEY_FEATS_SHAPE = 'features_shape'
 KEY_OUTPUT = 'model_output'
 KEY_ACCURACY = 'accuracy'
 
@@ -123,9 +142,11 @@ DEFAULT_PIANO_HIGHEST_PITCH = 108
 ##################################################
 
 UINT = 'uint'
+UINT8 = 'uint8'
 INT = 'int'
 INT64 = 'int64'
 FLOAT = 'float'
+FLOAT16 = 'float16'
 FLOAT32 = 'float32'
 FLOAT64 = 'float64'
 
@@ -5,19 +5,34 @@ from . import utils, constants
 
 # Regular imports
 from mir_eval.multipitch import resample_multipitch
+from scipy.signal import resample_poly
 from tqdm import tqdm
+from hashlib import md5
+from math import gcd
 
+import soundfile as sf
 import numpy as np
 import requests
+import tempfile
 import zipfile
 import librosa
 import shutil
+import pickle
 import mido
 import jams
 import os
 
+# Context decoded on either side of an audio segment for the resampling filter
+SEGMENT_PAD = 1024 # samples
+
 __all__ = [
     'load_normalize_audio',
+    'resample_audio',
+    'get_audio_cache_path',
+    'load_cached_audio',
+    'load_audio_segment',
+    'parse_jams',
+    'load_jams',
     'extract_stacked_notes_jams',
     'load_stacked_notes_jams',
     'extract_notes_jams',
@@ -47,7 +62,125 @@ __all__ = [
 ##################################################
 
 
-def load_normalize_audio(wav_path, fs=None, norm=-1, res_type='kaiser_best'):
+def resample_audio(audio, fs, target_fs, res_type='kaiser_best'):
+    """
+    Resample audio to a new sampling rate.
+
+    Parameters
+    ----------
+    audio : ndarray (N)
+      Mono-channel audio to resample
+      N - number of samples in audio
+    fs : int or float
+      Sampling rate of the audio
+    target_fs : int or float
+      Desired sampling rate
+    res_type : string
+      'polyphase' - polyphase filtering with the reduced integer ratio of the sampling rates
+      See librosa for others... - this significantly affects the speed of resampling long audio files
+
+    Returns
+    ----------
+    audio : ndarray (M)
+      Resampled mono-channel audio
+      M - number of samples in resampled audio
+    """
+
+    if fs == target_fs:
+        # No resampling is necessary
+        return audio
+
+    if res_type == 'polyphase':
+        assert int(fs) == fs and int(target_fs) == target_fs, 'Polyphase resampling requires integer sampling rates'
+
+        # Reduce the ratio between the sampling rates to obtain the smallest up/down factors
+        divisor = gcd(int(fs), int(target_fs))
+
+        # Upsample, filter, and downsample in a single pass, and retain the original precision
+        audio = resample_poly(audio, int(target_fs) // divisor, int(fs) // divisor).astype(audio.dtype)
+    else:
+        # Resample the audio using librosa
+        audio = librosa.resample(audio, orig_sr=fs, target_sr=target_fs, res_type=res_type)
+
+    return audio
+
+
+def get_audio_cache_path(wav_path, cache_dir, fs=None, norm=-1, res_type='kaiser_best'):
+    """
+    Get the path under which to cache resampled and normalized audio.
+
+    Parameters
+    ----------
+    wav_path : string
+      Path to audio file
+    cache_dir : string
+      Directory under which to cache audio
+    fs : int or float or None (optional)
+      Desired sampling rate
+    norm : float or None
+      Type of normalization to perform
+    res_type : string
+      Type of resampling to perform
+
+    Returns
+    ----------
+    cache_path : string
+      Path to the cached audio
+    """
+
+    # Summarize the parameters which determine the contents of the cached audio
+    key = f'{os.path.abspath(wav_path)}|{fs}|{norm}|{res_type}'
+
+    # Append a hash of the parameters to the name of the audio file
+    name = f'{os.path.splitext(os.path.basename(wav_path))[0]}_{md5(key.encode()).hexdigest()[:16]}'
+
+    # Construct the path to the cached audio
+    cache_path = os.path.join(cache_dir, f'{name}.{constants.NPY_EXT}')
+
+    return cache_path
+
+
+def load_cached_audio(wav_path, cache_dir, fs=None, norm=-1, res_type='kaiser_best', mmap=False):
+    """
+    Load previously resampled and normalized audio from the cache, if it is up-to-date.
+
+    Parameters
+    ----------
+    wav_path : string
+      Path to audio file
+    cache_dir : string
+      Directory under which audio is cached
+    fs : int or float or None (optional)
+      Desired sampling rate
+    norm : float or None
+      Type of normalization which was performed
+    res_type : string
+      Type of resampling which was performed
+    mmap : bool
+      Whether to memory-map the cached audio instead of reading all of it
+
+    Returns
+    ----------
+    audio : ndarray (N) or None
+      Cached mono-channel audio, or None if no up-to-date audio exists in the cache
+      N - number of samples in audio
+    """
+
+    # Construct the path to the cached audio
+    cache_path = get_audio_cache_path(wav_path, cache_dir, fs, norm, res_type)
+
+    # Default the audio to nothing
+    audio = None
+
+    # Make sure the cached audio was written after the audio file was last modified
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(wav_path):
+        # Read (or memory-map) the cached audio
+        audio = np.load(cache_path, mmap_mode='r' if mmap else None)
+
+    return audio
+
+
+def load_normalize_audio(wav_path, fs=None, norm=-1, res_type='kaiser_best', cache_dir=None):
     """
     Load audio from a file and normalize it.
 
@@ -63,7 +196,10 @@ def load_normalize_audio(wav_path, fs=None, norm=-1, res_type='kaiser_best'):
       See librosa for others...
         - None case is handled here
     res_type : string
-      See librosa... - this significantly affects the speed of resampling long audio files
+      See resample_audio... - this significantly affects the speed of resampling long audio files
+    cache_dir : string or None (optional)
+      Directory under which to cache the resampled and normalized audio, such that
+      subsequent loads with the same parameters read the cached audio directly
 
     Returns
     ----------
@@ -74,27 +210,272 @@ def load_normalize_audio(wav_path, fs=None, norm=-1, res_type='kaiser_best'):
       Audio sampling rate
     """
 
-    # Load the audio using librosa
-    audio, fs = librosa.load(wav_path, sr=fs, mono=True, res_type=res_type)
+    if cache_dir is not None:
+        # Attempt to read the audio from the cache
+        audio = load_cached_audio(wav_path, cache_dir, fs, norm, res_type)
+
+        if audio is not None:
+            # Default the sampling rate to that of the file
+            fs = librosa.get_samplerate(wav_path) if fs is None else fs
+
+            return audio, fs
+
+    # Load the audio at its original sampling rate using librosa
+    audio, native_fs = librosa.load(wav_path, sr=None, mono=True)
+
+    if fs is None:
+        # Default the sampling rate to that of the file
+        fs = native_fs
+
+    # Resample the audio to the desired sampling rate
+    audio = resample_audio(audio, native_fs, fs, res_type)
 
     if norm == -1:
         # Perform root-mean-square normalization
         audio = utils.rms_norm(audio)
-    else:
+    elif norm is not None:
         # Normalize the audio using librosa
         audio = librosa.util.normalize(audio, norm=norm)
 
+    if cache_dir is not None:
+        # Make sure the cache directory exists
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Construct the path to the cached audio
+        cache_path = get_audio_cache_path(wav_path, cache_dir, fs, norm, res_type)
+
+        # Write the audio to a unique temporary file and then move it into place, such that concurrent
+        # writers (processes or threads) do not collide and readers never encounter partially written audio
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+
+        try:
+            with os.fdopen(handle, 'wb') as cache_file:
+                # Write the audio to the temporary file
+                np.save(cache_file, audio)
+            # Move the complete file to the cache path
+            os.replace(temp_path, cache_path)
+        finally:
+            if os.path.exists(temp_path):
+                # Clean up if anything went wrong
+                os.remove(temp_path)
+
     return audio, fs
 
 
+def load_audio_segment(wav_path, sample_start, num_samples, fs=None, scale=1, res_type='kaiser_best', cache_dir=None):
+    """
+    Load a segment of audio from a file, decoding only the samples (plus some
+    context for resampling) required for the segment, and normalize it.
+
+    Parameters
+    ----------
+    wav_path : string
+      Path to audio file to read
+    sample_start : int
+      First sample of the segment (w.r.t. the desired sampling rate)
+    num_samples : int
+      Number of samples in the segment (w.r.t. the desired sampling rate)
+    fs : int or None (optional)
+      Desired sampling rate
+    scale : float
+      Normalization factor for the entire audio file (see get_normalization_scale)
+    res_type : string
+      See resample_audio... - this should match the choice used when loading full tracks
+    cache_dir : string or None (optional)
+      Directory under which full tracks of resampled (unnormalized) audio may have been
+      cached by load_normalize_audio, in which case the segment is read from the cache
+
+    Returns
+    ----------
+    audio : ndarray (N)
+      Mono-channel audio segment read from file
+      N - number of samples in segment
+    """
+
+    # Attempt to memory-map the full track of audio from the cache
+    cached = None if cache_dir is None else load_cached_audio(wav_path, cache_dir, fs, None, res_type, mmap=True)
+
+    if cached is not None:
+        # Read only the samples within the segment and normalize them
+        audio = cached[sample_start : sample_start + num_samples] / scale
+
+        return audio
+
+    # Read the sampling rate and length of the audio file without decoding it
+    info = sf.info(wav_path)
+    native_fs, native_length = info.samplerate, info.frames
+
+    if fs is None:
+        # Default the sampling rate to that of the file
+        fs = native_fs
+
+    # Determine the smallest blocks of samples (resampled and original)
+    # which span the same duration, such that segments can be aligned
+    divisor = gcd(int(native_fs), int(fs))
+    block_size, native_block_size = int(fs) // divisor, int(native_fs) // divisor
+
+    # Only decode extra context if the audio needs to be resampled
+    pad = SEGMENT_PAD if native_fs != fs else 0
+
+    # Determine the blocks encompassing the segment and surrounding context
+    block_start = max(0, (sample_start - pad) // block_size)
+    block_stop = -(-(sample_start + num_samples + pad) // block_size)
+
+    # Decode the audio within the blocks
+    audio, _ = sf.read(wav_path,
+                       start=block_start * native_block_size,
+                       stop=min(native_length, block_stop * native_block_size),
+                       dtype='float32',
+                       always_2d=True)
+
+    # Average across channels to obtain mono-channel audio
+    audio = np.mean(audio, axis=-1)
+
+    # Resample the decoded audio
+    audio = resample_audio(audio, native_fs, fs, res_type)
+
+    # Remove the context from the decoded audio
+    offset = sample_start - block_start * block_size
+    audio = audio[offset : offset + num_samples]
+
+    # Normalize the audio using the statistics of the entire file
+    audio = audio / scale
+
+    return audio
+
+
+def parse_jams(jam):
+    """
+    Parse the duration, notes, and pitch contours of JAMS data into arrays.
+
+    Parameters
+    ----------
+    jam : JAMS object or dict
+      JAMS file data (returned as is if it has already been parsed)
+
+    Returns
+    ----------
+    annotations : dict
+      Dictionary containing the duration of the audio and a list of
+      (slice, times, durations, values) tuples for each annotation type,
+      where the values of pitch contours are frequencies (zero if unvoiced)
+    """
+
+    if isinstance(jam, dict):
+        # The data has already been parsed
+        return jam
+
+    # Initialize a dictionary with the duration of the audio associated with the annotations
+    annotations = {'duration' : jam[constants.JAMS_METADATA].duration}
+
+    # Loop through the types of annotations to parse
+    for namespace in [constants.JAMS_NOTE_MIDI, constants.JAMS_PITCH_HZ]:
+        # Initialize a list to hold the parsed annotations of this type
+        annotations[namespace] = list()
+
+        # Loop through the slices of the stack (filtering by namespace directly is
+        # much faster than searching the annotations, which serializes each of them)
+        for slice_data in [ann for ann in jam.annotations if ann.namespace == namespace]:
+            # Extract the label (e.g. guitar string) for this slice
+            label = slice_data.annotation_metadata[constants.JAMS_STRING_IDX]
+
+            # Obtain all of the observations pertaining to this slice
+            observations = list(slice_data.data)
+
+            # Pull the time and duration of every observation at once
+            times = np.array([obs.time for obs in observations], dtype=float)
+            durations = np.array([obs.duration for obs in observations], dtype=float)
+
+            if namespace == constants.JAMS_PITCH_HZ:
+                # Pull the frequency of every observation, replacing unvoiced frequencies with zero
+                values = np.array([obs.value['frequency'] if obs.value['voiced'] else 0
+                                   for obs in observations], dtype=float)
+            else:
+                # Pull the value (e.g. MIDI pitch) of every observation
+                values = np.array([obs.value for obs in observations])
+
+            # Add the parsed slice to the list
+            annotations[namespace].append((label, times, durations, values))
+
+    return annotations
+
+
+def load_jams(jams_path, cache_dir=None):
+    """
+    Load and parse a JAMS file, optionally reusing the parsed data from a binary cache.
+
+    Parameters
+    ----------
+    jams_path : string
+      Path to JAMS file to read
+    cache_dir : string or None (optional)
+      Directory under which to cache the parsed data, which is
+      reused as long as the JAMS file has not been modified since
+
+    Returns
+    ----------
+    annotations : dict
+      Dictionary containing the parsed JAMS data (see parse_jams)
+    """
+
+    if cache_dir is None:
+        # Read and parse the JAMS file
+        return parse_jams(jams.load(jams_path))
+
+    # Construct the path to the cached data
+    cache_path = os.path.join(cache_dir, f'{os.path.splitext(os.path.basename(jams_path))[0]}.{constants.PKL_EXT}')
+
+    # Determine when the JAMS file was last modified
+    mtime = os.path.getmtime(jams_path)
+
+    # Default the cached data to nothing
+    annotations = None
+
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'rb') as cache_file:
+                # Read the cached data along with the modification time of the JAMS file it was parsed from
+                cached = pickle.load(cache_file)
+            if cached['mtime'] == mtime:
+                # The cached data is up-to-date
+                annotations = cached['annotations']
+        except (EOFError, KeyError, pickle.UnpicklingError):
+            # The cache is corrupted and will be overwritten
+            pass
+
+    if annotations is None:
+        # Read and parse the JAMS file
+        annotations = parse_jams(jams.load(jams_path))
+
+        # Make sure the cache directory exists
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Write the parsed data to a unique temporary file and then move it into place, such that concurrent
+        # writers (processes or threads) do not collide and readers never encounter a partially written cache
+        handle, temp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+
+        try:
+            with os.fdopen(handle, 'wb') as cache_file:
+                # Write the parsed data to the temporary file
+                pickle.dump({'mtime' : mtime, 'annotations' : annotations}, cache_file, pickle.HIGHEST_PROTOCOL)
+            # Move the complete file to the cache path
+            os.replace(temp_path, cache_path)
+        finally:
+            if os.path.exists(temp_path):
+                # Clean up if anything went wrong
+                os.remove(temp_path)
+
+    return annotations
+
+
 def extract_stacked_notes_jams(jam):
     """
     Extract MIDI notes spread across slices (e.g. guitar strings) from JAMS data into a dictionary.
 
     Parameters
     ----------
-    jam : JAMS object
-      JAMS file data
+    jam : JAMS object or dict
+      JAMS file data (optionally parsed with parse_jams)
 
     Returns
     ----------
@@ -102,28 +483,16 @@ def extract_stacked_notes_jams(jam):
       Dictionary containing (slice -> (pitches, intervals)) pairs
     """
 
-    # Extract all of the midi note annotations
-    note_data_slices = jam.annotations[constants.JAMS_NOTE_MIDI]
+    # Parse the JAMS data if it has not yet been parsed
+    annotations = parse_jams(jam)
 
     # Initialize a dictionary to hold the notes
     stacked_notes = dict()
 
     # Loop through the slices of the stack
-    for slice_notes in note_data_slices:
-        # Extract the string label for this slice
-        string = slice_notes.annotation_metadata[constants.JAMS_STRING_IDX]
-
-        # Initialize lists to hold the pitches and intervals
-        pitches, intervals = list(), list()
-
-        # Loop through the notes pertaining to this slice
-        for note in slice_notes:
-            # Append the note pitch and interval to the respective list
-            pitches.append(note.value)
-            intervals.append([note.time, note.time + note.duration])
-
-        # Convert the pitch and interval lists to arrays
-        pitches, intervals = np.array(pitches), np.array(intervals)
+    for string, onsets, durations, pitches in annotations[constants.JAMS_NOTE_MIDI]:
+        # Construct the onset-offset pair for each note
+        intervals = np.stack([onsets, onsets + durations], axis=-1)
 
         # Add the pitch-interval pairs to the stacked notes dictionary under the string entry as key
         stacked_notes.update(utils.notes_to_stacked_notes(pitches, intervals, string))
@@ -131,7 +500,7 @@ def extract_stacked_notes_jams(jam):
     return stacked_notes
 
 
-def load_stacked_notes_jams(jams_path):
+def load_stacked_notes_jams(jams_path, cache_dir=None):
     """
     Helper function to load a JAMS file and extract the stacked notes.
 
@@ -139,6 +508,8 @@ def load_stacked_notes_jams(jams_path):
     ----------
     jams_path : string
       Path to JAMS file to read
+    cache_dir : string or None (optional)
+      Directory under which to cache the parsed JAMS data
 
     Returns
     ----------
@@ -147,7 +518,7 @@ def load_stacked_notes_jams(jams_path):
     """
 
     # Load the metadata from the jams file
-    jam = jams.load(jams_path)
+    jam = load_jams(jams_path, cache_dir)
 
     # Extract the stacked notes
     stacked_notes = extract_stacked_notes_jams(jam)
@@ -161,8 +532,8 @@ def extract_notes_jams(jam):
 
     Parameters
     ----------
-    jam : JAMS object
-      JAMS file data
+    jam : JAMS object or dict
+      JAMS file data (optionally parsed with parse_jams)
 
     Returns
     ----------
@@ -183,7 +554,7 @@ def extract_notes_jams(jam):
     return pitches, intervals
 
 
-def load_notes_jams(jams_path):
+def load_notes_jams(jams_path, cache_dir=None):
     """
     Helper function to load a JAMS file and extract the notes.
 
@@ -191,6 +562,8 @@ def load_notes_jams(jams_path):
     ----------
     jams_path : string
       Path to JAMS file to read
+    cache_dir : string or None (optional)
+      Directory under which to cache the parsed JAMS data
 
     Returns
     ----------
@@ -203,7 +576,7 @@ def load_notes_jams(jams_path):
     """
 
     # Load the metadata from the jams file
-    jam = jams.load(jams_path)
+    jam = load_jams(jams_path, cache_dir)
 
     # Extract the notes as loose groups
     pitches, intervals = extract_notes_jams(jam)
@@ -217,8 +590,8 @@ def extract_duration_jams(jam):
 
     Parameters
     ----------
-    jam : JAMS object
-      JAMS file data
+    jam : JAMS object or dict
+      JAMS file data (optionally parsed with parse_jams)
 
     Returns
     ----------
@@ -226,13 +599,17 @@ def extract_duration_jams(jam):
       Total length (seconds) of the audio associated with the annotations
     """
 
-    # Read the meta-data from the jams file
-    duration = jam[constants.JAMS_METADATA].duration
+    if isinstance(jam, dict):
+        # Read the duration from the parsed data
+        duration = jam['duration']
+    else:
+        # Read the meta-data from the jams file
+        duration = jam[constants.JAMS_METADATA].duration
 
     return duration
 
 
-def load_duration_jams(jams_path):
+def load_duration_jams(jams_path, cache_dir=None):
     """
     Helper function to load a JAMS file and extract the duration.
 
@@ -240,6 +617,8 @@ def load_duration_jams(jams_path):
     ----------
     jams_path : string
       Path to JAMS file to read
+    cache_dir : string or None (optional)
+      Directory under which to cache the parsed JAMS data
 
     Returns
     ----------
@@ -248,7 +627,7 @@ def load_duration_jams(jams_path):
     """
 
     # Read the meta-data from the jams file
-    duration = extract_duration_jams(jams.load(jams_path))
+    duration = extract_duration_jams(load_jams(jams_path, cache_dir))
 
     return duration
 
@@ -259,8 +638,8 @@ def extract_stacked_pitch_list_jams(jam, times=None, uniform=True):
 
     Parameters
     ----------
-    jam : JAMS object
-      JAMS file data
+    jam : JAMS object or dict
+      JAMS file data (optionally parsed with parse_jams)
     times : ndarray or None (optional) (N)
       Time in seconds for resampling
       N - number of time samples
@@ -273,48 +652,30 @@ def extract_stacked_pitch_list_jams(jam, times=None, uniform=True):
       Dictionary containing (slice -> (times, pitch_list)) pairs
     """
 
-    # Extract all of the pitch annotations
-    pitch_data_slices = jam.annotations[constants.JAMS_PITCH_HZ]
-
-    # Obtain the number of annotations
-    stack_size = len(pitch_data_slices)
+    # Parse the JAMS data if it has not yet been parsed
+    annotations = parse_jams(jam)
 
     # Initialize a dictionary to hold the pitch lists
     stacked_pitch_list = dict()
 
     # Loop through the slices of the stack
-    for slc in range(stack_size):
-        # Extract the pitch list pertaining to this slice
-        slice_pitches = pitch_data_slices[slc]
-
-        # Extract the string label for this slice
-        string = slice_pitches.annotation_metadata[constants.JAMS_STRING_IDX]
-
-        # Initialize an array/list to hold the times/frequencies associated with each observation
-        entry_times, slice_pitch_list = np.empty(0), list()
-
-        # Loop through the pitch observations pertaining to this slice
-        for pitch in slice_pitches:
-            # Extract the pitch
-            freq = np.array([pitch.value['frequency']])
-
-            # Don't keep track of zero or unvoiced frequencies
-            if np.sum(freq) == 0 or not pitch.value['voiced']:
-                freq = np.empty(0)
+    for string, entry_times, _, frequencies in annotations[constants.JAMS_PITCH_HZ]:
+        # Sort the observations before resampling just in case they are not already sorted
+        sort_order = np.argsort(entry_times)
+        entry_times, frequencies = entry_times[sort_order], frequencies[sort_order]
 
-            # Append the observation time
-            entry_times = np.append(entry_times, pitch.time)
-            # Append the frequency
-            slice_pitch_list.append(freq)
+        # Represent each observation as an array containing its frequency
+        slice_pitch_list = list(frequencies[:, np.newaxis])
 
-        # Sort the pitch list before resampling just in case it is not already sorted
-        entry_times, slice_pitch_list = utils.sort_pitch_list(entry_times, slice_pitch_list)
+        # Don't keep track of zero or unvoiced frequencies
+        for i in np.where(frequencies == 0)[0]:
+            slice_pitch_list[i] = np.empty(0)
 
         if uniform:
             # Align the pitch list with a uniform time grid
             entry_times, slice_pitch_list = utils.time_series_to_uniform(times=entry_times,
                                                                          values=slice_pitch_list,
-                                                                         duration=jam.file_metadata.duration)
+                                                                         duration=annotations['duration'])
 
         if times is not None:
             # Resample the observation times if new times are specified
@@ -328,7 +689,7 @@ def extract_stacked_pitch_list_jams(jam, times=None, uniform=True):
     return stacked_pitch_list
 
 
-def load_stacked_pitch_list_jams(jams_path, times=None, uniform=True):
+def load_stacked_pitch_list_jams(jams_path, times=None, uniform=True, cache_dir=None):
     """
     Helper function to load a JAMS file and extract a stacked pitch list.
 
@@ -341,6 +702,8 @@ def load_stacked_pitch_list_jams(jams_path, times=None, uniform=True):
       N - number of times samples
     uniform : bool
       Whether to place annotations on a uniform time grid
+    cache_dir : string or None (optional)
+      Directory under which to cache the parsed JAMS data
 
     Returns
     ----------
@@ -349,7 +712,7 @@ def load_stacked_pitch_list_jams(jams_path, times=None, uniform=True):
     """
 
     # Load the metadata from the jams file
-    jam = jams.load(jams_path)
+    jam = load_jams(jams_path, cache_dir)
 
     # Extract the stacked pitch list
     stacked_pitch_list = extract_stacked_pitch_list_jams(jam, times, uniform)
@@ -363,8 +726,8 @@ def extract_pitch_list_jams(jam, _times=None, uniform=True):
 
     Parameters
     ----------
-    jam : JAMS object
-      JAMS file data
+    jam : JAMS object or dict
+      JAMS file data (optionally parsed with parse_jams)
     _times : ndarray or None (optional) (N)
       Time in seconds for resampling
       N - number of times samples
@@ -390,7 +753,7 @@ def extract_pitch_list_jams(jam, _times=None, uniform=True):
     return times, pitch_list
 
 
-def load_pitch_list_jams(jams_path, _times=None, uniform=True):
+def load_pitch_list_jams(jams_path, _times=None, uniform=True, cache_dir=None):
     """
     Helper function to load a JAMS file and extract a pitch list.
 
@@ -403,6 +766,8 @@ def load_pitch_list_jams(jams_path, _times=None, uniform=True):
       N - number of times samples
     uniform : bool
       Whether to place annotations on a uniform time grid
+    cache_dir : string or None (optional)
+      Directory under which to cache the parsed JAMS data
 
     Returns
     ----------
@@ -415,7 +780,7 @@ def load_pitch_list_jams(jams_path, _times=None, uniform=True):
     """
 
     # Load the metadata from the jams file
-    jam = jams.load(jams_path)
+    jam = load_jams(jams_path, cache_dir)
 
     # Extract the pitch list
     times, pitch_list = extract_pitch_list_jams(jam, _times, uniform)
@@ -450,8 +815,9 @@ def load_notes_midi(midi_path):
     # Keep track of sustain pedal activity
     sustain_status = False
 
-    # Initialize an empty list to store MIDI events
-    events = []
+    # Initialize empty lists to store the time, pitch (-1 for sustain pedal activity),
+    # velocity, sustain pedal state, and whether sustain ended for each MIDI event
+    times, pitches, velocities, sustains, sustain_offs = [], [], [], [], []
 
     # Loop through MIDI messages, keeping track of only those pertaining to notes and sustain pedal activity
     for message in midi:
@@ -473,58 +839,71 @@ def load_notes_midi(midi_path):
             if sustain_control and sustain_change:
                 # Update the status of the sustain pedal (on/off)
                 sustain_status = sustain_on
-                # Determine which event occurred (SUSTAIN_ON or SUSTAIN_OFF)
-                event_type = constants.MIDI_SUSTAIN_ON if sustain_status else constants.MIDI_SUSTAIN_OFF
-
-                # Create a new event detailing the sustain pedal activity
-                event = dict(index=len(events),
-                             time=time,
-                             type=event_type,
-                             note=None,
-                             velocity=0)
-                # Add the sustain pedal event to the MIDI event list
-                events.append(event)
+
+                # Add an event detailing the sustain pedal activity (never treated as an onset or sustained offset)
+                times.append(time)
+                pitches.append(-1)
+                velocities.append(0)
+                sustains.append(False)
+                sustain_offs.append(not sustain_status)
 
         # Check if the message constitutes a note event (NOTE_ON or NOTE_OFF)
         if 'note' in message.type:
             # MIDI offsets can be either NOTE_OFF events or NOTE_ON with zero velocity
             velocity = message.velocity if message.type == constants.MIDI_NOTE_ON else 0
 
-            # Create a new event detailing the note and current sustain pedal state
-            event = dict(index=len(events),
-                         time=time,
-                         type='note',
-                         note=message.note,
-                         velocity=velocity,
-                         sustain=sustain_status)
-            # Add the note event to the MIDI event list
-            events.append(event)
-
-    # Initialize an empty list to store notes
-    notes = list()
-
-    # Loop through all of the documented MIDI events
-    for i, onset in enumerate(events):
-        # Ignore anything but note onset events (note offsets and sustain activity ignored)
-        if onset['velocity'] == 0:
-            continue
+            # Add an event detailing the note and current sustain pedal state
+            times.append(time)
+            pitches.append(message.note)
+            velocities.append(velocity)
+            sustains.append(sustain_status)
+            sustain_offs.append(False)
+
+    # Convert the event lists to arrays
+    times, pitches, velocities = np.array(times, dtype=float), np.array(pitches), np.array(velocities)
+    sustains, sustain_offs = np.array(sustains, dtype=bool), np.array(sustain_offs, dtype=bool)
+
+    # Determine the number of events
+    num_events = len(times)
+
+    if num_events == 0:
+        # No notes could have been played
+        return np.empty([0, 4])
+
+    # Index of the final event, at which unmatched notes are clipped
+    last_idx = num_events - 1
+
+    # Order the events by pitch, keeping the chronological order of events with the same pitch
+    pitch_order = np.lexsort((np.arange(num_events), pitches))
+    # Determine where consecutive events in this ordering share the same pitch
+    same_pitch = pitches[pitch_order[:-1]] == pitches[pitch_order[1:]]
+
+    # Determine the next event with the same pitch for each event, defaulting to the final event
+    next_same_pitch = np.full(num_events, last_idx)
+    next_same_pitch[pitch_order[:-1][same_pitch]] = pitch_order[1:][same_pitch]
+
+    # Determine the next event where the sustain pedal is released for each event, defaulting to the final event
+    sustain_off_idcs = np.append(np.where(sustain_offs)[0], last_idx)
+    next_sustain_off = sustain_off_idcs[np.searchsorted(sustain_off_idcs, np.arange(num_events), side='right')
+                                        .clip(max=len(sustain_off_idcs) - 1)]
+
+    # Only note events with nonzero velocity constitute onsets
+    onset_idcs = np.where((pitches >= 0) & (velocities > 0))[0]
 
-        # Determine where the corresponding offset occurs
-        # by finding the next note event with the same pitch,
-        # clipping at the final frame if no correspondence is found
-        offset = next(n for n in events[i + 1:] if n['note'] == onset['note'] or n is events[-1])
+    # The corresponding offset is the next note event with the same pitch,
+    # clipping at the final event if no correspondence is found
+    offset_idcs = next_same_pitch[onset_idcs]
 
-        # Check if the sustain pedal is on when the note offset occurs
-        if offset['sustain'] and offset is not events[-1]:
-            # If so, offset is when sustain ends or another note event of same pitch occurs
-            offset = next(n for n in events[offset['index'] + 1:] if n['type'] == constants.MIDI_SUSTAIN_OFF or
-                          n['note'] == onset['note'] or n is events[-1])
+    # Determine which offsets occur while the sustain pedal is on
+    sustained = sustains[offset_idcs] & (offset_idcs != last_idx)
 
-        # Create a new note entry and append it to the list of notes
-        notes.append([onset['time'], offset['time'], onset['note'], onset['velocity']])
+    # If so, offset is when sustain ends or another note event of same pitch occurs
+    offset_idcs[sustained] = np.minimum(next_sustain_off[offset_idcs[sustained]],
+                                        next_same_pitch[offset_idcs[sustained]])
 
     # Package the notes into an array
-    notes = np.array(notes)
+    notes = np.stack([times[onset_idcs], times[offset_idcs],
+                      pitches[onset_idcs], velocities[onset_idcs]], axis=-1).astype(float)
 
     return notes
 
@@ -5,16 +5,20 @@ from . import constants
 
 # Regular imports
 from datetime import datetime
-from copy import deepcopy
+from copy import deepcopy, copy
 from scipy import signal
 
 import numpy as np
 import warnings
 import librosa
+import tempfile
 import random
+import shutil
 import torch
 import scipy
+import json
 import time
+import os
 
 
 # TODO - torch Tensor compatibility
@@ -32,6 +36,7 @@ __all__ = [
     'slice_batched_notes',
     'multi_pitch_to_notes',
     'batched_notes_to_notes',
+    'slice_notes',
     'stacked_notes_to_notes',
     'notes_to_hz',
     'notes_to_midi',
@@ -90,7 +95,14 @@ __all__ = [
     'sort_batched_notes',
     'sort_notes',
     'sort_pitch_list',
+    'index_notes',
+    'index_batched_notes',
+    'index_pitch_list',
+    'get_index_range',
     'rms_norm',
+    'get_normalization_scale',
+    'quantize_features',
+    'dequantize_features',
     'blur_activations',
     'normalize_activations',
     'threshold_activations',
@@ -110,6 +122,9 @@ __all__ = [
     'array_to_tensor',
     'save_dict_npz',
     'load_dict_npz',
+    'save_json',
+    'save_dict_npy',
+    'load_dict_npy',
     'dict_to_dtype',
     'dict_to_device',
     'dict_to_array',
@@ -319,7 +334,7 @@ def batched_notes_to_midi(batched_notes):
     return batched_notes
 
 
-def slice_batched_notes(batched_notes, start_time, stop_time, relative_times=False):
+def slice_batched_notes(batched_notes, start_time, stop_time, relative_times=False, index=None):
     """
     Remove note entries occurring outside of time window.
 
@@ -334,6 +349,9 @@ def slice_batched_notes(batched_notes, start_time, stop_time, relative_times=Fal
       End of time window
     relative_times : bool
       Whether onsets/offsets should be relative to time origin
+    index : ndarray (2 x N) or None (optional)
+      Precomputed index for the notes (see index_notes),
+      used to only consider notes near the time window
 
     Returns
     ----------
@@ -342,6 +360,12 @@ def slice_batched_notes(batched_notes, start_time, stop_time, relative_times=Fal
       N - number of notes
     """
 
+    if index is not None:
+        # Narrow down the notes to those which can overlap with the time window
+        start_idx = np.searchsorted(index[0], start_time, side='right')
+        stop_idx = np.searchsorted(index[1], stop_time, side='right')
+        batched_notes = batched_notes[start_idx : stop_idx]
+
     # Remove notes with offsets before the slice start time
     batched_notes = batched_notes[batched_notes[:, 1] > start_time]
 
@@ -497,6 +521,56 @@ def batched_notes_to_notes(batched_notes):
     return pitches, intervals
 
 
+def slice_notes(pitches, intervals, start_time, stop_time, relative_times=False, index=None):
+    """
+    Remove notes occurring outside of time window.
+
+    Parameters
+    ----------
+    pitches : ndarray (N)
+      Array of pitches corresponding to notes
+      N - number of notes
+    intervals : ndarray (N x 2)
+      Array of onset-offset time pairs corresponding to notes
+      N - number of notes
+    start_time : float
+      Beginning of time window
+    stop_time : float
+      End of time window
+    relative_times : bool
+      Whether onsets/offsets should be relative to time origin
+    index : ndarray (2 x N) or None (optional)
+      Precomputed index for the notes (see index_notes),
+      used to only consider notes near the time window
+
+    Returns
+    ----------
+    pitches : ndarray (L)
+      Array of pitches corresponding to notes
+      L - number of notes
+    intervals : ndarray (L x 2)
+      Array of onset-offset time pairs corresponding to notes
+      L - number of notes
+    """
+
+    if index is not None:
+        # Narrow down the notes to those which can overlap with the time window
+        start_idx = np.searchsorted(index[0], start_time, side='right')
+        stop_idx = np.searchsorted(index[1], stop_time, side='right')
+        pitches, intervals = pitches[start_idx : stop_idx], intervals[start_idx : stop_idx]
+
+    # Convert the notes to batched notes
+    batched_notes = notes_to_batched_notes(pitches, intervals)
+
+    # Slice the batched notes
+    batched_notes = slice_batched_notes(batched_notes, start_time, stop_time, relative_times)
+
+    # Convert back to standard note groups
+    pitches, intervals = batched_notes_to_notes(batched_notes)
+
+    return pitches, intervals
+
+
 def stacked_notes_to_notes(stacked_notes, sort_by=0):
     """
     Convert a dictionary of stacked notes into a single representation.
@@ -1123,7 +1197,7 @@ def pitch_list_to_midi(pitch_list):
     return pitch_list
 
 
-def slice_pitch_list(times, pitch_list, start_time, stop_time):
+def slice_pitch_list(times, pitch_list, start_time, stop_time, index=None):
     """
     Retain pitch observations within a time window.
 
@@ -1139,6 +1213,9 @@ def slice_pitch_list(times, pitch_list, start_time, stop_time):
       Earliest time for observations to keep
     stop_time : float
       Latest time for observations to keep
+    index : ndarray (2 x N) or None (optional)
+      Precomputed index for the pitch list (see index_pitch_list),
+      used to only consider observations near the time window
 
     Returns
     ----------
@@ -1150,10 +1227,20 @@ def slice_pitch_list(times, pitch_list, start_time, stop_time):
       L - number of pitch observations (frames)
     """
 
+    # Default the range of observations to consider to the entire pitch list
+    start_idx, stop_idx = 0, len(times)
+
+    if index is not None:
+        # Narrow down the observations to those which can be within the time window
+        start_idx = np.searchsorted(index[0], start_time, side='left')
+        stop_idx = max(start_idx, np.searchsorted(index[1], stop_time, side='right'))
+
     # Obtain a collection of valid indices for the slicing
-    valid_idcs = np.logical_and((times >= start_time), (times <= stop_time))
+    valid_idcs = np.logical_and((times[start_idx : stop_idx] >= start_time),
+                                (times[start_idx : stop_idx] <= stop_time))
     # Throw away observations occurring before the start time and after the stop time
-    times, pitch_list = times[valid_idcs], [pitch_list[idx] for idx in np.where(valid_idcs)[0]]
+    times, pitch_list = times[start_idx : stop_idx][valid_idcs], \
+                        [pitch_list[start_idx + idx] for idx in np.where(valid_idcs)[0]]
 
     return times, pitch_list
 
@@ -2781,6 +2868,135 @@ def sort_pitch_list(times, pitch_list):
     return times, pitch_list
 
 
+##################################################
+# INDEXING                                       #
+##################################################
+
+
+def index_notes(pitches, intervals):
+    """
+    Construct an index which allows for notes overlapping with a time window to be found
+    through binary search. The index consists of the running maximum of the offsets and
+    the running minimum (from the end) of the onsets. All notes before the first running
+    maximum offset exceeding the window start end before the window, and all notes from
+    the first running minimum onset exceeding the window stop begin after the window.
+
+    Parameters
+    ----------
+    pitches : ndarray (N)
+      Array of pitches corresponding to notes
+      N - number of notes
+    intervals : ndarray (N x 2)
+      Array of onset-offset time pairs corresponding to notes
+      N - number of notes
+
+    Returns
+    ----------
+    index : ndarray (2 x N)
+      Running maximum offset and reverse running minimum onset for each note
+      N - number of notes
+    """
+
+    # Compute the running maximum of the offsets
+    max_offsets = np.maximum.accumulate(intervals[:, 1]) if len(pitches) else np.empty(0)
+
+    # Compute the running minimum of the onsets, starting from the last note
+    min_onsets = np.flip(np.minimum.accumulate(np.flip(intervals[:, 0]))) if len(pitches) else np.empty(0)
+
+    # Combine the running extrema into a single array
+    index = np.array([max_offsets, min_onsets])
+
+    return index
+
+
+def index_batched_notes(batched_notes):
+    """
+    Construct an index for batched notes (see index_notes).
+
+    Parameters
+    ----------
+    batched_notes : ndarray (N x 3)
+      Array of note intervals and pitches by row
+      N - number of notes
+
+    Returns
+    ----------
+    index : ndarray (2 x N)
+      Running maximum offset and reverse running minimum onset for each note
+      N - number of notes
+    """
+
+    # Split the batched notes into loose groups and construct the index
+    index = index_notes(*batched_notes_to_notes(batched_notes))
+
+    return index
+
+
+def index_pitch_list(times, pitch_list):
+    """
+    Construct an index which allows for pitch observations within a time window
+    to be found through binary search (analogous to index_notes). For a pitch list
+    with sorted times, the index simply consists of two copies of the times.
+
+    Parameters
+    ----------
+    times : ndarray (N)
+      Time in seconds of beginning of each frame
+      N - number of time samples (frames)
+    pitch_list : list of ndarray (N x [...])
+      Array of pitches active during each frame
+      N - number of pitch observations (frames)
+
+    Returns
+    ----------
+    index : ndarray (2 x N)
+      Running maximum time and reverse running minimum time for each observation
+      N - number of pitch observations (frames)
+    """
+
+    # Compute the running maximum of the times
+    max_times = np.maximum.accumulate(times) if len(times) else np.empty(0)
+
+    # Compute the running minimum of the times, starting from the last observation
+    min_times = np.flip(np.minimum.accumulate(np.flip(times))) if len(times) else np.empty(0)
+
+    # Combine the running extrema into a single array
+    index = np.array([max_times, min_times])
+
+    return index
+
+
+def get_index_range(index, start_time, stop_time):
+    """
+    Determine the range of (indexed) notes which may overlap with a closed time
+    window, including any notes which end exactly at the start of the window.
+
+    Parameters
+    ----------
+    index : ndarray (2 x N)
+      Running maximum offset and reverse running minimum onset for each note
+      N - number of notes
+    start_time : float
+      Beginning of the time window
+    stop_time : float
+      End of the time window
+
+    Returns
+    ----------
+    start_idx : int
+      Index of the first note which may overlap with the window
+    stop_idx : int
+      Index after the last note which may overlap with the window
+    """
+
+    # Skip the notes which all end before the window begins
+    start_idx = np.searchsorted(index[0], start_time, side='left')
+    # Skip the notes which all begin after the window ends
+    stop_idx = np.searchsorted(index[1], stop_time, side='right')
+
+    return start_idx, stop_idx
+
+
 ##################################################
 # DATA MANIPULATION                              #
 ##################################################
@@ -2814,6 +3030,115 @@ def rms_norm(audio):
     return audio
 
 
+def get_normalization_scale(audio, norm=-1):
+    """
+    Determine the factor by which audio would be divided when normalized.
+
+    Parameters
+    ----------
+    audio : ndarray (N)
+      Mono-channel audio
+      N - number of samples in audio
+    norm : float or None
+      Type of normalization to perform
+      -1 - root-mean-square
+      See librosa for others...
+        - None case is handled here
+
+    Returns
+    ----------
+    scale : float
+      Normalization factor for the audio
+    """
+
+    if norm == -1:
+        # Calculate the square root of the squared mean
+        scale = np.sqrt(np.mean(audio ** 2))
+        # Audio which is all zeros is not normalized
+        threshold = 0
+    elif norm is None:
+        # No normalization is performed
+        scale, threshold = 1, 0
+    else:
+        # Calculate the norm in the same manner as librosa
+        scale = np.linalg.norm(audio, ord=norm)
+        # Audio with an insignificant norm is not normalized
+        threshold = librosa.util.tiny(audio)
+
+    if not scale > threshold:
+        # Leave the audio as is
+        scale = 1
+
+    # Convert to a built-in type
+    scale = float(scale)
+
+    return scale
+
+
+def quantize_features(feats, dtype=None):
+    """
+    Convert features to a compact type for storage.
+
+    Parameters
+    ----------
+    feats : ndarray
+      Calculated features
+    dtype : string or None (optional)
+      Type in which to store the features
+      None - leave the features as they are
+      'float16' - half-precision
+      'uint8' - 256 uniform levels between 0 and 1 (e.g. for dB features scaled by FeatureModule.post_proc),
+                which is only appropriate if FeatureModule.query_unit_range() holds for the features
+
+    Returns
+    ----------
+    feats : ndarray
+      Features in the chosen type
+    """
+
+    if dtype is None or not isinstance(feats, np.ndarray):
+        # Leave the features as they are
+        return feats
+
+    if np.dtype(dtype) == np.uint8:
+        # Map the range [0, 1] (clipping anything outside) to the integers 0 through 255
+        feats = np.round(np.clip(feats, 0, 1) * 255).astype(np.uint8)
+    else:
+        # Reduce the precision of the features
+        feats = feats.astype(dtype)
+
+    return feats
+
+
+def dequantize_features(feats):
+    """
+    Convert features stored in a compact type (see quantize_features) back to single-precision.
+
+    Parameters
+    ----------
+    feats : ndarray
+      Features as stored
+
+    Returns
+    ----------
+    feats : ndarray
+      Features as single-precision floats
+    """
+
+    if not isinstance(feats, np.ndarray):
+        # Leave the features as they are
+        return feats
+
+    if feats.dtype == np.uint8:
+        # Map the integers 0 through 255 back to the range [0, 1]
+        feats = feats.astype(np.float32) / 255
+    elif feats.dtype == np.float16:
+        # Restore single-precision
+        feats = feats.astype(np.float32)
+
+    return feats
+
+
 def blur_activations(activations, kernel=None, normalize=False, threshold=False):
     """
     Blur activations by convolving them with a kernel.
@@ -3278,16 +3603,20 @@ def time_series_to_uniform(times, values, hop_length=None, duration=None, suppre
 
     # Attempt to fill in blank frames with the appropriate value
     empty_fill = np.array([])
-    new_values = [empty_fill] * num_entries
     new_times = hop_length * np.arange(num_entries)
 
     # Determine which indices the provided observations fall under
     idcs = np.round(times / hop_length).astype(int)
 
+    # Ignore observations occurring after the specified duration
+    valid = np.asarray(times) <= duration
+
+    # Determine which observation fills each location (the latest observation wins if several collide)
+    sources = np.full(num_entries, -1)
+    np.maximum.at(sources, idcs[valid], np.arange(len(idcs))[valid])
+
     # Fill the observed values into their respective locations in the uniform series
-    for i in range(len(idcs)):
-        if times[i] <= duration:
-            new_values[idcs[i]] = values[i]
+    new_values = [empty_fill if i < 0 else values[i] for i in sources]
 
     return new_times, new_values
 
@@ -3323,7 +3652,7 @@ def get_frame_times(duration, sample_rate, hop_length):
     return times
 
 
-def apply_func_stacked_representation(stacked_representation, func, **kwargs):
+def apply_func_stacked_representation(stacked_representation, func, deep=True, **kwargs):
     """
     Recursively apply a function to the contents of each slice in a stacked representation.
     TODO - this can be probably be used in many places to avoid extra code
@@ -3334,6 +3663,9 @@ def apply_func_stacked_representation(stacked_representation, func, **kwargs):
         Dictionary representing some stacked data structure
     func : function
         Function to run on each slice
+    deep : bool
+        Whether to copy the contents of each slice before running the function, which
+        can be skipped if the function does not modify its arguments in place
     kwargs : dict of keyword arguments
         Arguments for the chosen function
 
@@ -3343,8 +3675,9 @@ def apply_func_stacked_representation(stacked_representation, func, **kwargs):
         Dictionary representing some modified stacked data structure
     """
 
-    # Make a copy of the stacked representation
-    stacked_representation = deepcopy(stacked_representation)
+    # Make a copy of the stacked representation (only the dictionary itself
+    # if the contents of each slice will not be modified by the function)
+    stacked_representation = deepcopy(stacked_representation) if deep else copy(stacked_representation)
 
     # Loop through the stack
     for slc in stacked_representation.keys():
@@ -3468,6 +3801,8 @@ def array_to_tensor(data, device=None):
 def save_dict_npz(path, d):
     """
     Simple helper function to save a dictionary as a compressed NumPy zip file.
+    The file is written under a temporary name and then moved into place, such
+    that concurrent readers never encounter a partially written file.
 
     Parameters
     ----------
@@ -3477,8 +3812,23 @@ def save_dict_npz(path, d):
       Dictionary of entries to save
     """
 
-    # Save the dictionary as a NumPy zip at the specified path
-    np.savez_compressed(path, **d)
+    # NumPy will add the extension if it is missing
+    if not path.endswith(f'.{constants.NPZ_EXT}'):
+        path = f'{path}.{constants.NPZ_EXT}'
+
+    # Create a unique temporary file alongside the final destination
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+
+    try:
+        with os.fdopen(handle, 'wb') as npz_file:
+            # Save the dictionary as a NumPy zip to the temporary file
+            np.savez_compressed(npz_file, **d)
+        # Move the complete file to the specified path
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            # Clean up if anything went wrong
+            os.remove(temp_path)
 
 
 def load_dict_npz(path):
@@ -3502,7 +3852,141 @@ def load_dict_npz(path):
     return data
 
 
-def dict_to_dtype(track, dtype):
+def save_json(path, contents):
+    """
+    Write contents to a JSON file. The file is written under a unique temporary name
+    and then moved into place, such that concurrent readers never encounter a partially
+    written file and concurrent writers (threads or processes) never share a temporary file.
+
+    Parameters
+    ----------
+    path : string
+      Path to the JSON file
+    contents : dict or list
+      Contents to write
+    """
+
+    # Create a unique temporary file alongside the final destination
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+
+    try:
+        with os.fdopen(handle, 'w') as json_file:
+            # Write the contents to the temporary file
+            json.dump(contents, json_file, indent=2)
+        # Move the complete file to the specified path
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            # Clean up if anything went wrong
+            os.remove(temp_path)
+
+
+def save_dict_npy(path, d):
+    """
+    Save a dictionary as a directory of raw NumPy arrays, which can be
+    memory-mapped when loaded, alongside a JSON sidecar describing the entries.
+    The directory is populated under a temporary name and then moved into place.
+
+    Parameters
+    ----------
+    path : string
+      Path to the directory in which to save the arrays
+    d : dict
+      Dictionary of entries to save
+    """
+
+    # Make sure the directory containing the final destination exists
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    # Save everything to a unique temporary directory alongside the final destination
+    final_path, path = path, tempfile.mkdtemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+
+    # Initialize a dictionary to describe the saved entries
+    entries = dict()
+
+    # Loop through the dictionary keys
+    for key, value in d.items():
+        # Treat the entry as a NumPy array (scalars become zero-dimensional arrays)
+        value = np.asarray(value) if not isinstance(value, np.ndarray) else value
+
+        if value.ndim == 0 and value.dtype != object:
+            # Keep scalars directly within the sidecar
+            entries[key] = {'value' : value.item()}
+        elif value.ndim == 0 and value.item() is None:
+            # Keep empty entries directly within the sidecar
+            entries[key] = {'value' : None}
+        else:
+            # Construct a file name for the array
+            file_name = f'{key}.{constants.NPY_EXT}'
+            # Save the array as a raw NumPy file
+            np.save(os.path.join(path, file_name), value)
+            # Arrays containing Python objects cannot be memory-mapped
+            entries[key] = {'file' : file_name, 'mmap' : value.dtype != object}
+
+    # Write the description of the entries to the sidecar
+    with open(os.path.join(path, f'{constants.SIDECAR_NAME}.{constants.JSON_EXT}'), 'w') as sidecar:
+        json.dump(entries, sidecar)
+
+    # Create a unique (empty) directory under which to set aside any previously saved entries
+    old_path = tempfile.mkdtemp(dir=os.path.dirname(final_path) or '.', suffix='.old')
+
+    try:
+        # Move any previously saved entries aside, rather than deleting them before they are replaced
+        os.replace(final_path, old_path)
+    except OSError:
+        # There were no previously saved entries (or they were concurrently moved by another thread or process)
+        pass
+
+    try:
+        # Move the complete directory to the specified path
+        os.replace(path, final_path)
+    except OSError:
+        # The entries were concurrently saved by another thread or process
+        shutil.rmtree(path, ignore_errors=True)
+
+    # Remove the previously saved entries (if any) now that they have been replaced
+    shutil.rmtree(old_path, ignore_errors=True)
+
+
+def load_dict_npy(path, mmap_mode='r'):
+    """
+    Load a dictionary saved as a directory of raw NumPy arrays.
+
+    Parameters
+    ----------
+    path : string
+      Path to the directory containing the arrays
+    mmap_mode : string or None (optional)
+      Memory-mapping mode for the arrays (see numpy.load) - None to read arrays into memory
+
+    Returns
+    ----------
+    data : dict
+      Unpacked dictionary
+    """
+
+    # Read the description of the entries from the sidecar
+    with open(os.path.join(path, f'{constants.SIDECAR_NAME}.{constants.JSON_EXT}'), 'r') as sidecar:
+        entries = json.load(sidecar)
+
+    # Initialize a dictionary to hold the entries
+    data = dict()
+
+    # Loop through the described entries
+    for key, entry in entries.items():
+        if 'value' in entry:
+            # Wrap scalars as zero-dimensional arrays (consistent with NumPy zip files)
+            data[key] = np.array(entry['value'])
+        else:
+            # Only memory-map arrays which support it
+            array_mmap_mode = mmap_mode if entry['mmap'] else None
+            # Open the array, which will only be read from disk when accessed if memory-mapped
+            data[key] = np.load(os.path.join(path, entry['file']), mmap_mode=array_mmap_mode, allow_pickle=True)
+
+    return data
+
+
+def dict_to_dtype(track, dtype, deep=True):
     """
     Convert all ndarray entries in a dictionary to a specified type.
 
@@ -3513,6 +3997,9 @@ def dict_to_dtype(track, dtype):
     dtype : string or type
       TODO - will type work?
       Ndarray dtype to convert
+    deep : bool
+      Whether to copy all entries of the dictionary, rather than only
+      the dictionary itself (converted entries are always new arrays)
 
     Returns
     ----------
@@ -3521,7 +4008,7 @@ def dict_to_dtype(track, dtype):
     """
 
     # Copy the dictionary to avoid hard assignment
-    track = deepcopy(track)
+    track = deepcopy(track) if deep else copy(track)
 
     # Obtain a list of the dictionary keys
     keys = list(track.keys())
@@ -3531,7 +4018,7 @@ def dict_to_dtype(track, dtype):
         # Check if the entry is another dictionary
         if isinstance(track[key], dict):
             # Call this function recursively
-            track[key] = dict_to_dtype(track[key], dtype)
+            track[key] = dict_to_dtype(track[key], dtype, deep)
         # Check if the dictionary entry is an ndarray
         elif isinstance(track[key], np.ndarray):
             # Convert the ndarray to the specified type
@@ -3905,7 +4392,7 @@ def get_tag(tag=None):
     return tag
 
 
-def slice_track(track, start, stop, skip=None, pad=True):
+def slice_track(track, start, stop, skip=None, pad=True, deep=True):
     """
     Slice any ndarray or tensor entries of a dictionary along the last axis.
 
@@ -3921,6 +4408,9 @@ def slice_track(track, start, stop, skip=None, pad=True):
       Keys to skip during this process
     pad : bool
       Whether to pad to implicit size (stop - start) when necessary
+    deep : bool
+      Whether to copy all entries of the dictionary, rather than only the dictionary itself,
+      in which case sliced entries are views of the (potentially memory-mapped) original arrays
 
     Returns
     ----------
@@ -3933,7 +4423,7 @@ def slice_track(track, start, stop, skip=None, pad=True):
         skip = list()
 
     # Copy the dictionary to avoid hard assignment
-    track = deepcopy(track)
+    track = deepcopy(track) if deep else copy(track)
 
     # Obtain a list of the dictionary keys
     keys = list(track.keys())
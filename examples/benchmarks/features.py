@@ -0,0 +1,303 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.features import STFT, MelSpec, CQT, VQT, HVQT, HCQT, SignalPower, FeatureCombo, AudioStream
+
+# Regular imports
+import numpy as np
+import tracemalloc
+import librosa
+import json
+import time
+
+# Benchmark parameters
+sample_rates = [16000, 22050, 44100]
+hop_lengths = [256, 512]
+durations = [10, 60] # seconds (full-track processing)
+stream_duration = 5 # seconds (per-hop streaming)
+num_trials = 3
+harmonics = [0.5, 1, 2, 3, 4, 5]
+bins_per_octave = 12
+# Path to a JSON file in which to save the results for later comparison (None to skip)
+results_path = None
+
+# Lowest center frequency of the variable-Q modules
+fmin = librosa.note_to_hz('C1')
+
+# Construct a sum of sinusoids, all of which lie below the Nyquist frequency of every sample rate
+rng = np.random.RandomState(0)
+frequencies = rng.uniform(50, 0.45 * min(sample_rates), size=32)
+phases = rng.uniform(0, 2 * np.pi, size=32)
+
+
+def synthesize(sample_rate, duration):
+    """
+    Sample the sum of sinusoids (plus a little noise) at a given sampling rate.
+
+    Parameters
+    ----------
+    sample_rate : int
+      Number of samples per second
+    duration : float
+      Number of seconds of audio
+
+    Returns
+    ----------
+    audio : ndarray (N)
+      Synthesized audio
+      N - number of samples
+    """
+
+    # Determine the time of each sample
+    times = np.arange(int(np.ceil(duration * sample_rate))) / sample_rate
+    # Sum the sinusoids and scale the result to avoid clipping
+    audio = np.sum(np.sin(2 * np.pi * frequencies[:, None] * times + phases[:, None]), axis=0) / 32
+    # Add some noise, such that every frequency bin has energy
+    audio += 0.01 * rng.randn(len(audio))
+
+    return audio.astype(np.float32)
+
+
+def get_num_bins(sample_rate, max_harmonic=1):
+    """
+    Determine how many variable-Q bins (up to 7 octaves) fit below the
+    Nyquist frequency for the highest harmonic of a transform.
+
+    Parameters
+    ----------
+    sample_rate : int
+      Number of samples per second
+    max_harmonic : int or float
+      Highest harmonic of the transform
+
+    Returns
+    ----------
+    n_bins : int
+      Number of frequency bins, starting at fmin
+    """
+
+    # Leave some room for the bandwidth of the highest filter
+    n_bins = int(np.floor(bins_per_octave * np.log2(0.45 * sample_rate / (max_harmonic * fmin))))
+    # Do not exceed 7 octaves
+    n_bins = min(n_bins, 7 * bins_per_octave)
+
+    return n_bins
+
+
+def get_modules(sample_rate, hop_length):
+    """
+    Instantiate each feature extraction module for a given configuration.
+
+    Parameters
+    ----------
+    sample_rate : int
+      Number of samples per second
+    hop_length : int
+      Number of samples between frames
+
+    Returns
+    ----------
+    modules : dict
+      Feature extraction modules keyed by name
+    """
+
+    # Determine the number of variable-Q bins for single and harmonic transforms
+    n_bins = get_num_bins(sample_rate)
+    n_bins_h = get_num_bins(sample_rate, max(harmonics))
+
+    # Keyword arguments shared by the variable-Q modules
+    vq_kwargs = dict(sample_rate=sample_rate, hop_length=hop_length, fmin=fmin, bins_per_octave=bins_per_octave)
+
+    modules = {
+        'STFT' : STFT(sample_rate=sample_rate, hop_length=hop_length, n_fft=2048),
+        'MelSpec' : MelSpec(sample_rate=sample_rate, hop_length=hop_length, n_fft=2048, n_mels=229),
+        'CQT' : CQT(n_bins=n_bins, **vq_kwargs),
+        'VQT' : VQT(n_bins=n_bins, **vq_kwargs),
+        'HVQT' : HVQT(harmonics=list(harmonics), n_bins=n_bins_h, **vq_kwargs),
+        'HCQT' : HCQT(harmonics=list(harmonics), n_bins=n_bins_h, **vq_kwargs),
+        'SignalPower' : SignalPower(sample_rate=sample_rate, hop_length=hop_length, win_length=2048),
+        # Modules with the same number of bins and frames, which share the downsampled audio
+        'FeatureCombo' : FeatureCombo([CQT(n_bins=n_bins, **vq_kwargs), VQT(n_bins=n_bins, **vq_kwargs)])
+    }
+
+    return modules
+
+
+def measure_peak_memory(function):
+    """
+    Determine the peak amount of memory allocated (by Python and NumPy) while calling a function.
+
+    Parameters
+    ----------
+    function : callable
+      Function to call without arguments
+
+    Returns
+    ----------
+    peak : float
+      Peak memory in megabytes
+    """
+
+    # Track allocations only while calling the function, since tracing slows everything down
+    tracemalloc.start()
+    function()
+    # Obtain the peak amount of traced memory
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Convert to megabytes
+    peak = peak / 2 ** 20
+
+    return peak
+
+
+def benchmark_full_track(module, audio):
+    """
+    Time the computation of features for a full track with a single call to process_audio.
+
+    Parameters
+    ----------
+    module : FeatureModule
+      Feature extraction module to benchmark
+    audio : ndarray (N)
+      Audio to process
+      N - number of samples
+
+    Returns
+    ----------
+    elapsed : float
+      Fastest time (in seconds) across trials
+    peak : float
+      Peak memory in megabytes
+    """
+
+    elapsed = list()
+    for _ in range(num_trials):
+        # Time the computation of the features
+        start = time.perf_counter()
+        module.process_audio(audio)
+        elapsed.append(time.perf_counter() - start)
+
+    # Measure the peak memory during a separate (untimed) call
+    peak = measure_peak_memory(lambda: module.process_audio(audio))
+
+    return min(elapsed), peak
+
+
+def stream_features(stream):
+    """
+    Acquire every frame of features from an audio stream, timing each call.
+
+    Parameters
+    ----------
+    stream : AudioStream
+      Stream from which to acquire features
+
+    Returns
+    ----------
+    latencies : ndarray (K)
+      Time (in seconds) taken to acquire each frame of features
+      K - number of frames
+    """
+
+    # Rewind the stream to the beginning of the audio
+    stream.reset_stream()
+    stream.start_streaming()
+
+    latencies = list()
+    while not stream.query_finished():
+        # Time the acquisition of the next frame of features
+        start = time.perf_counter()
+        stream.extract_frame_features()
+        latencies.append(time.perf_counter() - start)
+
+    stream.stop_streaming()
+
+    return np.array(latencies)
+
+
+def benchmark_streaming(module, audio):
+    """
+    Time the computation of features one hop at a time, as done by AudioStream.
+
+    Parameters
+    ----------
+    module : FeatureModule
+      Feature extraction module to benchmark
+    audio : ndarray (N)
+      Audio to stream
+      N - number of samples
+
+    Returns
+    ----------
+    latencies : ndarray (K)
+      Time (in seconds) taken for each call
+      K - number of calls
+    peak : float
+      Peak memory in megabytes
+    """
+
+    # Stream the audio as fast as possible (i.e. not in real-time)
+    stream = AudioStream(module, audio=audio, real_time=False, playback=False)
+
+    # Time each call during the fastest pass across trials
+    latencies = min([stream_features(stream) for _ in range(num_trials)], key=np.sum)
+
+    # Measure the peak memory during a separate (untimed) pass
+    peak = measure_peak_memory(lambda: stream_features(stream))
+
+    return latencies, peak
+
+
+# Initialize a list to hold the results
+results = list()
+
+for sample_rate in sample_rates:
+    # Synthesize the audio for each duration
+    full_audio = {duration : synthesize(sample_rate, duration) for duration in durations}
+    stream_audio = synthesize(sample_rate, stream_duration)
+
+    for hop_length in hop_lengths:
+        # Determine the amount of time spanned by each hop
+        hop_time = hop_length / sample_rate
+
+        print(f'{sample_rate} Hz, hop length {hop_length} ({1000 * hop_time:.1f} ms per hop)')
+        print(f'  {"":<14}' + ''.join([f'{f"RTF ({d} s)":>12}' for d in durations]) +
+              f'{"peak (MB)":>11}   {"mean (ms)":>10}{"p95 (ms)":>10}{"max (ms)":>10}{"RTF":>8}{"peak (MB)":>11}')
+
+        for name, module in get_modules(sample_rate, hop_length).items():
+            # Process a short piece of audio once, such that any one-time setup is not measured
+            module.process_audio(stream_audio)
+
+            # Benchmark full-track processing for each duration
+            full_track = {duration : benchmark_full_track(module, full_audio[duration]) for duration in durations}
+            # Real-time factor is the processing time divided by the duration of the audio
+            full_rtf = [full_track[d][0] / d for d in durations]
+            # Report the peak memory for the longest duration
+            full_peak = full_track[max(durations)][1]
+
+            # Benchmark per-hop streaming
+            latencies, stream_peak = benchmark_streaming(module, stream_audio)
+            # Real-time factor is the processing time per call divided by the time spanned by each hop
+            stream_rtf = np.mean(latencies) / hop_time
+
+            print(f'  {name:<14}' + ''.join([f'{rtf:12.4f}' for rtf in full_rtf]) + f'{full_peak:11.1f}   ' +
+                  f'{1000 * np.mean(latencies):10.3f}{1000 * np.percentile(latencies, 95):10.3f}' +
+                  f'{1000 * np.max(latencies):10.3f}{stream_rtf:8.3f}{stream_peak:11.1f}')
+
+            # Keep track of the results for the configuration
+            results.append({'module' : name,
+                            'sample_rate' : sample_rate,
+                            'hop_length' : hop_length,
+                            'full_track' : {str(d) : {'rtf' : full_track[d][0] / d,
+                                                      'peak_mb' : full_track[d][1]} for d in durations},
+                            'streaming' : {'mean_ms' : 1000 * np.mean(latencies),
+                                           'p95_ms' : 1000 * np.percentile(latencies, 95),
+                                           'max_ms' : 1000 * np.max(latencies),
+                                           'rtf' : stream_rtf,
+                                           'peak_mb' : stream_peak}})
+
+if results_path is not None:
+    with open(results_path, 'w') as results_file:
+        # Save the results, e.g. to compare across commits or machines
+        json.dump(results, results_file, indent=2)
@@ -0,0 +1,88 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+import amt_tools.tools as tools
+
+# Regular imports
+import soundfile as sf
+import numpy as np
+import tempfile
+import shutil
+import time
+import os
+
+# Benchmark parameters
+native_rate = 44100
+target_rates = [22050, 16000]
+duration = 60 # seconds
+num_trials = 3
+res_types = ['kaiser_best', 'kaiser_fast', 'soxr_hq', 'polyphase']
+
+# Create a temporary directory for the test audio and cache
+temp_dir = tempfile.mkdtemp()
+wav_path = os.path.join(temp_dir, 'test.wav')
+cache_dir = os.path.join(temp_dir, 'cache')
+
+# Construct a sum of sinusoids, all of which lie below the Nyquist frequency of every target rate
+rng = np.random.RandomState(0)
+frequencies = rng.uniform(50, 0.45 * min(target_rates), size=32)
+phases = rng.uniform(0, 2 * np.pi, size=32)
+
+
+def synthesize(sample_rate):
+    """
+    Sample the sum of sinusoids at a given sampling rate.
+
+    Parameters
+    ----------
+    sample_rate : int
+      Number of samples per second
+
+    Returns
+    ----------
+    audio : ndarray (N)
+      Synthesized audio
+      N - number of samples
+    """
+
+    # Determine the time of each sample
+    times = np.arange(int(np.ceil(duration * sample_rate))) / sample_rate
+    # Sum the sinusoids and scale the result to avoid clipping
+    audio = np.sum(np.sin(2 * np.pi * frequencies[:, None] * times + phases[:, None]), axis=0) / 32
+
+    return audio
+
+
+# Write the test audio at the native sampling rate
+sf.write(wav_path, synthesize(native_rate), native_rate, subtype='FLOAT')
+
+for target_rate in target_rates:
+    # Sample the sinusoids directly at the target rate to obtain the ideal result
+    reference = synthesize(target_rate)
+    # Ignore the edges, where the resampling filters lack context
+    valid = slice(target_rate, -target_rate)
+
+    print(f'{native_rate} Hz -> {target_rate} Hz ({duration} seconds of audio)')
+
+    for res_type in res_types:
+        # Time loading (and resampling) the audio without any caching
+        elapsed = list()
+        for _ in range(num_trials):
+            start = time.perf_counter()
+            audio, _ = tools.load_normalize_audio(wav_path, fs=target_rate, norm=None, res_type=res_type)
+            elapsed.append(time.perf_counter() - start)
+
+        # Measure the signal-to-noise ratio of the resampled audio w.r.t. the ideal result
+        error = audio[valid] - reference[valid]
+        snr = 10 * np.log10(np.sum(reference[valid] ** 2) / np.sum(error ** 2))
+
+        print(f'  {res_type:<12} {1000 * min(elapsed):9.1f} ms   SNR {snr:6.1f} dB')
+
+    # Populate the cache, then time loading the cached audio
+    tools.load_normalize_audio(wav_path, fs=target_rate, norm=None, cache_dir=cache_dir)
+    start = time.perf_counter()
+    tools.load_normalize_audio(wav_path, fs=target_rate, norm=None, cache_dir=cache_dir)
+    print(f'  {"(cached)":<12} {1000 * (time.perf_counter() - start):9.1f} ms')
+
+# Remove the test audio and cache
+shutil.rmtree(temp_dir)
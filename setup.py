@@ -9,7 +9,7 @@ setup(
     author='Frank Cwitkowitz',
     author_email='fcwitkow@ur.rochester.edu',
     # TODO - why does 'pip install -e' consider generated/examples as packages?
-    packages=find_packages(),
+    packages=find_packages(exclude=['tests', 'tests.*']),
     python_requires='>=3.8',
     install_requires=['numpy', 'librosa', 'torch', 'matplotlib', 'sacred', 'mir_eval',
                       'jams', 'mido', 'requests', 'tqdm', 'tensorboard', 'tensorboardX',
@@ -0,0 +1,76 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# Regular imports
+import soundfile as sf
+import numpy as np
+import mido
+import os
+
+# Name of the piano (split) under which to write tracks
+PIANO = 'AkPnBcht'
+
+
+def write_maps(base_dir, durations, sample_rate=16000, seed=0):
+    """
+    Write tracks with random piano notes and noisy audio using the directory layout of MAPS.
+
+    Parameters
+    ----------
+    base_dir : string
+      Directory under which to write the tracks
+    durations : list of float
+      Number of seconds of audio in each track
+    sample_rate : int
+      Number of samples per second of the audio
+    seed : int
+      Seed for the random number generator
+
+    Returns
+    ----------
+    tracks : list of string
+      Names of the written tracks (in the same order as the durations)
+    """
+
+    rng = np.random.RandomState(seed)
+
+    # Construct the path to the directory containing the tracks
+    track_dir = os.path.join(base_dir, PIANO, 'MUS')
+    os.makedirs(track_dir, exist_ok=True)
+
+    tracks = []
+
+    for idx, duration in enumerate(durations):
+        track = f'MAPS_MUS-test{idx}_{PIANO}'
+
+        # Collect (time, message) pairs for a few notes within the track
+        events = []
+        for _ in range(10):
+            onset = rng.uniform(0, 0.8 * duration)
+            offset = onset + rng.uniform(0.05, 0.2 * duration)
+            pitch = rng.randint(21, 109)
+            events.append((onset, mido.Message('note_on', note=pitch, velocity=rng.randint(20, 128))))
+            events.append((offset, mido.Message('note_off', note=pitch, velocity=0)))
+        events.sort(key=lambda e: e[0])
+
+        midi = mido.MidiFile(ticks_per_beat=480)
+        midi_track = mido.MidiTrack()
+        midi.tracks.append(midi_track)
+        midi_track.append(mido.MetaMessage('set_tempo', tempo=500000))
+
+        last_ticks = 0
+        for time, message in events:
+            # Convert the absolute time to a number of ticks relative to the previous message
+            ticks = int(round(mido.second2tick(time, 480, 500000)))
+            midi_track.append(message.copy(time=ticks - last_ticks))
+            last_ticks = ticks
+
+        midi.save(os.path.join(track_dir, f'{track}.mid'))
+
+        # Write noise with a varying amplitude as the audio
+        times = np.arange(int(duration * sample_rate)) / sample_rate
+        audio = 0.1 * rng.randn(len(times)) * (1 + np.sin(2 * np.pi * times))
+        sf.write(os.path.join(track_dir, f'{track}.wav'), audio.astype(np.float32), sample_rate)
+
+        tracks.append(track)
+
+    return tracks
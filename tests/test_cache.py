@@ -0,0 +1,118 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+import amt_tools.tools as tools
+
+# Regular imports
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import os
+
+
+def get_track_data():
+    """
+    Construct a dictionary resembling the ground-truth and features of a track.
+
+    Returns
+    ----------
+    data : dict
+      Dictionary containing arrays, scalars, empty entries, and Python objects
+    """
+
+    # Use a fixed seed such that the data is the same for every test
+    rng = np.random.RandomState(0)
+
+    data = {tools.KEY_TRACK : 'track',
+            tools.KEY_FS : 22050,
+            tools.KEY_HOP : 512,
+            tools.KEY_FEATS : rng.rand(1, 144, 100).astype(tools.FLOAT32),
+            tools.KEY_TIMES : np.arange(100) * 512 / 22050,
+            tools.KEY_MULTIPITCH : (rng.rand(88, 100) > 0.9).astype(np.uint8),
+            tools.KEY_NOTES : None,
+            # Stacked representations are saved as arrays of Python objects
+            tools.KEY_PITCHLIST : np.array({0 : (np.arange(3), [np.array([440.])] * 3)})}
+
+    return data
+
+
+def test_dict_npy_round_trip(tmp_path):
+    """
+    Check that a dictionary saved as raw NumPy arrays is loaded back unchanged.
+    """
+
+    data = get_track_data()
+    path = os.path.join(tmp_path, 'track')
+
+    tools.save_dict_npy(path, data)
+
+    for mmap_mode in ['r', None]:
+        loaded = tools.load_dict_npy(path, mmap_mode)
+
+        assert set(loaded.keys()) == set(data.keys())
+
+        # Scalars and empty entries are kept within the sidecar
+        assert loaded[tools.KEY_TRACK].item() == data[tools.KEY_TRACK]
+        assert loaded[tools.KEY_FS].item() == data[tools.KEY_FS]
+        assert loaded[tools.KEY_NOTES].item() is None
+
+        for key in [tools.KEY_FEATS, tools.KEY_TIMES, tools.KEY_MULTIPITCH]:
+            assert loaded[key].dtype == data[key].dtype
+            np.testing.assert_array_equal(loaded[key], data[key])
+            # Arrays are only memory-mapped when requested
+            assert isinstance(loaded[key], np.memmap) == (mmap_mode is not None)
+
+        # Arrays of Python objects are read into memory
+        pitch_list = loaded[tools.KEY_PITCHLIST].item()
+        np.testing.assert_array_equal(pitch_list[0][0], np.arange(3))
+
+
+def test_dict_npy_no_temporary_files(tmp_path):
+    """
+    Check that only the final directory remains after saving.
+    """
+
+    tools.save_dict_npy(os.path.join(tmp_path, 'track'), get_track_data())
+
+    assert os.listdir(tmp_path) == ['track']
+
+
+def test_dict_npy_overwrite(tmp_path):
+    """
+    Check that saving over previously saved entries replaces them entirely.
+    """
+
+    path = os.path.join(tmp_path, 'track')
+
+    tools.save_dict_npy(path, get_track_data())
+    tools.save_dict_npy(path, {tools.KEY_TIMES : np.arange(5)})
+
+    loaded = tools.load_dict_npy(path)
+
+    # Entries which were not saved the second time are gone
+    assert list(loaded.keys()) == [tools.KEY_TIMES]
+    np.testing.assert_array_equal(loaded[tools.KEY_TIMES], np.arange(5))
+    # The previous entries were set aside and then removed
+    assert os.listdir(tmp_path) == ['track']
+
+
+@pytest.mark.parametrize('save, load', [(tools.save_dict_npy, tools.load_dict_npy),
+                                        (tools.save_dict_npz, tools.load_dict_npz)])
+def test_save_dict_threads(tmp_path, save, load):
+    """
+    Check that threads concurrently saving the same entries do not collide.
+    """
+
+    data = get_track_data()
+    path = os.path.join(tmp_path, 'track')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        # Each thread saves the same entries to the same path
+        list(pool.map(lambda _: save(path, data), range(32)))
+
+    loaded = load(path if save is tools.save_dict_npy else f'{path}.{tools.NPZ_EXT}')
+
+    np.testing.assert_array_equal(loaded[tools.KEY_FEATS], data[tools.KEY_FEATS])
+    # Only the saved entries remain (no temporary files or directories)
+    assert len(os.listdir(tmp_path)) == 1
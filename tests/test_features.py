@@ -0,0 +1,291 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.features import STFT, MelSpec, CQT, VQT, HVQT, HCQT, SignalPower, WaveformWrapper, FeatureCombo
+from amt_tools.features import vqt
+
+# Regular imports
+import subprocess
+import numpy as np
+import warnings
+import librosa
+import pytest
+import sys
+import os
+
+# Hyper-parameters shared by the tests
+SAMPLE_RATE = 16000
+HOP_LENGTH = 256
+
+
+def get_modules(db_ref='max'):
+    """
+    Instantiate a small configuration of each feature extraction module.
+
+    Parameters
+    ----------
+    db_ref : float or str
+      Decibel reference for the modules which convert to decibels
+
+    Returns
+    ----------
+    modules : dict
+      Feature extraction modules keyed by name
+    """
+
+    kwargs = dict(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, db_ref=db_ref)
+    vq_kwargs = dict(fmin=65.4, n_bins=48, bins_per_octave=12, **kwargs)
+
+    modules = {'STFT' : STFT(n_fft=1024, **kwargs),
+               'MelSpec' : MelSpec(n_fft=1024, n_mels=64, **kwargs),
+               'CQT' : CQT(**vq_kwargs),
+               'VQT' : VQT(**vq_kwargs),
+               'HCQT' : HCQT(harmonics=[0.5, 1, 2], **vq_kwargs),
+               'HVQT' : HVQT(harmonics=[0.5, 1, 2], **vq_kwargs),
+               'SignalPower' : SignalPower(win_length=1024, **kwargs),
+               'WaveformWrapper' : WaveformWrapper(win_length=1024, **kwargs),
+               'FeatureCombo' : FeatureCombo([CQT(**vq_kwargs), VQT(**vq_kwargs)])}
+
+    return modules
+
+
+def get_audio(duration=3, seed=0):
+    """
+    Synthesize a sum of sinusoids with a varying amplitude, plus a little noise.
+
+    Parameters
+    ----------
+    duration : float
+      Number of seconds of audio
+    seed : int
+      Seed for the random number generator
+
+    Returns
+    ----------
+    audio : ndarray (N)
+      Synthesized audio
+      N - number of samples
+    """
+
+    rng = np.random.RandomState(seed)
+
+    times = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    frequencies = rng.uniform(60, 0.4 * SAMPLE_RATE, size=8)
+    audio = np.sum(np.sin(2 * np.pi * frequencies[:, None] * times), axis=0) * (1 + np.sin(times)) / 16
+    audio += 0.01 * rng.randn(len(audio))
+
+    return audio.astype(np.float32)
+
+
+@pytest.mark.parametrize('name', get_modules().keys())
+def test_config_hash_deterministic(name):
+    """
+    Check that identically configured modules share a hash, which processing audio does not change.
+    """
+
+    module, duplicate = get_modules()[name], get_modules()[name]
+
+    config_hash = module.get_config_hash()
+
+    assert duplicate.get_config_hash() == config_hash
+
+    # Intermediate results (e.g. cached filters) must not affect the hash
+    module.process_audio(get_audio(1))
+
+    assert module.get_config_hash() == config_hash
+
+
+def test_config_hash_changes():
+    """
+    Check that the hash reflects every parameter which affects the features.
+    """
+
+    config_hash = STFT(hop_length=HOP_LENGTH).get_config_hash()
+
+    assert STFT(hop_length=2 * HOP_LENGTH).get_config_hash() != config_hash
+    assert STFT(hop_length=HOP_LENGTH, db_ref=1.0).get_config_hash() != config_hash
+    assert STFT(hop_length=HOP_LENGTH, dtype='float16').get_config_hash() != config_hash
+    # Modules of different types do not share a hash even with the same parameters
+    assert STFT(hop_length=HOP_LENGTH).features_tag() != MelSpec(hop_length=HOP_LENGTH).features_tag()
+
+    # The number of threads used to evaluate a combination does not affect the features
+    modules = get_modules()
+    combo = FeatureCombo([modules['CQT'], modules['VQT']], num_threads=2)
+
+    assert combo.get_config_hash() == modules['FeatureCombo'].get_config_hash()
+
+
+def test_config_hash_across_processes():
+    """
+    Check that the hash is the same in a separate interpreter (e.g. with another hash seed).
+    """
+
+    script = 'from tests.test_features import get_modules; ' + \
+             'print(" ".join(m.get_config_hash() for m in get_modules().values()))'
+
+    # Run from the root of the repository, such that the tests can be imported
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, cwd=root,
+                            env=dict(os.environ, PYTHONHASHSEED='123'), check=True).stdout.split()
+
+    assert output == [module.get_config_hash() for module in get_modules().values()]
+
+
+@pytest.mark.parametrize('name', get_modules().keys())
+def test_process_batch(name):
+    """
+    Check that features for a batch of signals match those computed for each signal individually.
+    """
+
+    module = get_modules()[name]
+
+    # Include signals of different lengths and loudness (relevant to the decibel reference)
+    audio = [get_audio(2, 0), 0.1 * get_audio(2, 1), get_audio(1, 2), get_audio(2, 3)]
+
+    expected = [module.process_audio(signal) for signal in audio]
+
+    # Signals of equal length are processed together
+    actual = module.process_batch(audio)
+
+    assert len(actual) == len(expected)
+
+    for batch_feats, feats in zip(actual, expected):
+        assert batch_feats.shape == feats.shape
+        np.testing.assert_allclose(batch_feats, feats, atol=1E-5)
+
+    # A two-dimensional array of equal-length signals is processed all at once
+    actual = module.process_batch(np.stack([audio[0], audio[1], audio[3]]))
+
+    for batch_feats, feats in zip(actual, [expected[0], expected[1], expected[3]]):
+        np.testing.assert_allclose(batch_feats, feats, atol=1E-5)
+
+
+@pytest.mark.parametrize('name', get_modules().keys())
+def test_process_chunks(tmp_path, name):
+    """
+    Check that features computed in blocks of frames match those computed for the
+    full signal, given a fixed decibel reference (within numerical precision for
+    variable-Q features, since the resampled audio depends on where blocks begin).
+    """
+
+    module = get_modules(db_ref=1.0)[name]
+
+    audio = get_audio(5)
+
+    expected = module.process_audio(audio)
+
+    # Use a block size which does not divide the number of frames
+    actual = np.concatenate(list(module.process_chunks(audio, num_frames=37)), axis=-1)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1E-4)
+
+    # Blocks can also be read from memory-mapped audio and written directly to disk
+    np.save(os.path.join(tmp_path, 'audio.npy'), audio)
+    audio = np.load(os.path.join(tmp_path, 'audio.npy'), mmap_mode='r')
+
+    actual = module.save_chunks(audio, os.path.join(tmp_path, 'feats.npy'), num_frames=37)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1E-4)
+
+
+def get_nested_combo(num_threads):
+    """
+    Instantiate a combination containing another combination.
+
+    Parameters
+    ----------
+    num_threads : int
+      Number of threads with which each combination evaluates its modules
+
+    Returns
+    ----------
+    combo : FeatureCombo
+      Nested combination of modules
+    """
+
+    kwargs = dict(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, n_fft=1024)
+
+    # Use modules with the same number of bins, such that the features can be stacked
+    inner = FeatureCombo([MelSpec(n_mels=64, **kwargs), MelSpec(n_mels=64, htk=True, **kwargs)],
+                         num_threads=num_threads)
+    combo = FeatureCombo([inner, MelSpec(n_mels=64, **kwargs)], num_threads=num_threads)
+
+    return combo
+
+
+def test_nested_combo_threads():
+    """
+    Check that combinations nested within combinations evaluated by the
+    (shared) pool of threads produce the same features without deadlocking.
+    """
+
+    # Evaluate within a separate interpreter, such that a deadlock fails the test rather than hanging it
+    script = 'from tests.test_features import get_nested_combo, get_audio; import numpy as np; ' + \
+             'audio = get_audio(1); ' + \
+             'assert np.array_equal(get_nested_combo(1).process_audio(audio), ' + \
+             'get_nested_combo(0).process_audio(audio))'
+
+    # Run from the root of the repository, such that the tests can be imported
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    subprocess.run([sys.executable, '-c', script], cwd=root, timeout=60, check=True)
+
+
+@pytest.mark.parametrize('name', ['CQT', 'VQT'])
+def test_vqt_filter_bank(name):
+    """
+    Check that the filter bank is built lazily and that the VQT computed
+    with it matches librosa.vqt for the configured parameters.
+    """
+
+    module = get_modules()[name]
+    # Compare the magnitude before any post-processing
+    module.decibels = False
+
+    # The filter bank is not constructed until audio is processed
+    assert not module._filter_banks
+
+    audio = get_audio(2)
+
+    if not vqt.CACHE_FILTER_BANK:
+        pytest.skip(f'Cached filter banks are not supported for librosa {librosa.__version__}')
+
+    feats = module.process_audio(audio)
+
+    assert module._filter_banks
+
+    expected = np.abs(librosa.vqt(y=audio,
+                                  sr=module.sample_rate,
+                                  hop_length=module.hop_length,
+                                  fmin=module.fmin,
+                                  n_bins=module.n_bins,
+                                  bins_per_octave=module.bins_per_octave,
+                                  gamma=module.gamma))
+
+    # Disregard the (single-precision) round-off relative to the loudest bin
+    np.testing.assert_allclose(feats[0], expected, rtol=0, atol=1E-5 * np.max(expected))
+
+
+def test_vqt_fallback(monkeypatch):
+    """
+    Check that falling back to librosa.vqt is reported only once.
+    """
+
+    monkeypatch.setattr(vqt, 'CACHE_FILTER_BANK', False)
+    monkeypatch.setattr(vqt, 'FALLBACK_WARNED', False)
+
+    module, audio = get_modules()['VQT'], get_audio(1)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        # Process the audio twice
+        module.process_audio(audio)
+        module.process_audio(audio)
+
+    fallback = [w for w in caught if 'falling back to librosa.vqt' in str(w.message)]
+
+    assert len(fallback) == 1
+    assert fallback[0].category is RuntimeWarning
@@ -0,0 +1,68 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.features import STFT, MelSpec, TorchSTFT, TorchMelSpec
+
+# Regular imports
+import numpy as np
+import pytest
+import torch
+
+# Hyper-parameters shared by the tests
+SAMPLE_RATE = 16000
+HOP_LENGTH = 256
+
+
+def get_modules():
+    """
+    Instantiate several configurations of the modules with PyTorch counterparts.
+
+    Returns
+    ----------
+    modules : list of (FeatureModule, type)
+      Feature extraction modules along with the class of their PyTorch counterpart
+    """
+
+    kwargs = dict(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, n_fft=1024)
+
+    modules = [(STFT(**kwargs), TorchSTFT),
+               (STFT(db_ref=1.0, **kwargs), TorchSTFT),
+               (STFT(decibels=False, **kwargs), TorchSTFT),
+               (STFT(center=False, win_length=512, **kwargs), TorchSTFT),
+               (MelSpec(n_mels=64, **kwargs), TorchMelSpec),
+               (MelSpec(n_mels=64, db_ref=1.0, **kwargs), TorchMelSpec),
+               (MelSpec(n_mels=64, decibels=False, htk=True, **kwargs), TorchMelSpec)]
+
+    return modules
+
+
+@pytest.mark.parametrize('module, frontend', get_modules())
+def test_frontend_parity(module, frontend):
+    """
+    Check that the PyTorch frontends match the features computed by the NumPy modules.
+    """
+
+    rng = np.random.RandomState(0)
+
+    # Include signals of different loudness (relevant to the decibel reference)
+    audio = rng.randn(3, SAMPLE_RATE).astype(np.float32) * np.array([[1.], [0.1], [0.01]], dtype=np.float32)
+
+    expected = np.stack([module.process_audio(signal) for signal in audio])
+
+    # Process the batch with a channel dimension, as within TranscriptionModel.pre_proc
+    actual = frontend(module)(torch.from_numpy(audio[:, np.newaxis])).numpy()
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, atol=1E-4)
+
+
+def test_frontend_empty():
+    """
+    Check that the PyTorch frontends produce no frames for empty audio.
+    """
+
+    module = STFT(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, n_fft=1024)
+
+    feats = TorchSTFT(module)(torch.zeros((2, 1, 0)))
+
+    assert tuple(feats.shape) == (2, 1, module.get_feature_size(), 0)
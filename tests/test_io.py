@@ -0,0 +1,425 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+import amt_tools.tools as tools
+
+# Regular imports
+from mir_eval.multipitch import resample_multipitch
+from concurrent.futures import ThreadPoolExecutor
+
+import soundfile as sf
+import numpy as np
+import pytest
+import mido
+import jams
+import os
+
+
+def reference_load_notes_midi(midi_path):
+    """
+    Load all MIDI notes from a MIDI file, keeping track of sustain pedal
+    activity, one event at a time (original implementation of load_notes_midi).
+
+    Parameters
+    ----------
+    midi_path : string
+      Path to MIDI file to read
+
+    Returns
+    ----------
+    batched_notes : ndarray (N x 4)
+      Array of note pitches, intervals, and velocities by row
+      N - number of notes
+    """
+
+    # Keep track of the time and sustain pedal activity
+    time, sustain_status, events = 0, False, []
+
+    for message in mido.MidiFile(midi_path):
+        time += message.time
+
+        if message.type == tools.MIDI_CONTROL_CHANGE:
+            sustain_control = message.control == tools.MIDI_SUSTAIN_CONTROL_NUM
+            sustain_on = message.value >= tools.MIDI_SUSTAIN_CONTROL_NUM
+
+            if sustain_control and sustain_on != sustain_status:
+                sustain_status = sustain_on
+                event_type = tools.MIDI_SUSTAIN_ON if sustain_status else tools.MIDI_SUSTAIN_OFF
+                events.append(dict(index=len(events), time=time, type=event_type, note=None, velocity=0))
+
+        if 'note' in message.type:
+            velocity = message.velocity if message.type == tools.MIDI_NOTE_ON else 0
+            events.append(dict(index=len(events), time=time, type='note',
+                               note=message.note, velocity=velocity, sustain=sustain_status))
+
+    notes = list()
+
+    for i, onset in enumerate(events):
+        if onset['velocity'] == 0:
+            continue
+
+        # The offset is the next note event with the same pitch
+        offset = next(n for n in events[i + 1:] if n['note'] == onset['note'] or n is events[-1])
+
+        if offset['sustain'] and offset is not events[-1]:
+            # The offset is extended until the sustain pedal is released
+            offset = next(n for n in events[offset['index'] + 1:] if n['type'] == tools.MIDI_SUSTAIN_OFF or
+                          n['note'] == onset['note'] or n is events[-1])
+
+        notes.append([onset['time'], offset['time'], onset['note'], onset['velocity']])
+
+    return np.array(notes)
+
+
+def reference_extract_stacked_notes_jams(jam):
+    """
+    Extract stacked notes from JAMS data one note at a time
+    (original implementation of extract_stacked_notes_jams).
+
+    Parameters
+    ----------
+    jam : JAMS object
+      JAMS file data
+
+    Returns
+    ----------
+    stacked_notes : dict
+      Dictionary containing (slice -> (pitches, intervals)) pairs
+    """
+
+    stacked_notes = dict()
+
+    for slice_notes in jam.annotations[tools.JAMS_NOTE_MIDI]:
+        string = slice_notes.annotation_metadata[tools.JAMS_STRING_IDX]
+
+        pitches = np.array([note.value for note in slice_notes])
+        intervals = np.array([[note.time, note.time + note.duration] for note in slice_notes])
+
+        stacked_notes.update(tools.notes_to_stacked_notes(pitches, intervals, string))
+
+    return stacked_notes
+
+
+def reference_time_series_to_uniform(times, values, duration):
+    """
+    Place observations on a uniform time grid one observation at a
+    time (original implementation of time_series_to_uniform).
+
+    Parameters
+    ----------
+    times : ndarray (N)
+      Time in seconds of each observation
+    values : list of ndarray (N)
+      Observations
+    duration : float
+      Total duration in seconds
+
+    Returns
+    ----------
+    times : ndarray
+      Uniform time array
+    values : list of ndarray
+      Observations corresponding to uniform times
+    """
+
+    if not len(times):
+        return np.array([]), []
+
+    hop_length = tools.estimate_hop_length(times)
+
+    num_entries = int(np.ceil(duration / hop_length)) + 1
+
+    new_values = [np.array([])] * num_entries
+    new_times = hop_length * np.arange(num_entries)
+
+    idcs = np.round(times / hop_length).astype(int)
+
+    for i in range(len(idcs)):
+        if times[i] <= duration:
+            new_values[idcs[i]] = values[i]
+
+    return new_times, new_values
+
+
+def reference_extract_stacked_pitch_list_jams(jam, times=None, uniform=True):
+    """
+    Extract stacked pitch lists from JAMS data one observation at a time
+    (original implementation of extract_stacked_pitch_list_jams).
+
+    Parameters
+    ----------
+    jam : JAMS object
+      JAMS file data
+    times : ndarray or None (optional) (N)
+      Time in seconds for resampling
+      N - number of time samples
+    uniform : bool
+      Whether to place annotations on a uniform time grid
+
+    Returns
+    ----------
+    stacked_pitch_list : dict
+      Dictionary containing (slice -> (times, pitch_list)) pairs
+    """
+
+    stacked_pitch_list = dict()
+
+    for slice_pitches in jam.annotations[tools.JAMS_PITCH_HZ]:
+        string = slice_pitches.annotation_metadata[tools.JAMS_STRING_IDX]
+
+        entry_times, slice_pitch_list = np.empty(0), list()
+
+        for pitch in slice_pitches:
+            freq = np.array([pitch.value['frequency']])
+
+            # Zero or unvoiced frequencies are not kept
+            if np.sum(freq) == 0 or not pitch.value['voiced']:
+                freq = np.empty(0)
+
+            entry_times = np.append(entry_times, pitch.time)
+            slice_pitch_list.append(freq)
+
+        entry_times, slice_pitch_list = tools.sort_pitch_list(entry_times, slice_pitch_list)
+
+        if uniform:
+            entry_times, slice_pitch_list = reference_time_series_to_uniform(entry_times, slice_pitch_list,
+                                                                             jam.file_metadata.duration)
+
+        if times is not None:
+            slice_pitch_list = resample_multipitch(entry_times, slice_pitch_list, times)
+            entry_times = times
+
+        stacked_pitch_list.update(tools.pitch_list_to_stacked_pitch_list(entry_times, slice_pitch_list, string))
+
+    return stacked_pitch_list
+
+
+def write_midi(midi_path, seed, num_notes=300, duration=30):
+    """
+    Write a MIDI file with random notes (including repeated pitches) and sustain pedal activity.
+
+    Parameters
+    ----------
+    midi_path : string
+      Path to MIDI file to write
+    seed : int
+      Seed for the random number generator
+    num_notes : int
+      Number of notes
+    duration : float
+      Maximum onset time in seconds
+    """
+
+    rng = np.random.RandomState(seed)
+
+    # Collect (time, order, message) entries, where offsets come before onsets at the same time
+    events = []
+
+    for _ in range(num_notes):
+        onset = rng.uniform(0, duration)
+        offset = onset + rng.uniform(0.05, 2)
+        # Draw from a small range of pitches, such that notes of the same pitch overlap
+        pitch = rng.randint(60, 72)
+
+        events.append((onset, 1, mido.Message('note_on', note=pitch, velocity=rng.randint(1, 128))))
+        # Offsets are either NOTE_OFF messages or NOTE_ON messages with zero velocity
+        off_type = 'note_off' if rng.rand() > 0.5 else 'note_on'
+        events.append((offset, 0, mido.Message(off_type, note=pitch, velocity=0)))
+
+    for _ in range(num_notes // 10):
+        time = rng.uniform(0, duration)
+        # Include redundant pedal values as well as unrelated control changes
+        control = tools.MIDI_SUSTAIN_CONTROL_NUM if rng.rand() > 0.2 else 7
+        events.append((time, 0, mido.Message('control_change', control=control, value=rng.randint(0, 128))))
+
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    # End with the offset of a pitch which is never played, such that every note has an offset
+    events.append((duration + 3, 0, mido.Message('note_off', note=20, velocity=0)))
+
+    midi = mido.MidiFile(ticks_per_beat=480)
+    track = mido.MidiTrack()
+    midi.tracks.append(track)
+    track.append(mido.MetaMessage('set_tempo', tempo=500000))
+
+    last_ticks = 0
+    for time, _, message in events:
+        # Convert the absolute time to a number of ticks relative to the previous message
+        ticks = int(round(mido.second2tick(time, 480, 500000)))
+        track.append(message.copy(time=ticks - last_ticks))
+        last_ticks = ticks
+
+    midi.save(midi_path)
+
+
+def get_jams(seed, duration=10, hop_length=256 / 44100):
+    """
+    Construct JAMS data with random notes and pitch contours across six strings.
+
+    Parameters
+    ----------
+    seed : int
+      Seed for the random number generator
+    duration : float
+      Total duration in seconds
+    hop_length : float
+      Number of seconds between pitch observations
+
+    Returns
+    ----------
+    jam : JAMS object
+      JAMS file data
+    """
+
+    rng = np.random.RandomState(seed)
+
+    jam = jams.JAMS()
+    jam.file_metadata.duration = duration
+
+    for string in range(6):
+        notes = jams.Annotation(namespace=tools.JAMS_NOTE_MIDI, time=0, duration=duration)
+        notes.annotation_metadata = jams.AnnotationMetadata(data_source=str(string))
+
+        time = rng.uniform(0, 1)
+        while time < duration - 1:
+            note_duration = rng.uniform(0.1, 1)
+            notes.append(time=time, duration=note_duration, value=float(rng.uniform(40, 80)))
+            time += note_duration + rng.uniform(0, 0.5)
+
+        contour = jams.Annotation(namespace=tools.JAMS_PITCH_HZ, time=0, duration=duration)
+        contour.annotation_metadata = jams.AnnotationMetadata(data_source=str(string))
+
+        for k in range(int((duration - 0.5) / hop_length)):
+            # Include zero and unvoiced frequencies
+            frequency = float(rng.uniform(80, 800)) if rng.rand() > 0.1 else 0.0
+            contour.append(time=k * hop_length, duration=0,
+                           value={'index' : 0, 'frequency' : frequency, 'voiced' : bool(rng.rand() > 0.3)})
+
+        jam.annotations.append(notes)
+        jam.annotations.append(contour)
+
+    return jam
+
+
+def assert_stacked_pitch_list_equal(actual, expected):
+    """
+    Check that two stacked pitch lists are identical.
+
+    Parameters
+    ----------
+    actual : dict
+      Dictionary containing (slice -> (times, pitch_list)) pairs
+    expected : dict
+      Dictionary containing (slice -> (times, pitch_list)) pairs
+    """
+
+    assert list(actual.keys()) == list(expected.keys())
+
+    for slc in expected.keys():
+        np.testing.assert_allclose(actual[slc][0], expected[slc][0])
+        assert len(actual[slc][1]) == len(expected[slc][1])
+
+        for actual_pitches, expected_pitches in zip(actual[slc][1], expected[slc][1]):
+            np.testing.assert_allclose(actual_pitches, expected_pitches)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_load_notes_midi(tmp_path, seed):
+    """
+    Check that the vectorized MIDI parsing matches the original event loop.
+    """
+
+    midi_path = os.path.join(tmp_path, 'notes.mid')
+    write_midi(midi_path, seed)
+
+    expected = reference_load_notes_midi(midi_path)
+    actual = tools.load_notes_midi(midi_path)
+
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_extract_stacked_notes_jams():
+    """
+    Check that the vectorized JAMS note extraction matches the original loop.
+    """
+
+    jam = get_jams(0)
+
+    expected = reference_extract_stacked_notes_jams(jam)
+
+    # Extraction accepts either the JAMS data or its parsed contents
+    for data in [jam, tools.parse_jams(jam)]:
+        actual = tools.extract_stacked_notes_jams(data)
+
+        assert list(actual.keys()) == list(expected.keys())
+
+        for slc in expected.keys():
+            np.testing.assert_array_equal(actual[slc][0], expected[slc][0])
+            np.testing.assert_array_equal(actual[slc][1], expected[slc][1])
+
+
+@pytest.mark.parametrize('uniform', [True, False])
+def test_extract_stacked_pitch_list_jams(uniform):
+    """
+    Check that the vectorized JAMS pitch contour extraction matches the original loop.
+    """
+
+    jam = get_jams(1)
+
+    for times in [None, np.arange(0, 10, 0.02)]:
+        expected = reference_extract_stacked_pitch_list_jams(jam, times, uniform)
+        actual = tools.extract_stacked_pitch_list_jams(jam, times, uniform)
+
+        assert_stacked_pitch_list_equal(actual, expected)
+
+
+def test_audio_cache_threads(tmp_path):
+    """
+    Check that threads concurrently caching the same audio do not collide.
+    """
+
+    rng = np.random.RandomState(0)
+
+    wav_path = os.path.join(tmp_path, 'audio.wav')
+    sf.write(wav_path, 0.1 * rng.randn(44100).astype(np.float32), 44100)
+
+    cache_dir = os.path.join(tmp_path, 'cache')
+
+    expected, _ = tools.load_normalize_audio(wav_path, fs=16000)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        # Each thread decodes, resamples, and caches the same audio
+        results = list(pool.map(lambda _: tools.load_normalize_audio(wav_path, fs=16000, cache_dir=cache_dir)[0],
+                                range(16)))
+
+    for audio in results + [tools.load_normalize_audio(wav_path, fs=16000, cache_dir=cache_dir)[0]]:
+        np.testing.assert_allclose(audio, expected)
+
+    # Only the cached audio remains (no temporary files)
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_jams_cache_threads(tmp_path):
+    """
+    Check that threads concurrently caching the same parsed JAMS data do not collide.
+    """
+
+    jams_path = os.path.join(tmp_path, 'annotations.jams')
+    get_jams(0, duration=3).save(jams_path, strict=False)
+
+    cache_dir = os.path.join(tmp_path, 'cache')
+
+    expected = tools.extract_stacked_notes_jams(tools.load_jams(jams_path))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        # Each thread parses and caches the same JAMS file
+        results = list(pool.map(lambda _: tools.load_jams(jams_path, cache_dir), range(16)))
+
+    for annotations in results + [tools.load_jams(jams_path, cache_dir)]:
+        stacked_notes = tools.extract_stacked_notes_jams(annotations)
+
+        for slc in expected.keys():
+            np.testing.assert_array_equal(stacked_notes[slc][1], expected[slc][1])
+
+    # Only the cached data remains (no temporary files)
+    assert len(os.listdir(cache_dir)) == 1
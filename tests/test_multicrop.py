@@ -0,0 +1,52 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.datasets import MAPS, MultiCropDataset
+import amt_tools.tools as tools
+
+from .common import write_maps, PIANO
+
+# Regular imports
+import numpy as np
+import pytest
+
+# Hyper-parameters shared by the tests
+SAMPLE_RATE = 16000
+HOP_LENGTH = 512
+NUM_FRAMES = 64
+
+
+@pytest.mark.parametrize('tiled', [True, False])
+def test_short_tracks(tmp_path, tiled):
+    """
+    Check that tracks shorter than one or two crops still yield (padded) crops.
+    """
+
+    # Determine the duration of a single crop
+    crop_duration = HOP_LENGTH * NUM_FRAMES / SAMPLE_RATE
+
+    # Include tracks shorter than one crop, shorter than two crops, and longer than several crops
+    durations = [0.5 * crop_duration, 1.5 * crop_duration, 1.9 * crop_duration, 5.2 * crop_duration]
+    tracks = write_maps(str(tmp_path), durations, SAMPLE_RATE)
+
+    dataset = MAPS(base_dir=str(tmp_path), splits=[PIANO], hop_length=HOP_LENGTH, sample_rate=SAMPLE_RATE,
+                   num_frames=NUM_FRAMES, store_data=False, save_data=False)
+    multicrop = MultiCropDataset(dataset, num_crops=None, tiled=tiled)
+
+    for track, duration in zip(tracks, durations):
+        num_samples = dataset.get_track_num_samples(track)
+
+        for seed in range(20):
+            crops = multicrop.get_crops(track, np.random.RandomState(seed))
+
+            # One crop is expected for each crop duration (at least one)
+            assert len(crops) == max(1, num_samples // dataset.seq_length)
+
+            for crop in crops:
+                # Crops from short tracks are padded to the full number of frames
+                assert crop[tools.KEY_FEATS].shape[-1] == NUM_FRAMES
+                assert crop[tools.KEY_MULTIPITCH].shape[-1] == NUM_FRAMES
+
+    # Every track contributes crops during a pass through the dataset
+    assert len(list(multicrop)) == sum([max(1, dataset.get_track_num_samples(t) // dataset.seq_length)
+                                        for t in tracks])
@@ -0,0 +1,89 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.features import STFT, MelSpec, CQT, FeatureCombo
+from amt_tools.datasets import MAPS
+import amt_tools.tools as tools
+
+from .common import write_maps, PIANO
+
+# Regular imports
+import numpy as np
+import warnings
+import pytest
+
+# Hyper-parameters shared by the tests
+SAMPLE_RATE = 16000
+HOP_LENGTH = 512
+
+
+def get_dataset(base_dir, data_proc, segment_audio):
+    """
+    Instantiate a dataset with the test tracks, without saving anything.
+
+    Parameters
+    ----------
+    base_dir : string
+      Directory containing the tracks
+    data_proc : FeatureModule
+      Feature extraction module
+    segment_audio : bool
+      Whether to calculate features for each window on-the-fly
+
+    Returns
+    ----------
+    dataset : MAPS
+      Dataset with the test tracks
+    """
+
+    dataset = MAPS(base_dir=base_dir, splits=[PIANO], hop_length=HOP_LENGTH, sample_rate=SAMPLE_RATE,
+                   data_proc=data_proc, num_frames=50, store_data=False, save_data=False,
+                   segment_audio=segment_audio)
+
+    return dataset
+
+
+@pytest.mark.parametrize('data_proc', [STFT(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, db_ref=1.0),
+                                       CQT(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, n_bins=60, db_ref=1.0)])
+def test_segment_features(tmp_path, data_proc):
+    """
+    Check that features calculated for segments of audio match those of the full track.
+    """
+
+    write_maps(str(tmp_path), [10], SAMPLE_RATE)
+
+    segmented = get_dataset(str(tmp_path), data_proc, True)
+    full = get_dataset(str(tmp_path), data_proc, False)
+
+    track = full.tracks[0]
+    last_start = full.get_track_num_samples(track) - full.seq_length
+
+    # Include windows at the boundaries of the track, on and off of frame boundaries
+    for sample_start in [0, 7 * HOP_LENGTH, 100 * HOP_LENGTH, 5000, last_start]:
+        expected = full.get_track_data(track, sample_start)
+        actual = segmented.get_track_data(track, sample_start)
+
+        np.testing.assert_array_equal(actual[tools.KEY_AUDIO].shape, expected[tools.KEY_AUDIO].shape)
+        np.testing.assert_allclose(actual[tools.KEY_TIMES], expected[tools.KEY_TIMES])
+        # Segments are decoded separately, so the audio only matches within numerical precision
+        np.testing.assert_allclose(actual[tools.KEY_FEATS], expected[tools.KEY_FEATS], atol=1E-3)
+
+
+def test_segment_reference_warning(tmp_path):
+    """
+    Check that a warning is issued when the decibel reference depends on the audio.
+    """
+
+    write_maps(str(tmp_path), [2], SAMPLE_RATE)
+
+    for data_proc in [STFT(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH),
+                      FeatureCombo([MelSpec(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, db_ref=1.0),
+                                    MelSpec(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, db_ref='running')])]:
+        with pytest.warns(RuntimeWarning, match='decibel reference'):
+            get_dataset(str(tmp_path), data_proc, True)
+
+    for data_proc in [STFT(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, db_ref=1.0),
+                      STFT(sample_rate=SAMPLE_RATE, hop_length=HOP_LENGTH, decibels=False)]:
+        with warnings.catch_warnings():
+            warnings.filterwarnings('error', message='.*decibel reference')
+            get_dataset(str(tmp_path), data_proc, True)
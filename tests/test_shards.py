@@ -0,0 +1,94 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+from amt_tools.datasets.shards import export_shards, ShardedDataset
+from amt_tools.datasets import MAPS
+import amt_tools.tools as tools
+
+from .common import write_maps, PIANO
+
+# Regular imports
+import numpy as np
+import pytest
+import os
+
+# Hyper-parameters shared by the tests
+SAMPLE_RATE = 16000
+HOP_LENGTH = 512
+
+
+def get_dataset(base_dir, lazy_gt=False):
+    """
+    Instantiate a dataset with the test tracks, without saving anything.
+
+    Parameters
+    ----------
+    base_dir : string
+      Directory containing the tracks
+    lazy_gt : bool
+      Whether to render dense ground-truth only when sampling
+
+    Returns
+    ----------
+    dataset : MAPS
+      Dataset with the test tracks
+    """
+
+    dataset = MAPS(base_dir=base_dir, splits=[PIANO], hop_length=HOP_LENGTH, sample_rate=SAMPLE_RATE,
+                   num_frames=None, store_data=False, save_data=False, lazy_gt=lazy_gt)
+
+    return dataset
+
+
+def test_export_shards(tmp_path):
+    """
+    Check that exported shards reproduce the full data of each track.
+    """
+
+    base_dir, save_dir = os.path.join(tmp_path, 'MAPS'), os.path.join(tmp_path, 'shards')
+    write_maps(base_dir, [2, 3, 1], SAMPLE_RATE)
+
+    # Ground-truth which is rendered lazily must also be exported
+    export_shards(get_dataset(base_dir, lazy_gt=True), save_dir, shard_size=2 ** 16)
+
+    dataset = get_dataset(base_dir)
+    sharded = ShardedDataset(save_dir)
+
+    # Partitions can be queried with or without an instance
+    assert ShardedDataset.available_splits(save_dir) == sharded.available_splits() == [PIANO]
+    assert sorted(sharded.tracks) == sorted(dataset.tracks)
+
+    for track in dataset.tracks:
+        expected = dataset.get_track_data(track)
+        actual = sharded.get_track_data(track)
+
+        for key in [tools.KEY_AUDIO, tools.KEY_FEATS, tools.KEY_TIMES,
+                    tools.KEY_MULTIPITCH, tools.KEY_ONSETS, tools.KEY_OFFSETS]:
+            np.testing.assert_allclose(actual[key], expected[key], atol=1E-6)
+
+
+def test_interrupted_export(tmp_path):
+    """
+    Check that an interrupted export does not leave an index behind.
+    """
+
+    base_dir, save_dir = os.path.join(tmp_path, 'MAPS'), os.path.join(tmp_path, 'shards')
+    write_maps(base_dir, [1, 1], SAMPLE_RATE)
+
+    dataset = get_dataset(base_dir)
+    export_shards(dataset, save_dir)
+
+    def load_track_data(track, segment_only=False):
+        # Fail while exporting the final track
+        assert track != dataset.tracks[-1], 'Interrupted'
+        return MAPS.load_track_data(dataset, track, segment_only)
+
+    dataset.load_track_data = load_track_data
+
+    with pytest.raises(AssertionError, match='Interrupted'):
+        # Export over the existing shards
+        export_shards(dataset, save_dir)
+
+    # The index of the previous export was removed and no new index was written
+    with pytest.raises(AssertionError, match='Could not find shard index'):
+        ShardedDataset(save_dir)
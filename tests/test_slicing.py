@@ -0,0 +1,144 @@
+# Author: Frank Cwitkowitz <fcwitkow@ur.rochester.edu>
+
+# My imports
+import amt_tools.tools as tools
+
+# Regular imports
+import numpy as np
+import pytest
+
+
+def get_notes(num_notes=500, duration=60, seed=0):
+    """
+    Construct random (overlapping and unsorted) notes.
+
+    Parameters
+    ----------
+    num_notes : int
+      Number of notes
+    duration : float
+      Maximum onset time in seconds
+    seed : int
+      Seed for the random number generator
+
+    Returns
+    ----------
+    pitches : ndarray (N)
+      Array of pitches corresponding to notes
+      N - number of notes
+    intervals : ndarray (N x 2)
+      Array of onset-offset time pairs corresponding to notes
+      N - number of notes
+    """
+
+    rng = np.random.RandomState(seed)
+
+    pitches = rng.randint(21, 109, size=num_notes).astype(float)
+    onsets = rng.uniform(0, duration, size=num_notes)
+    # Include a few very long notes, which overlap with many windows
+    durations = rng.exponential(0.5, size=num_notes) + 20 * (rng.rand(num_notes) > 0.98)
+    intervals = np.stack([onsets, onsets + durations], axis=-1)
+
+    return pitches, intervals
+
+
+def get_windows(duration=60, num_windows=100, seed=1):
+    """
+    Construct random time windows, including some at or beyond the boundaries of the notes.
+
+    Parameters
+    ----------
+    duration : float
+      Maximum onset time in seconds of the notes
+    num_windows : int
+      Number of random windows
+    seed : int
+      Seed for the random number generator
+
+    Returns
+    ----------
+    windows : list of (float, float)
+      Start and stop time of each window
+    """
+
+    rng = np.random.RandomState(seed)
+
+    starts = rng.uniform(-1, duration + 1, size=num_windows)
+    windows = [(start, start + rng.uniform(0, 5)) for start in starts]
+    windows += [(0, 0), (-5, -1), (0, duration), (duration + 30, duration + 40)]
+
+    return windows
+
+
+@pytest.mark.parametrize('sort', [True, False])
+def test_slice_notes_index(sort):
+    """
+    Check that slicing notes with a precomputed index matches slicing without one.
+    """
+
+    pitches, intervals = get_notes()
+
+    if sort:
+        # Notes are typically sorted by onset
+        pitches, intervals = tools.sort_notes(pitches, intervals)
+
+    index = tools.index_notes(pitches, intervals)
+
+    for start, stop in get_windows():
+        for relative_times in [False, True]:
+            expected = tools.slice_notes(pitches, intervals, start, stop, relative_times)
+            actual = tools.slice_notes(pitches, intervals, start, stop, relative_times, index=index)
+
+            np.testing.assert_array_equal(actual[0], expected[0])
+            np.testing.assert_array_equal(actual[1], expected[1])
+
+
+def test_slice_batched_notes_index():
+    """
+    Check that slicing batched notes with a precomputed index matches slicing without one.
+    """
+
+    batched_notes = tools.notes_to_batched_notes(*tools.sort_notes(*get_notes()))
+    index = tools.index_batched_notes(batched_notes)
+
+    for start, stop in get_windows():
+        expected = tools.slice_batched_notes(batched_notes, start, stop)
+        actual = tools.slice_batched_notes(batched_notes, start, stop, index=index)
+
+        np.testing.assert_array_equal(actual, expected)
+
+
+def test_slice_pitch_list_index():
+    """
+    Check that slicing a pitch list with a precomputed index matches slicing without one.
+    """
+
+    rng = np.random.RandomState(0)
+
+    times = np.arange(6000) * 0.01
+    # Include empty observations alongside observations with several pitches
+    pitch_list = [rng.uniform(80, 800, size=rng.randint(0, 4)) for _ in times]
+    index = tools.index_pitch_list(times, pitch_list)
+
+    for start, stop in get_windows():
+        expected_times, expected_pitch_list = tools.slice_pitch_list(times, pitch_list, start, stop)
+        actual_times, actual_pitch_list = tools.slice_pitch_list(times, pitch_list, start, stop, index=index)
+
+        np.testing.assert_array_equal(actual_times, expected_times)
+        assert len(actual_pitch_list) == len(expected_pitch_list)
+
+        for actual, expected in zip(actual_pitch_list, expected_pitch_list):
+            np.testing.assert_array_equal(actual, expected)
+
+
+def test_empty_index():
+    """
+    Check that slicing with an index of no notes produces no notes.
+    """
+
+    pitches, intervals = np.empty(0), np.empty((0, 2))
+    index = tools.index_notes(pitches, intervals)
+
+    sliced_pitches, sliced_intervals = tools.slice_notes(pitches, intervals, 0, 10, index=index)
+
+    assert len(sliced_pitches) == 0 and sliced_intervals.shape == (0, 2)